@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-event canvas cost of box editing versus box count
+
+Compares a full rebuild of all box items (the old behaviour) with the
+incremental diffing renderer for a resize drag and a drawing preview.
+Uses a real Tk canvas when a display is available, otherwise a counting
+stand-in canvas that measures the Python-side cost and item operations.
+
+Usage: python benchmarks/bench_box_render.py
+"""
+
+import os
+import sys
+import time
+import itertools
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import tkinter as tk
+
+from core.renderer import HighPerformanceRenderer
+from core.image_cache import ImageCache
+from models.bounding_box import BoxUtils
+from models.box_array import BoxArray
+from utils.text_utils import contains_persian
+
+BOX_COUNTS = [100, 500, 1000, 3000]
+EVENTS = 50
+
+
+class CountingCanvas:
+    """Minimal canvas stand-in that counts item operations"""
+
+    def __init__(self):
+        self.ops = 0
+        self._ids = itertools.count(1)
+
+    def _op(self, *args, **kwargs):
+        self.ops += 1
+
+    def _create(self, *args, **kwargs):
+        self.ops += 1
+        return next(self._ids)
+
+    create_rectangle = create_text = create_image = _create
+    coords = itemconfig = delete = tag_raise = tag_lower = move = _op
+
+    def winfo_width(self):
+        return 1280
+
+    def winfo_height(self):
+        return 800
+
+
+class BenchUI:
+    def __init__(self, canvas):
+        self.canvas = canvas
+
+
+class BenchApp:
+    """Just enough application state for the renderer"""
+
+    def __init__(self, canvas, root, n_boxes):
+        rng = random.Random(0)
+        self.root = root
+        self.ui = BenchUI(canvas)
+        self.image_cache = ImageCache(64)
+        self.original_image = np.zeros((4000, 6000, 3), np.uint8)
+        self.image_path = "bench.jpg"
+        self.class_names = ["car", "person", "truck", "bus"]
+        self.zoom_scale = 0.2
+        self.image_offset_x = self.image_offset_y = 0
+        self.box_line_width = 2
+        self.selected_box_line_width = 3
+        self.label_font_size = 12
+        self.handle_size = 5
+        self.drawing_class_id = 0
+        self._colors = {}
+        self.boxes = BoxArray()
+        for _ in range(n_boxes):
+            x, y = rng.uniform(0, 5800), rng.uniform(0, 3800)
+            self.boxes.append({'class_id': rng.randrange(4), 'x_min': x, 'y_min': y,
+                               'x_max': x + rng.uniform(10, 200), 'y_max': y + rng.uniform(10, 200)})
+        self.selected_box_idx = 0
+
+    def get_class_color(self, class_id):
+        return BoxUtils.get_class_color(class_id, self._colors)
+
+    def contains_persian(self, text):
+        return contains_persian(text)
+
+    def update_box_list(self):
+        pass
+
+
+def make_canvas():
+    try:
+        root = tk.Tk()
+        canvas = tk.Canvas(root, width=1280, height=800)
+        canvas.pack()
+        root.update()
+        return root, canvas, True
+    except tk.TclError:
+        return None, CountingCanvas(), False
+
+
+def bench(n_boxes, canvas, root):
+    app = BenchApp(canvas, root, n_boxes)
+    renderer = HighPerformanceRenderer(app)
+    renderer._render_all_boxes()
+    renderer._dirty = False  # image layer is not part of this benchmark
+    box = app.boxes[0]
+    results = {}
+
+    def count():
+        return getattr(canvas, 'ops', 0)
+
+    # Old behaviour: delete and recreate every item per drag event
+    start, ops = time.perf_counter(), count()
+    for _ in range(EVENTS):
+        box['x_max'] += 1
+        renderer.reset_box_items()
+        renderer._render_all_boxes()
+    results['full'] = ((time.perf_counter() - start) / EVENTS * 1000, (count() - ops) / EVENTS)
+
+    # Incremental: only the dragged box and the selection overlay
+    start, ops = time.perf_counter(), count()
+    for _ in range(EVENTS):
+        box['x_max'] += 1
+        renderer.refresh_box(box)
+    results['resize'] = ((time.perf_counter() - start) / EVENTS * 1000, (count() - ops) / EVENTS)
+
+    # Drawing preview: only the dashed rectangle moves
+    start, ops = time.perf_counter(), count()
+    for i in range(EVENTS):
+        renderer.set_temp_box((100, 100, 200 + i, 200 + i))
+    results['preview'] = ((time.perf_counter() - start) / EVENTS * 1000, (count() - ops) / EVENTS)
+
+    if root is not None:
+        canvas.delete("all")
+    return results
+
+
+def main():
+    root, canvas, real_tk = make_canvas()
+    print(f"Canvas: {'Tk' if real_tk else 'counting stand-in (no display)'}")
+    print(f"{'boxes':>6} | {'full rebuild':>20} | {'incremental resize':>20} | {'drawing preview':>20}")
+    for n in BOX_COUNTS:
+        r = bench(n, canvas, root)
+        cells = [f"{ms:7.3f} ms {ops:6.0f} ops" if not real_tk else f"{ms:7.3f} ms"
+                 for ms, ops in (r['full'], r['resize'], r['preview'])]
+        print(f"{n:>6} | " + " | ".join(f"{c:>20}" for c in cells))
+    if root is not None:
+        root.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: ndarray -> Tk PhotoImage display path, per megapixel
+
+old: cv2.cvtColor(full frame) -> Image.fromarray -> PIL resize -> ImageTk.PhotoImage
+new: cached BGR pyramid level -> cv2.warpAffine into a preallocated PPM
+     buffer -> in-place BGR->RGB -> tk.PhotoImage(data=...); at zoom 1.0
+     the BGR->RGB swap writes straight into the buffer instead
+
+Both produce the same number of display pixels. Without a display the
+PhotoImage step is skipped and only the buffer preparation is timed.
+
+Usage: python benchmarks/bench_display_path.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+import tkinter as tk
+from PIL import Image, ImageTk
+
+FRAME_SIZES = [(2000, 1500), (6000, 4000)]
+ZOOMS = [0.25, 1.0]
+REPEATS = 5
+
+
+def old_path(image, zoom, with_tk):
+    img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    pil_img = Image.fromarray(img_rgb)
+    if zoom != 1.0:
+        pil_img = pil_img.resize((int(pil_img.width * zoom), int(pil_img.height * zoom)), Image.NEAREST)
+    if with_tk:
+        return ImageTk.PhotoImage(image=pil_img)
+    return pil_img
+
+
+def new_path(bgr_level, disp_w, disp_h, buffer, pixels, with_tk):
+    src_h, src_w = bgr_level.shape[:2]
+    kx, ky = src_w / disp_w, src_h / disp_h
+    if kx == 1 and ky == 1:
+        cv2.cvtColor(bgr_level, cv2.COLOR_BGR2RGB, dst=pixels)
+        data = bytes(buffer)
+        if with_tk:
+            return tk.PhotoImage(width=disp_w, height=disp_h, data=data, format="PPM")
+        return data
+    transform = np.float32([[kx, 0, 0.5 * kx - 0.5], [0, ky, 0.5 * ky - 0.5]])
+    cv2.warpAffine(bgr_level, transform, (disp_w, disp_h), dst=pixels,
+                   flags=cv2.INTER_NEAREST | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+    cv2.cvtColor(pixels, cv2.COLOR_BGR2RGB, dst=pixels)
+    data = bytes(buffer)
+    if with_tk:
+        return tk.PhotoImage(width=disp_w, height=disp_h, data=data, format="PPM")
+    return data
+
+
+def timed(fn, *args):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    try:
+        root = tk.Tk()
+        root.withdraw()
+        with_tk = True
+    except tk.TclError:
+        root = None
+        with_tk = False
+    print(f"PhotoImage step: {'included' if with_tk else 'skipped (no display)'}")
+    print(f"{'frame':>11} {'zoom':>5} | {'old ms/MP':>10} | {'new ms/MP':>10} | {'speedup':>7}")
+
+    rng = np.random.default_rng(0)
+    for w, h in FRAME_SIZES:
+        image = rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+        for zoom in ZOOMS:
+            disp_w, disp_h = int(w * zoom), int(h * zoom)
+            megapixels = disp_w * disp_h / 1e6
+
+            # The new path reuses a cached level; build it once like the pyramid does
+            level = 0
+            while level < 4 and 0.5 ** (level + 1) >= zoom:
+                level += 1
+            bgr_level = image
+            for _ in range(level):
+                bgr_level = cv2.resize(bgr_level, (bgr_level.shape[1] // 2, bgr_level.shape[0] // 2),
+                                       interpolation=cv2.INTER_AREA)
+
+            header = f"P6 {disp_w} {disp_h} 255\n".encode("ascii")
+            buffer = bytearray(len(header) + disp_w * disp_h * 3)
+            buffer[:len(header)] = header
+            pixels = np.frombuffer(buffer, dtype=np.uint8, offset=len(header)).reshape(disp_h, disp_w, 3)
+
+            old = timed(old_path, image, zoom, with_tk) * 1000 / megapixels
+            new = timed(new_path, bgr_level, disp_w, disp_h, buffer, pixels, with_tk) * 1000 / megapixels
+            print(f"{w:>5}x{h:<5} {zoom:>5.2f} | {old:>10.2f} | {new:>10.2f} | {old / new:>6.1f}x")
+
+    if root is not None:
+        root.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: YOLO label parse and serialize, 100k-line files
+
+old: per-line split/float parse; per-row f-string writelines
+new: utils.label_codec decode_labels (one np.loadtxt pass, vectorized
+     validation) and encode_labels (one %-format over all rows)
+
+Also times a file with a few malformed lines, which takes the per-line
+fallback so bad lines can be reported with their line numbers.
+
+Usage: python benchmarks/bench_label_codec.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.label_codec import decode_labels, encode_labels
+
+LINES = 100_000
+NUM_CLASSES = 80
+PRECISION = 6
+REPEATS = 5
+
+
+def old_parse(data, num_classes):
+    class_ids, rows = [], []
+    for line in data.decode().splitlines():
+        parts = line.strip().split()
+        if len(parts) != 5:
+            continue
+        try:
+            cls, cx, cy, w, h = map(float, parts)
+            cls = int(cls)
+        except ValueError:
+            continue
+        if not (0 <= cls < num_classes):
+            continue
+        class_ids.append(cls)
+        rows.append((cx, cy, w, h))
+    return np.array(class_ids, np.int32), np.array(rows, np.float64)
+
+
+def old_serialize(class_ids, yolo):
+    return "".join(f"{class_id} {cx:.{PRECISION}f} {cy:.{PRECISION}f} {w:.{PRECISION}f} {h:.{PRECISION}f}\n"
+                   for class_id, (cx, cy, w, h) in zip(class_ids.tolist(), yolo.tolist()))
+
+
+def best_ms(fn, *args):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    class_ids = rng.integers(0, NUM_CLASSES, LINES).astype(np.int32)
+    yolo = rng.random((LINES, 4))
+    text = encode_labels(class_ids, yolo, PRECISION)
+    data = text.encode()
+
+    assert old_serialize(class_ids, yolo) == text
+    decoded = decode_labels(data, NUM_CLASSES)
+    assert np.array_equal(decoded['class_ids'], class_ids)
+    assert np.allclose(decoded['yolo'], yolo, atol=10 ** -PRECISION)
+
+    lines = text.splitlines(keepends=True)
+    for i in range(0, LINES, LINES // 10):
+        lines[i] = "garbage\n"
+    dirty = "".join(lines).encode()
+    assert len(decode_labels(dirty, NUM_CLASSES)['errors']) == 10
+
+    print(f"{LINES} lines, {len(data) / 2**20:.1f} MB, best of {REPEATS}")
+    print(f"{'':24}{'old ms':>10}{'new ms':>10}{'speedup':>10}")
+    for name, old, new in [
+        ("parse", lambda: old_parse(data, NUM_CLASSES), lambda: decode_labels(data, NUM_CLASSES)),
+        ("parse (10 bad lines)", lambda: old_parse(dirty, NUM_CLASSES), lambda: decode_labels(dirty, NUM_CLASSES)),
+        ("serialize", lambda: old_serialize(class_ids, yolo), lambda: encode_labels(class_ids, yolo, PRECISION)),
+    ]:
+        old_ms, new_ms = best_ms(old), best_ms(new)
+        print(f"{name:24}{old_ms:>10.1f}{new_ms:>10.1f}{old_ms / new_ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
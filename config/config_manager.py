@@ -41,4 +41,10 @@ def load_config(path: str = "config.json") -> Dict[str, Any]:
         except Exception as e:
             print(f"[WARN] Failed to parse {path}: {e}")
     
+    performance = cfg.get("performance")
+    if isinstance(performance, dict) and "image_cache_size" in performance:
+        # The cache used to hold a number of images; it now has a memory budget
+        print(f"[WARN] {path}: performance.image_cache_size (image count) is no longer used; "
+              f"set performance.image_cache_mb (megabytes) instead")
+    
     return deep_merge(DEFAULT_CONFIG, cfg)
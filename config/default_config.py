@@ -18,12 +18,15 @@ DEFAULT_CONFIG = {
         "zoom_factor_out": 1.25,
         "mouse_wheel_zoom": True,
         "mouse_wheel_zoom_step": 1.15,
-        "session_history_file": "session_history.pkl"
+        "session_history_file": "session_history.jsonl",
+        "session_compact_bytes": 1048576,
+        "io_journal_file": "io_journal.jsonl"
     },
     "paths": {
         "image_dir": "",
         "label_dir": "",
         "processed_dir": "sample",
+        "recursive_image_search": False,
         "log_dir": "logs",
         "font_search_paths": [
             "arial.ttf",
@@ -48,6 +51,21 @@ DEFAULT_CONFIG = {
         "rtl_naive_reverse": True,
         "min_box_draw_pixels": 3,
         "restrict_drawing_inside_image": True
+    },
+    "dataset": {
+        "use_manifest": True,
+        "manifest_dir": ".manifests",
+        "watch_directory": True,
+        "watch_backend": "auto",
+        "watch_poll_interval_ms": 1000,
+        "archive_label_suffix": "_labels"
+    },
+    "export": {
+        "create_backup": True,
+        "backup_count": 3,
+        "validate_before_save": True,
+        "auto_export_formats": ["yolo"],
+        "export_image_copy": False
     },
         "ai_assistant": {
         "enabled": True,
@@ -56,6 +74,9 @@ DEFAULT_CONFIG = {
         "iou_threshold": 0.45,
         "auto_suggest_boxes": True,
         "suggest_on_load": True,
+        "merge_policy": "always",
+        "merge_iou_threshold": 0.5,
+        "duplicate_iou_threshold": 0.7,
         "enabled_classes": list(range(80)),
         "class_names_coco": [
             "person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat",
@@ -106,6 +127,7 @@ DEFAULT_CONFIG = {
     },
     "history": {
         "undo_history_size": 100,
+        "max_images": 20,
         "auto_save_state_on_load": True
     },
     "label_format": {
@@ -129,11 +151,14 @@ DEFAULT_CONFIG = {
         "lazy_image_loading": True,
         "keep_class_selected_after_drawing": True,
         "update_image_paths_after_move": True,
+        "processed_mode": "move",
+        "materialize_processed_mode": "link",
         "real_time_box_preview": True
     },
     "keybindings": {
         "save": "Control-s",
         "undo": "Control-z",
+        "redo": "Control-y",
         "delete_box": "Delete",
         "prev_image": ["Left", "a"],
         "next_image": ["Right", "d"],
@@ -144,7 +169,8 @@ DEFAULT_CONFIG = {
         "select_all_boxes": "Control-a",
         "duplicate_box": "Control-d",
         "quick_save_next": "Control-Shift-s",
-        "reload_image": "i"
+        "reload_image": "i",
+        "materialize_processed": "Control-m"
     },
     "logging": {
         "level": "INFO",
@@ -160,7 +186,7 @@ DEFAULT_CONFIG = {
     },
     "autosave": {
         "enabled": True,
-        "on_interval_seconds": 0,
+        "on_interval_seconds": 5,
         "on_class_change": False
     },
     "plugins": {
@@ -168,13 +194,36 @@ DEFAULT_CONFIG = {
         "config": {}
     },
     "performance": {
-        "image_cache_size": 5,
+        "image_cache_mb": 1024,
         "enable_selective_rendering": True,
         "render_throttle_ms": 16,
         "optimize_memory_usage": True,
         "enable_gpu_acceleration": False,
         "enable_double_buffering": True,
         "use_canvas_items": True,
-        "max_fps": 60
+        "max_fps": 60,
+        "pyramid_levels": 4,
+        "tile_size": 512,
+        "tile_margin": 256,
+        "tile_cache_size": 64,
+        "spatial_index_cell_size": 256,
+        "lod_label_min_px": 16,
+        "lod_tiny_box_px": 4,
+        "raster_overlay_threshold": 1500,
+        "adaptive_quality": True,
+        "refine_delay_ms": 150,
+        "draft_level_bias": 1,
+        "refine_interpolation": "area",
+        "prefetch_enabled": True,
+        "prefetch_ahead": 3,
+        "prefetch_behind": 1,
+        "prefetch_workers": 2
+    },
+    "ui": {
+        "show_tooltips": True,
+        "animate_transitions": True,
+        "smooth_scrolling": True,
+        "highlight_hover": True,
+        "button_style": "modern"
     }
 }
@@ -6,19 +6,34 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 import logging
 import os
-import pickle
 import time, json
-from collections import deque
-from typing import List, Dict, Tuple, Optional, Any
-import cv2
+import hashlib
+from collections import OrderedDict
+from typing import List, Dict, Optional
+import numpy as np
 
 from config.config_manager import load_config
 from .renderer import HighPerformanceRenderer
 from .image_cache import ImageCache
+from .prefetcher import ImagePrefetcher
+from .spatial_index import BoxSpatialIndex
+from .input_coalescer import InputCoalescer
+from .history import HistoryStore, ImageHistory
+from .box_matching import merge_suggestions
+from .io_worker import WriteBehindWorker
+from .dir_scanner import DirectoryScanner
+from .manifest import DatasetManifest
+from .dir_watcher import DirectoryWatcher
+from .processed_index import ProcessedIndex
+from .processed_log import ProcessedLog
+from .archive_source import ArchiveSource
+from .session_journal import SessionJournal, splice, apply_splices
 from ui.main_window import MainWindow
 from utils.file_utils import FileUtils
+from utils.label_codec import encode_labels
 from utils.text_utils import contains_persian
 from models.bounding_box import BoxUtils
+from models.box_array import BoxArray
 from core.ai_predictor import AIPredictor
 
 CONFIG = load_config()
@@ -32,7 +47,13 @@ class YOLOLabelStudio:
             self.logger = logging.getLogger("YOLOLabelStudio")
             
             # Initialize core components
-            self.image_cache = ImageCache(CONFIG["performance"]["image_cache_size"])
+            self.image_cache = ImageCache(CONFIG["performance"]["image_cache_mb"])
+            self.prefetcher = ImagePrefetcher(
+                self.image_cache,
+                ahead=CONFIG["performance"]["prefetch_ahead"],
+                behind=CONFIG["performance"]["prefetch_behind"],
+                max_workers=CONFIG["performance"]["prefetch_workers"]
+            )
             
             # Application state
             self._initialize_state()
@@ -49,9 +70,34 @@ class YOLOLabelStudio:
             # Initialize renderer AFTER UI is created
             self.renderer = HighPerformanceRenderer(self)
             
+            # Motion handlers, status and cursor updates run at most once per frame
+            self.input_coalescer = InputCoalescer(self.root, self.ui, self.renderer.frame_interval_ms)
+            
+            # Label writes and processed-dir moves happen off the UI thread
+            self.io_worker = WriteBehindWorker(
+                self.root, CONFIG["app"]["io_journal_file"],
+                create_backup=CONFIG["export"]["create_backup"],
+                backup_count=CONFIG["export"]["backup_count"],
+                on_error=self._on_io_error
+            )
+            recovered = self.io_worker.recover()
+            if recovered:
+                self.logger.info(f"Replaying {recovered} unfinished file operations from last session")
+            
+            # Lists image directories in the background (behavior.lazy_image_loading)
+            self.dir_scanner = DirectoryScanner(self.root, self._on_scan_batch, self._on_scan_done)
+            # Picks up images added or deleted while the directory is open
+            self.dir_watcher = DirectoryWatcher(self.root, self._on_dir_change,
+                                                CONFIG["dataset"]["watch_backend"],
+                                                CONFIG["dataset"]["watch_poll_interval_ms"])
+            # Session deltas, flushed every autosave.on_interval_seconds
+            self.session_journal = SessionJournal(CONFIG["app"]["session_history_file"],
+                                                  CONFIG["app"]["session_compact_bytes"])
+            
             # Load previous session if enabled
             if CONFIG["app"]["load_previous_session"]:
                 self.load_session_history()
+            self._schedule_session_flush()
                 
             self.logger.info("YOLO Labeling Studio initialized")
 
@@ -63,6 +109,8 @@ class YOLOLabelStudio:
         self.image_files = []
         self.current_index = -1
         self.image_name = ""
+        self.image_path = ""
+        self.manifest = None  # DatasetManifest of image_dir (dataset.use_manifest)
         
         # Image data
         self.original_image = None
@@ -75,11 +123,13 @@ class YOLOLabelStudio:
         self.max_zoom = CONFIG["app"]["max_zoom"]
         self.image_offset_x = 0
         self.image_offset_y = 0
-        self.zoom_cache = {}
+        self.zoom_cache = OrderedDict()  # Rendered display tiles (LRU)
         
         # Box management
-        self.boxes = []
+        self.boxes = BoxArray()  # Columnar store; items are dict-like BoxViews
+        self.box_index = BoxSpatialIndex(CONFIG["performance"]["spatial_index_cell_size"])
         self.selected_box_idx = -1
+        self.hover_box_idx = -1
         self.drawing_class_id = None
         self.box_list_to_box_index = []
         
@@ -100,9 +150,29 @@ class YOLOLabelStudio:
         self.edge_hit_margin = CONFIG["drawing"]["edge_hit_margin"]
         
         # History and caching
-        self.history = deque(maxlen=CONFIG["history"]["undo_history_size"])
+        self.history_store = HistoryStore(CONFIG["history"]["max_images"],
+                                          CONFIG["history"]["undo_history_size"])
+        self.history = ImageHistory(CONFIG["history"]["undo_history_size"])
+        self._drag_before = None  # (index, row) of the box being dragged
         self._cached_class_colors = {}
         self.processed_images = set()
+        self._moved_out = set()  # Original paths of images this session moved away
+        self.processed_index = ProcessedIndex()
+        self.processed_log = None  # Set in the "virtual" processed mode
+        self.archive = None  # ArchiveSource when image_dir is a zip/tar shard
+        self._user_label_dir = None  # label_dir to restore once the archive closes
+        
+        # Label change detection: (label path, digest) of the state on disk
+        self._label_fingerprint = None
+        self.label_writes = 0
+        self.label_writes_skipped = 0
+        self.label_bytes_saved = 0
+        self._pinned_path = None
+        
+        # Box rows as on disk, and as last written to the session journal
+        self._saved_rows = np.zeros((0, 5))
+        self._journaled_rows = self._saved_rows
+        self._journaled_view = None
 
     # Add properties to access UI components
     @property
@@ -183,17 +253,223 @@ class YOLOLabelStudio:
         directory = filedialog.askdirectory()
         if directory:
             self.image_dir = directory
-            self.image_files = FileUtils.find_image_files(directory)
-            self.current_index = 0 if self.image_files else -1
-            if self.image_files:
-                self.load_image()
-            self.update_status_label()
+            self.scan_image_dir(directory)
+
+    def open_image_archive(self):
+        """Open a zip/tar dataset shard in place of an image directory"""
+        path = filedialog.askopenfilename(filetypes=[("Image archives", "*.zip *.tar"),
+                                                     ("All files", "*.*")])
+        if path:
+            self.image_dir = path
+            self.scan_image_dir(path)
+
+    def _open_archive(self, path: str):
+        """Serve images from path if it is an archive; labels go to a sidecar directory"""
+        if self.archive is not None:
+            if self.archive.path == os.path.abspath(path):
+                return
+            self.prefetcher.source = None
+            self.archive.close()
+            self.archive = None
+            self._restore_label_dir()
+        if not ArchiveSource.is_archive(path):
+            return
+        try:
+            self.archive = ArchiveSource(path)
+        except (OSError, ValueError) as e:
+            self.log_error(f"Cannot open archive {path}: {e}")
+            return
+        self.prefetcher.source = self.archive
+        self._user_label_dir = self.label_dir
+        self.label_dir = os.path.splitext(path)[0] + CONFIG["dataset"]["archive_label_suffix"]
+        FileUtils.ensure_directory(self.label_dir)
+
+    def _restore_label_dir(self):
+        """Put back the label directory that was in use before an archive replaced it"""
+        if self._user_label_dir is not None:
+            self.label_dir = self._user_label_dir
+            self._user_label_dir = None
+
+    def _user_facing_label_dir(self) -> str:
+        """label_dir as the user chose it, ignoring an open archive's sidecar"""
+        return self.label_dir if self._user_label_dir is None else self._user_label_dir
+
+    def _open_manifest(self, directory: str) -> Optional[DatasetManifest]:
+        """Load the manifest of directory, or None if manifests are disabled"""
+        if not CONFIG["dataset"]["use_manifest"]:
+            return None
+        manifest = DatasetManifest(directory, self.label_dir,
+                                   recursive=CONFIG["paths"]["recursive_image_search"],
+                                   exclude=[self.get_processed_dir(create=False)],
+                                   manifest_dir=CONFIG["dataset"]["manifest_dir"])
+        manifest.load()
+        return manifest
+
+    def _open_processed_log(self, directory: str):
+        """Load the processed log of directory in the "virtual" processed mode"""
+        if self.processed_log is not None:
+            self.processed_log.close()
+            self.processed_log = None
+        # Archive members cannot be moved, so archives always use the log
+        if CONFIG["behavior"]["processed_mode"] != "virtual" and self.archive is None:
+            return
+        self.processed_log = ProcessedLog(directory, CONFIG["dataset"]["manifest_dir"])
+        count = self.processed_log.load()
+        self.logger.info(f"{count} images marked processed in {self.processed_log.path}")
+
+    def _skip_processed(self, source):
+        """Wrap a batch source to leave out images the processed log marks done"""
+        log = self.processed_log
+        if log is None or not len(log):
+            return source
+
+        def unprocessed():
+            for batch in source():
+                batch = [path for path in batch if not log.is_processed(path)]
+                if batch:
+                    yield batch
+        return unprocessed
+
+    @staticmethod
+    def _manifest_batches(manifest: DatasetManifest):
+        """Refresh manifest, yielding its image batches, then persist it"""
+        yield from manifest.refresh()
+        manifest.save()
+
+    def _image_source(self, directory: str):
+        """Batch source listing directory (archive, manifest or scan) minus processed images"""
+        recursive = CONFIG["paths"]["recursive_image_search"]
+        exclude = [self.get_processed_dir(create=False)]
+        self._open_archive(directory)
+        self.manifest = self._open_manifest(directory) if self.archive is None else None
+        if self.archive is not None:
+            archive = self.archive
+            source = lambda: [archive.image_files()]
+        elif self.manifest is not None:
+            manifest = self.manifest
+            source = lambda: self._manifest_batches(manifest)
+        else:
+            source = lambda: FileUtils.iter_image_files(directory, recursive, exclude)
+        self._open_processed_log(directory)
+        return self._skip_processed(source)
+
+    def scan_image_dir(self, directory: str):
+        """List the images in directory, streaming them in if lazy loading is on"""
+        self.dir_watcher.stop()
+        self.processed_index.build(self.get_processed_dir(create=False), directory)
+        if self.manifest is not None:
+            self.manifest.save()
+        source = self._image_source(directory)
+        self.session_journal.record('open', image_dir=directory, label_dir=self._user_facing_label_dir())
+
+        if CONFIG["behavior"]["lazy_image_loading"]:
+            # The first batch loads an image; later ones extend the list
+            self.image_files = []
+            self.current_index = -1
+            self.dir_scanner.stream(source)
+            self.ui.set_status(f"Scanning {directory}...")
+            return
+
+        self.image_files = [path for batch in source() for path in batch]
+        self.current_index = 0 if self.image_files else -1
+        if self.image_files:
+            self.load_image()
+        self.update_status_label()
+        self._watch_image_dir()
+
+    def _on_scan_batch(self, batch: List[str]):
+        """Append newly discovered images (Tk thread)"""
+        self.image_files.extend(batch)
+        if self.current_index < 0:
+            self.current_index = 0
+            self.load_image()
+            return
+
+        if self.original_image is not None:
+            self.ui.set_progress((self.current_index + 1) / len(self.image_files) * 100)
+        # The prefetch window may have been cut short by the end of the list
+        if (CONFIG["performance"]["prefetch_enabled"] and
+                len(self.image_files) - len(batch) <= self.current_index + self.prefetcher.ahead):
+            self.prefetcher.schedule(self.image_files, self.current_index,
+                                     self._label_path if self.label_dir else None,
+                                     len(self.class_names))
+
+    def _on_scan_done(self, count: int):
+        """Report the final image count (Tk thread)"""
+        self._watch_image_dir()
+        if not count:
+            self.ui.set_status("No images found")
+            return
+        self.update_status_label()
+        self.logger.info(f"Found {count} images in {self.image_dir}")
+
+    def _image_sort_key(self, path: str):
+        """Position of path in image_files; moved images keep their original place"""
+        return FileUtils.image_sort_key(self._original_path(path), self.image_dir)
+
+    def _watch_image_dir(self):
+        """Start following changes to the image directory"""
+        if CONFIG["dataset"]["watch_directory"] and self.image_dir and os.path.isdir(self.image_dir):
+            self.dir_watcher.start(self.image_dir, self.image_files,
+                                   CONFIG["paths"]["recursive_image_search"],
+                                   [self.get_processed_dir(create=False)])
+
+    def _insert_position(self, sort_key) -> int:
+        """bisect_right over image_files by sort key (bisect's key= needs Python 3.10)"""
+        lo, hi = 0, len(self.image_files)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if sort_key < self._image_sort_key(self.image_files[mid]):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def _on_dir_change(self, added: List[str], removed: List[str]):
+        """Merge images that appeared or vanished while the directory is open (Tk thread)"""
+        current = (self.image_files[self.current_index]
+                   if 0 <= self.current_index < len(self.image_files) else None)
+        # Our own moves and the image on screen stay put
+        removed = set(removed) - self._moved_out - {current}
+        if removed:
+            self.image_files = [path for path in self.image_files if path not in removed]
+
+        inserted = 0
+        key = self._image_sort_key
+        for path in added:
+            self._moved_out.discard(path)
+            if self.processed_log is not None and self.processed_log.is_processed(path):
+                continue
+            pos = self._insert_position(key(path))
+            if pos and self.image_files[pos - 1] == path:
+                continue
+            self.image_files.insert(pos, path)
+            inserted += 1
+        if not inserted and not removed:
+            return
+        self.logger.info(f"Image directory changed: {inserted} added, {len(removed)} removed")
+
+        if current is not None:
+            self.current_index = self.image_files.index(current)
+        elif self.image_files:
+            self.current_index = 0
+            self.load_image()
+            return
+        self.update_status_label()
+        if CONFIG["performance"]["prefetch_enabled"] and self.current_index >= 0:
+            self.prefetcher.schedule(self.image_files, self.current_index,
+                                     self._label_path if self.label_dir else None,
+                                     len(self.class_names))
 
     def open_label_dir(self):
         """Open label directory dialog"""
         directory = filedialog.askdirectory()
         if directory:
             self.label_dir = directory
+            self._user_label_dir = None  # An explicit choice outlives the archive
+            self.session_journal.record('open', image_dir=self.image_dir, label_dir=directory)
+            if self.manifest is not None:
+                self.manifest.refresh_labels(directory)
             if self.image_files:
                 self.load_image()
 
@@ -212,15 +488,27 @@ class YOLOLabelStudio:
             return
 
         path = self.image_files[self.current_index]
+        # Coming back to an image whose save or move is still queued
+        if self.io_worker.pending(path):
+            self.io_worker.wait(path)
         path = self._handle_missing_image(path)
         if not path:
             return
 
-        # Load image
-        self.original_image = FileUtils.load_image_with_caching(path, self.image_cache.cache)
+        # Load image (usually a cache hit thanks to the prefetcher)
+        self.original_image = self.prefetcher.get_image(path)
         if self.original_image is None:
+            if not os.path.exists(path):
+                # Deleted outside the app; report it without blocking navigation
+                self.log_error(f"Image not found: {path}")
+                return
             messagebox.showerror("Image Error", f"Failed to load: {os.path.basename(path)}")
             return
+        self._pin_current_image(path)
+
+        # Keep the outgoing image's undo stack for when we come back
+        if self.image_path:
+            self.history_store.park(self.image_path, self.history, self.boxes)
 
         self._setup_image_state(path)
 
@@ -235,81 +523,230 @@ class YOLOLabelStudio:
             self.ui.set_status("Running AI pre-labeling...")
             ai_boxes = self.ai_predictor.predict(self.original_image)
 
-            # Policy: Only add AI boxes if no manual boxes exist
             if ai_boxes:
                 if not self.boxes:
                     # Convert AI box dicts directly into self.boxes
                     self.boxes.extend(ai_boxes)
                     self.ui.set_status(f"Added {len(ai_boxes)} AI-suggested boxes")
+                elif CONFIG["ai_assistant"]["merge_policy"] == "always":
+                    self._merge_ai_boxes(BoxArray.from_dicts(ai_boxes))
                 else:
                     self.ui.set_status("Manual labels exist — skipped AI suggestions")
             else:
                 self.ui.set_status("No objects detected by AI")
 
         # Finalize
-        self.save_state()
+        self.box_index.rebuild(self.boxes)
+        self.history = self.history_store.checkout(path, self.boxes)
         self.update_status_label()
         self.renderer.mark_dirty()  # 🔥 Critical: triggers visual update
+        self.session_journal.record('index', i=self.current_index, path=path)
+        self._journaled_rows = self._saved_rows
+
+        # Warm the cache for the next keypress
+        if CONFIG["performance"]["prefetch_enabled"]:
+            self.prefetcher.schedule(self.image_files, self.current_index,
+                                     self._label_path if self.label_dir else None,
+                                     len(self.class_names))
+
+    def _merge_ai_boxes(self, detections: BoxArray):
+        """Add AI detections not already covered by existing labels"""
+        merge = merge_suggestions(self.boxes, detections,
+                                  CONFIG["ai_assistant"]["merge_iou_threshold"],
+                                  CONFIG["ai_assistant"]["duplicate_iou_threshold"])
+        self.boxes.extend(merge['added'])
+        
+        duplicates = merge['duplicates']
+        for det_idx, box_idx in zip(duplicates.tolist(), merge['duplicate_of'].tolist()):
+            self.logger.info(f"AI box {detections[det_idx].to_dict()} looks like a duplicate "
+                             f"of box {box_idx} ({self.boxes[box_idx].to_dict()})")
+        status = (f"Added {len(merge['added'])} AI-suggested boxes, "
+                  f"{merge['matched']} already labeled")
+        if len(duplicates):
+            status += f", {len(duplicates)} likely duplicates skipped"
+        self.ui.set_status(status)
+
+    def _pin_current_image(self, path: str):
+        """Keep the image being edited resident regardless of cache pressure"""
+        if self._pinned_path and self._pinned_path != path:
+            self.image_cache.unpin(self._pinned_path)
+        self.image_cache.pin(path)
+        self._pinned_path = path
 
     def _handle_missing_image(self, path: str) -> Optional[str]:
-        """Handle missing image file by checking processed directory"""
-        if not os.path.exists(path):
-            self.logger.warning(f"Image not found at original path: {path}")
-            
-            processed_dir = self.get_processed_dir()
-            images_dir = os.path.join(processed_dir, 'images')
-            filename = os.path.basename(path)
-            processed_path = os.path.join(images_dir, filename)
-            
-            if os.path.exists(processed_path):
+        """Redirect an image this session moved to the processed directory (no disk access)"""
+        # Stale paths from a restored session were already fixed by _fix_stale_paths
+        if path in self._moved_out:
+            processed_path = self.processed_index.resolve(path)
+            if processed_path and processed_path != path:
                 self.logger.info(f"Found image in processed directory: {processed_path}")
+                self._rekey_images({path: processed_path})
                 path = processed_path
                 self.image_files[self.current_index] = processed_path
-            else:
-                self.logger.error(f"Image not found in processed directory either: {filename}")
-                messagebox.showerror("Image Error", f"Image not found: {filename}")
-                return None
-                
+                self.processed_images.add(processed_path)
         return path
 
+    def _rekey_images(self, moves: Dict[str, str]):
+        """Carry cached pixels, tiles and undo history over to moved images' new paths"""
+        for old, new in moves.items():
+            self.image_cache.rekey(old, new)
+            self.renderer.pyramid.rekey(old, new)
+            self.history_store.rekey(old, new)
+        self.renderer.rekey_tiles(moves)
+        # The current image is parked under its new path when navigation moves on
+        self.image_path = moves.get(self.image_path, self.image_path)
+        self._pinned_path = moves.get(self._pinned_path, self._pinned_path)
+
+    def _fix_stale_paths(self):
+        """Index the processed directory and redirect image_files entries moved into it"""
+        index = self.processed_index
+        index.build(self.get_processed_dir(create=False), self.image_dir)
+        fixed = index.fix_paths(self.image_files)
+        if len(index):
+            self.processed_images.update(p for p in self.image_files if index.resolve(p) == p)
+        if fixed:
+            self.logger.info(f"Redirected {fixed} images to the processed directory")
+
+    def _label_path(self, image_path: str) -> str:
+        """Label file of image_path; a processed image's label moved along with it"""
+        if image_path in self.processed_images:
+            processed_label = self.processed_index.label_for(image_path)
+            if processed_label is not None:
+                return processed_label
+        return FileUtils.get_label_path(image_path, self.label_dir, self.image_dir)
+
+    def _original_path(self, image_path: str) -> str:
+        """Where image_path sat in image_dir before it was moved to the processed directory"""
+        if image_path in self.processed_images:
+            return self.processed_index.origin(image_path)
+        return image_path
+
     def _setup_image_state(self, path: str):
         """Setup image-related state variables"""
+        self.image_path = path
         self.image_name = os.path.splitext(os.path.basename(path))[0]
         self.boxes.clear()
+        self.box_index.clear()
+        self._label_fingerprint = None
+        self._saved_rows = np.zeros((0, 5))
         self.selected_box_idx = -1
+        self.hover_box_idx = -1
+        self.renderer.set_hover(None)
         self.image_offset_x = 0
         self.image_offset_y = 0
-        self.history.clear()
-        self.zoom_cache.clear()
         self.is_drawing = False
 
-    def get_processed_dir(self):
+    def get_processed_dir(self, create: bool = True):
         """Get processed directory path"""
         processed_dir = CONFIG["paths"]["processed_dir"]
         if not os.path.isabs(processed_dir):
             processed_dir = os.path.join(self.image_dir, processed_dir)
-        FileUtils.ensure_directory(processed_dir)
+        if create:
+            FileUtils.ensure_directory(processed_dir)
         return processed_dir
 
     def move_to_processed(self, image_path: str):
-        """Move image to processed directory"""
+        """Queue moving image to processed directory"""
         if not CONFIG["behavior"]["auto_move_processed_images"]:
             return
+        if image_path in self.processed_images:
+            return  # Already in the processed directory
+        if self.processed_log is not None:
+            # Only recorded; materialize_processed lays the files out later
+            self.processed_log.mark(image_path)
+            return
             
-        try:
-            processed_dir = self.get_processed_dir()
-            new_image_path, _ = FileUtils.move_to_processed_dir(
-                image_path, processed_dir, create_subdirs=True
-            )
-            
-            if (CONFIG["behavior"]["update_image_paths_after_move"] and 
-                new_image_path and self.current_index < len(self.image_files)):
-                self.image_files[self.current_index] = new_image_path
-                self.processed_images.add(new_image_path)
-                self.logger.info(f"Updated image path to: {new_image_path}")
-                
-        except Exception as e:
-            self.log_error(f"Error moving processed image: {image_path}", exc_info=True)
+        # The worker creates the directories; nothing here touches the disk
+        processed_dir = self.get_processed_dir(create=False)
+        if (self.processed_index.processed_dir != processed_dir or
+                self.processed_index.image_dir != self.image_dir):
+            self.processed_index.build(processed_dir, self.image_dir)
+        self.io_worker.move_to_processed(image_path, processed_dir, self.image_dir)
+        self._moved_out.add(image_path)
+        # The worker moves a label only when it sits next to the image
+        label_moves = (os.path.normpath(self._label_path(image_path)) ==
+                       os.path.splitext(os.path.normpath(image_path))[0] + ".txt")
+        self.processed_index.add(image_path, with_label=label_moves)
+        if self.manifest is not None:
+            self.manifest.mark_processed(image_path)
+        
+        if (CONFIG["behavior"]["update_image_paths_after_move"] and 
+            self.current_index < len(self.image_files)):
+            new_image_path, _ = FileUtils.processed_paths(image_path, processed_dir, self.image_dir)
+            self._rekey_images({image_path: new_image_path})
+            self.image_files[self.current_index] = new_image_path
+            self.processed_images.add(new_image_path)
+            self.logger.info(f"Updated image path to: {new_image_path}")
+
+    def materialize_processed(self):
+        """Lay out the images marked processed under processed_dir in one background job"""
+        if self.processed_log is None or not len(self.processed_log):
+            self.ui.set_status("No processed images to materialize")
+            return
+        if self.archive is not None:
+            self.ui.set_status("Processed images inside an archive cannot be materialized")
+            return
+        paths = self.processed_log.processed_paths()
+        processed_dir = self.get_processed_dir(create=False)
+        mode = CONFIG["behavior"]["materialize_processed_mode"]
+        self.io_worker.materialize(paths, processed_dir, self.label_dir, mode, self.image_dir)
+        self.ui.set_status(f"Materializing {len(paths)} processed images ({mode})...")
+
+        if mode == "move":
+            # The images leave image_dir: track them as if moved one by one
+            self.processed_log.forget(paths)
+            if (self.processed_index.processed_dir != processed_dir or
+                    self.processed_index.image_dir != self.image_dir):
+                self.processed_index.build(processed_dir, self.image_dir)
+            for path in paths:
+                self._moved_out.add(path)
+                self.processed_index.add(path)
+                if self.manifest is not None:
+                    self.manifest.mark_processed(path)
+            if CONFIG["behavior"]["update_image_paths_after_move"]:
+                moved = set(paths)
+                moves = {}
+                for i, path in enumerate(self.image_files):
+                    if path in moved:
+                        self.image_files[i] = moves[path] = self.processed_index.resolve(path)
+                        self.processed_images.add(self.image_files[i])
+                self._rekey_images(moves)
+
+    def _on_io_error(self, job, error):
+        """Report a failed background save or move (runs on the Tk thread)"""
+        if job['op'] == 'materialize':
+            self.log_error(f"Error materializing processed images into {job['path']}")
+            if job['mode'] == "move":
+                # Images still in image_dir were not placed: mark them processed in the log again
+                for path in job['images']:
+                    if os.path.exists(path):
+                        self._undo_move(path, job['path'], job.get('image_dir'))
+                        if self.processed_log is not None:
+                            self.processed_log.mark(path)
+            messagebox.showerror("Processed Error", f"Failed to materialize processed images: {error}")
+            return
+        if job['op'] == 'write':
+            if self._label_fingerprint and self._label_fingerprint[0] == job['path']:
+                self._label_fingerprint = None  # Disk no longer matches; save again next time
+            self.log_error(f"Error saving labels to {job['path']}")
+            messagebox.showerror("Save Error", f"Failed to save labels: {error}")
+            return
+
+        self.log_error(f"Error moving processed image: {job['path']}")
+        self._undo_move(job['path'], job['processed_dir'], job.get('image_dir'))
+
+    def _undo_move(self, path: str, processed_dir: str, image_dir: Optional[str]):
+        """Forget a failed move of path into processed_dir: the image is still in image_dir"""
+        # Point the file list back at the image that stayed where it was
+        moved_path, _ = FileUtils.processed_paths(path, processed_dir, image_dir)
+        if moved_path in self.image_files:
+            self.image_files[self.image_files.index(moved_path)] = path
+            self.processed_images.discard(moved_path)
+            self._rekey_images({moved_path: path})
+        self._moved_out.discard(path)
+        self.processed_index.discard(path)
+        if self.manifest is not None:
+            self.manifest.mark_processed(path, False)
 
     # ======================
     # Label File Operations
@@ -320,64 +757,51 @@ class YOLOLabelStudio:
         if not self.label_dir or self.original_image is None:
             return
             
-        label_path = FileUtils.get_label_path(
-            self.image_files[self.current_index], self.label_dir
-        )
+        label_path = self._label_path(self.image_files[self.current_index])
         
         if not os.path.exists(label_path):
+            # "No file, no boxes": saving an image that is still unlabeled writes nothing
+            self._label_fingerprint = (label_path, self._fingerprint(self._encode_labels()))
             self.logger.info(f"No label file found: {label_path}")
             return
             
         try:
-            with open(label_path, 'r') as f:
-                for line_num, line in enumerate(f, 1):
-                    self._parse_label_line(line.strip(), label_path, line_num)
-                    
+            h_img, w_img = self.original_image.shape[:2]
+            self.boxes.extend(self.prefetcher.get_labels(
+                label_path, w_img, h_img, len(self.class_names)
+            ))
+            self._label_fingerprint = (label_path, self._fingerprint(self._encode_labels()))
+            self._saved_rows = self._box_rows()
             self.logger.info(f"Loaded {len(self.boxes)} boxes from {label_path}")
             
         except Exception as e:
             self.log_error(f"Error loading labels from {label_path}", exc_info=True)
 
-    def _parse_label_line(self, line: str, label_path: str, line_num: int):
-        """Parse a single line from label file"""
-        parts = line.strip().split()
-        if len(parts) != 5:
-            self.logger.warning(f"Invalid line format in {label_path} line {line_num}: {line}")
-            return
-            
-        try:
-            cls, cx, cy, w, h = map(float, parts)
-            cls = int(cls)
-            
-            if not (0 <= cls < len(self.class_names)):
-                self.logger.warning(f"Invalid class ID {cls} in {label_path} line {line_num}")
-                return
-                
-            # Convert YOLO to pixel coordinates
-            h_img, w_img = self.original_image.shape[:2]
-            box = BoxUtils.yolo_to_pixel([cls, cx, cy, w, h], w_img, h_img)
-            
-            # Ensure coordinates are within bounds
-            if self._validate_and_clamp_box(box, w_img, h_img):
-                self.boxes.append(box.to_dict())
-                self.logger.debug(f"Loaded box: class={cls}, coords=({box.x_min},{box.y_min},{box.x_max},{box.y_max})")
-            else:
-                self.logger.warning(f"Invalid box dimensions in {label_path} line {line_num}")
-                
-        except ValueError as e:
-            self.logger.warning(f"Invalid data in {label_path} line {line_num}: {line} - {e}")
-
-    def _validate_and_clamp_box(self, box, img_width: int, img_height: int) -> bool:
-        """Validate and clamp box coordinates to image bounds"""
-        box.x_min = max(0, min(box.x_min, img_width))
-        box.y_min = max(0, min(box.y_min, img_height))
-        box.x_max = max(0, min(box.x_max, img_width))
-        box.y_max = max(0, min(box.y_max, img_height))
+    def _encode_labels(self, log_invalid: bool = False) -> str:
+        """Current boxes as YOLO label text, exactly as save_labels writes it"""
+        h_img, w_img = self.original_image.shape[:2]
+        # Convert all boxes to YOLO format (x_center, y_center, width, height) at once
+        yolo = self.boxes.to_yolo(w_img, h_img)
+        valid = BoxArray.yolo_valid_mask(yolo)
+        if log_invalid:
+            for i in np.flatnonzero(~valid):
+                self.logger.warning(f"Invalid box coordinates: {self.boxes[i].to_dict()}")
         
-        return box.x_max > box.x_min and box.y_max > box.y_min
+        label_format = CONFIG["label_format"]
+        return encode_labels(self.boxes.class_ids[valid], yolo[valid],
+                             label_format["float_precision"], label_format["include_trailing_newline"])
+
+    def _box_rows(self) -> np.ndarray:
+        """(N, 5) class id and coordinate rows, the unit box edits are journaled in"""
+        return np.column_stack([self.boxes.class_ids, self.boxes.coords]).astype(np.float64)
+
+    @staticmethod
+    def _fingerprint(text: str) -> bytes:
+        """Digest of normalized label text; equal digests mean identical files"""
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
 
     def save_labels(self):
-        """Save labels to YOLO format file"""
+        """Save labels to YOLO format file (skipped if unchanged since load or last save)"""
         if not self.label_dir:
             messagebox.showerror("Save Error", "No label directory selected")
             return
@@ -386,42 +810,35 @@ class YOLOLabelStudio:
             messagebox.showerror("Save Error", "No image loaded")
             return
             
-        label_path = FileUtils.get_label_path(
-            self.image_files[self.current_index], self.label_dir
-        )
+        label_path = self._label_path(self.image_files[self.current_index])
         
         try:
-            with open(label_path, 'w') as f:
-
-                for box_dict in self.boxes:
-                    box = BoxUtils.from_dict(box_dict)
-                    h_img, w_img = self.original_image.shape[:2]
-                    # Convert to YOLO format: [class_id, x_center, y_center, width, height]
-                    yolo_coords = BoxUtils.pixel_to_yolo(box, w_img, h_img)
-                    if self._validate_yolo_coordinates(yolo_coords):
-                        class_id = int(yolo_coords[0])  # Ensure integer
-                        coords = yolo_coords[1:]        # The 4 float values
-                        coord_str = " ".join(f"{c:.4f}" for c in coords)
-                        line = f"{class_id} {coord_str}"
-                        f.write(line + "\n")
-                    else:
-                        self.logger.warning(f"Invalid box coordinates: {box_dict}")
-
+            text = self._encode_labels(log_invalid=True)
+            fingerprint = (label_path, self._fingerprint(text))
+            if fingerprint == self._label_fingerprint:
+                # Leave the file (and its mtime) alone for rsync/DVC
+                self.label_writes_skipped += 1
+                self.label_bytes_saved += len(text)
+                self.ui.set_status(f"Labels unchanged: {len(self.boxes)} boxes")
+                self.logger.debug(f"Skipped unchanged label write to {label_path}")
+                return
+            
+            # Written atomically in the background; failures come back via _on_io_error
+            self.io_worker.write_labels(self.image_files[self.current_index], label_path, text)
+            self._label_fingerprint = fingerprint
+            self.session_journal.record('save', path=self.image_path)
+            self._saved_rows = self._journaled_rows = self._box_rows()
+            if self.manifest is not None:
+                self.manifest.mark_labeled(self._original_path(self.image_files[self.current_index]))
+            self.label_writes += 1
                         
-            self.save_state()
             self.ui.set_status(f"Labels saved: {len(self.boxes)} boxes")
-            self.logger.info(f"Saved {len(self.boxes)} boxes to {label_path}")
+            self.logger.info(f"Queued {len(self.boxes)} boxes for {label_path}")
             
         except Exception as e:
             self.log_error(f"Error saving labels to {label_path}", exc_info=True)
             messagebox.showerror("Save Error", f"Failed to save labels: {e}")
 
-    def _validate_yolo_coordinates(self, coords: List[float]) -> bool:
-        """Validate YOLO format coordinates"""
-        _, x_center, y_center, width, height = coords
-        return (0 <= x_center <= 1 and 0 <= y_center <= 1 and 
-                0 <= width <= 1 and 0 <= height <= 1)
-
     # ======================
     # Navigation
     # ======================
@@ -450,7 +867,23 @@ class YOLOLabelStudio:
             h, w = self.original_image.shape[:2]
             path = self.image_files[self.current_index] if self.image_files else "-"
             box_count = len(self.boxes)
-            status_text = f"{self.image_name} — {w}×{h} — Boxes: {box_count} — {path}"
+            cache = self.image_cache.stats()
+            status_text = (f"{self.image_name} — {w}×{h} — Boxes: {box_count} — "
+                           f"Cache: {cache['hit_rate']:.0%} hit, "
+                           f"{cache['bytes_used'] / 2**20:.0f}/{cache['max_bytes'] / 2**20:.0f} MB — ")
+            history = self.history_store.stats(self.history)
+            status_text += f"Undo: {history['steps']} steps, {history['bytes'] / 1024:.0f} KB — "
+            if self.manifest is not None:
+                counts = self.manifest.counts()
+                processed = (len(self.processed_log) if self.processed_log is not None
+                             else counts['processed'])
+                status_text += (f"Labeled: {counts['labeled']}/{counts['images']}, "
+                                f"{processed} processed — ")
+            if CONFIG["drawing"]["show_fps_overlay"]:
+                frames = self.renderer.frame_stats()
+                status_text += (f"Frame: {frames['frame_ms']:.1f} ms avg, "
+                                f"{frames['max_frame_ms']:.1f} ms max — ")
+            status_text += path
             self.ui.set_status(status_text)
             
             if self.image_files:
@@ -498,7 +931,6 @@ class YOLOLabelStudio:
             self.ui.set_status("No box selected to duplicate")
             return
             
-        self.save_state()
         original_box = self.boxes[self.selected_box_idx].copy()
         
         # Offset the duplicated box
@@ -509,7 +941,9 @@ class YOLOLabelStudio:
         original_box['y_max'] += offset
         
         self.boxes.append(original_box)
+        self.box_index.append(self.boxes[-1])
         self.selected_box_idx = len(self.boxes) - 1
+        self.history.record_add(self.boxes, self.selected_box_idx)
         self.renderer.mark_dirty()
         self.ui.set_status("Box duplicated")
 
@@ -519,9 +953,12 @@ class YOLOLabelStudio:
             self.ui.set_status("No box selected to delete")
             return
             
-        self.save_state()
+        self.history.record_delete(self.boxes, self.selected_box_idx)
+        self.box_index.remove(self.boxes[self.selected_box_idx])
         del self.boxes[self.selected_box_idx]
         self.selected_box_idx = -1
+        self.hover_box_idx = -1
+        self.renderer.set_hover(None)
         self.renderer.mark_dirty()
         self.ui.set_status("Box deleted")
 
@@ -543,21 +980,31 @@ class YOLOLabelStudio:
     # History Management
     # ======================
 
-    def save_state(self):
-        """Save current state for undo functionality"""
-        self.history.append([box.copy() for box in self.boxes])
-
     def undo(self, event=None):
         """Undo last operation"""
-        if self.history:
-            self.boxes = self.history.pop()
-            if self.selected_box_idx >= len(self.boxes):
-                self.selected_box_idx = -1
-            self.renderer.mark_dirty()
-            self.ui.set_status("Undo successful")
+        if self.history.undo(self.boxes):
+            self._after_history_change()
+            self.ui.set_status(f"Undo successful ({len(self.history.undo_stack)} more)")
         else:
             self.ui.set_status("Nothing to undo")
 
+    def redo(self, event=None):
+        """Redo last undone operation"""
+        if self.history.redo(self.boxes):
+            self._after_history_change()
+            self.ui.set_status(f"Redo successful ({len(self.history.redo_stack)} more)")
+        else:
+            self.ui.set_status("Nothing to redo")
+
+    def _after_history_change(self):
+        """Re-sync index, hover and selection after boxes changed in place"""
+        self.box_index.rebuild(self.boxes)
+        self.hover_box_idx = -1
+        self.renderer.set_hover(None)
+        if self.selected_box_idx >= len(self.boxes):
+            self.selected_box_idx = -1
+        self.renderer.mark_dirty()
+
     # ======================
     # Zoom and Pan Operations
     # ======================
@@ -616,18 +1063,29 @@ class YOLOLabelStudio:
         self.zoom_scale = new_scale
         self.image_offset_x = mouse_x - img_x * new_scale
         self.image_offset_y = mouse_y - img_y * new_scale
+        self.renderer.note_interaction()
         self.renderer.mark_dirty()
 
+    def on_canvas_resize(self, event):
+        """Re-render so newly exposed canvas area gets its tiles"""
+        if self.original_image is not None:
+            self.renderer.mark_dirty()
+
     # ======================
     # Pan Support
     # ======================
 
     def on_middle_click_start(self, event):
         """Start pan operation"""
+        self.input_coalescer.flush()
         self.pan_start = (event.x, event.y)
-        self.ui.canvas.config(cursor="fleur")
+        self.input_coalescer.set_cursor("fleur")
 
     def on_pan_drag(self, event):
+        """Queue pan dragging; only the latest position per frame is applied"""
+        self.input_coalescer.post('pan', self._apply_pan_drag, event)
+
+    def _apply_pan_drag(self, event):
         """Handle pan dragging"""
         if self.pan_start is None:
             return
@@ -637,12 +1095,14 @@ class YOLOLabelStudio:
         self.image_offset_x += dx
         self.image_offset_y += dy
         self.pan_start = (event.x, event.y)
-        self.renderer.mark_dirty()
+        self.renderer.note_interaction()
+        self.renderer.pan(dx, dy)
 
     def on_middle_click_end(self, event):
         """End pan operation"""
+        self.input_coalescer.flush()
         self.pan_start = None
-        self.ui.canvas.config(cursor="")
+        self.input_coalescer.set_cursor("")
 
     # ======================
     # Drag Detection for Corners and Edges
@@ -720,11 +1180,18 @@ class YOLOLabelStudio:
     # ======================
 
     def on_mouse_move(self, event):
+        """Queue mouse movement; only the latest position per frame is applied"""
+        self.input_coalescer.post('motion', self._apply_mouse_move, event)
+
+    def _apply_mouse_move(self, event):
         """Handle mouse movement for real-time cursor changes"""
         # Don't change cursor while drawing or dragging
         if self.is_drawing or self.drag_type:
             return
             
+        if CONFIG["ui"]["highlight_hover"]:
+            self._update_hover(event.x, event.y)
+            
         # Update cursor based on position near selected box corners/edges
         if self.selected_box_idx != -1:
             box = self.boxes[self.selected_box_idx]
@@ -732,11 +1199,20 @@ class YOLOLabelStudio:
             
             if drag_type:
                 cursor = self.get_cursor_for_drag_target(drag_type, drag_target)
-                self.ui.canvas.config(cursor=cursor)
+                self.input_coalescer.set_cursor(cursor)
                 return
         
         # Default cursor
-        self.ui.canvas.config(cursor="")
+        self.input_coalescer.set_cursor("")
+
+    def _update_hover(self, event_x, event_y):
+        """Highlight the topmost box under the cursor"""
+        x_img = (event_x - self.image_offset_x) / self.zoom_scale
+        y_img = (event_y - self.image_offset_y) / self.zoom_scale
+        hover_idx = self.box_index.topmost_at(x_img, y_img)
+        if hover_idx != self.hover_box_idx:
+            self.hover_box_idx = hover_idx
+            self.renderer.set_hover(self.boxes[hover_idx] if hover_idx != -1 else None)
 
 # Add this method to your YOLOLabelStudio class in core/application.py
     def debug_class_selection(self):
@@ -755,6 +1231,7 @@ class YOLOLabelStudio:
 
     def on_left_click_start(self, event):
         """Handle left mouse button press with better debugging"""
+        self.input_coalescer.flush()
         current_time = time.time()
 
         # Debug info
@@ -810,24 +1287,31 @@ class YOLOLabelStudio:
         print(f"Started drawing: {class_name} (class_id: {self.drawing_class_id})")
 
     def on_mouse_drag(self, event):
+        """Queue mouse dragging; only the latest position per frame is applied"""
+        self.input_coalescer.post('drag', self._apply_mouse_drag, event)
+
+    def _apply_mouse_drag(self, event):
         """Handle mouse dragging for real-time operations"""
         current_x_img = (event.x - self.image_offset_x) / self.zoom_scale
         current_y_img = (event.y - self.image_offset_y) / self.zoom_scale
 
         # Handle box resizing/moving (HIGHEST PRIORITY)
         if self.drag_type in ('resize', 'move') and self.selected_box_idx != -1:
-            if not hasattr(self, 'saved_state_for_drag'):
-                self.save_state()
-                self.saved_state_for_drag = True
+            if self._drag_before is None:
+                self._drag_before = (self.selected_box_idx, self.boxes.row(self.selected_box_idx))
 
             dx = current_x_img - self.start_draw_point[0]
             dy = current_y_img - self.start_draw_point[1]
 
             box = self.boxes[self.selected_box_idx]
             self._handle_box_drag(box, dx, dy)
+            self.box_index.update(box)
 
             self.start_draw_point = (current_x_img, current_y_img)
-            self.renderer.mark_dirty()
+            self.renderer.refresh_box(box)
+            self.input_coalescer.set_status(
+                f"Box {box['x_max'] - box['x_min']:.0f}×{box['y_max'] - box['y_min']:.0f} "
+                f"at ({box['x_min']:.0f}, {box['y_min']:.0f})")
 
         # Handle new box drawing with real-time preview
         elif self.start_draw_point and self.is_drawing and self.drawing_class_id is not None:
@@ -840,17 +1324,24 @@ class YOLOLabelStudio:
                 max(x1, x2), max(y1, y2)
             )
             self.renderer.set_temp_box(temp_box)  # This should work now
+            self.input_coalescer.set_status(
+                f"Drawing new {self.class_names[self.drawing_class_id]} box "
+                f"{temp_box[2] - temp_box[0]:.0f}×{temp_box[3] - temp_box[1]:.0f}")
 
     # And in on_left_click_end method:
     def on_left_click_end(self, event):
         """Handle left mouse button release"""
+        # Apply the final drag position before finishing the operation
+        self.input_coalescer.flush()
         # Handle drag operations (resize/move)
         if self.drag_type:
             self.drag_type = None
             self.drag_corner = None
             self.drag_edge = None
-            if hasattr(self, 'saved_state_for_drag'):
-                del self.saved_state_for_drag
+            if self._drag_before is not None:
+                index, before = self._drag_before
+                self.history.record_modify(self.boxes, index, before)
+                self._drag_before = None
             self.renderer.mark_dirty()
             self.ui.set_status("Box modified")
             return
@@ -927,8 +1418,6 @@ class YOLOLabelStudio:
             self.drawing_class_id is not None and
             self.original_image is not None):
             
-            self.save_state()
-            
             # Ensure coordinates are within image bounds
             h, w = self.original_image.shape[:2]
             x1 = max(0, min(x1, w))
@@ -944,7 +1433,9 @@ class YOLOLabelStudio:
                 'y_max': max(y1, y2)
             }
             self.boxes.append(new_box)
+            self.box_index.append(self.boxes[-1])
             self.selected_box_idx = len(self.boxes) - 1
+            self.history.record_add(self.boxes, self.selected_box_idx)
             self.ui.set_status("Box added")
 
     def select_box(self, event):
@@ -955,29 +1446,27 @@ class YOLOLabelStudio:
         x_img = (event.x - self.image_offset_x) / self.zoom_scale
         y_img = (event.y - self.image_offset_y) / self.zoom_scale
         
-        # Check boxes in reverse order (top-most boxes first)
-        for i in range(len(self.boxes) - 1, -1, -1):
+        # Topmost box under the cursor from the spatial index
+        i = self.box_index.topmost_at(x_img, y_img)
+        if i != -1:
             box = self.boxes[i]
-            if (box['x_min'] <= x_img <= box['x_max'] and 
-                box['y_min'] <= y_img <= box['y_max']):
-                
-                if i == self.selected_box_idx and CONFIG["behavior"]["deselect_box_on_second_click"]:
-                    self.selected_box_idx = -1
-                    self.ui.set_status("Box deselected")
-                else:
-                    self.selected_box_idx = i
-                    class_name = self.class_names[box['class_id']]
-                    self.ui.set_status(f"Selected box {i} - Class {class_name}")
-                
-                self.renderer.mark_dirty()
+            if i == self.selected_box_idx and CONFIG["behavior"]["deselect_box_on_second_click"]:
+                self.selected_box_idx = -1
+                self.ui.set_status("Box deselected")
+            else:
+                self.selected_box_idx = i
+                class_name = self.class_names[box['class_id']]
+                self.ui.set_status(f"Selected box {i} - Class {class_name}")
+            
+            self.renderer.mark_dirty()
+            
+            # Update box list selection
+            if self.selected_box_idx != -1:
+                self.ui.box_list.select_box(self.selected_box_idx)
+            else:
+                self.ui.box_list.clear_selection()
                 
-                # Update box list selection
-                if self.selected_box_idx != -1:
-                    self.ui.box_list.select_box(self.selected_box_idx)
-                else:
-                    self.ui.box_list.clear_selection()
-                    
-                return
+            return
                 
         # If no box was clicked, deselect
         self.selected_box_idx = -1
@@ -990,63 +1479,90 @@ class YOLOLabelStudio:
     # ======================
 
     def save_session_history(self):
-        """Save session history to file"""
+        """Journal box and view changes since the last call, then flush the journal"""
         try:
-            session_data = {
-                'image_dir': self.image_dir,
-                'label_dir': self.label_dir,
-                'current_index': self.current_index,
-                'image_files': self.image_files,
-                'boxes': self.boxes,
-                'selected_box_idx': self.selected_box_idx,
-                'zoom_scale': self.zoom_scale,
-                'class_names': self.class_names,
-                'drawing_class_id': self.drawing_class_id
-            }
-            
-            with open(CONFIG["app"]["session_history_file"], 'wb') as f:
-                pickle.dump(session_data, f)
+            if self.original_image is not None and self.image_path:
+                rows = self._box_rows()
+                edit = splice(self._journaled_rows, rows)
+                if edit is not None:
+                    self._journaled_rows = rows
+                    if np.array_equal(rows, self._saved_rows):
+                        # Edited back to what is on disk
+                        self.session_journal.record('save', path=self.image_path)
+                    else:
+                        # Only the changed span, relative to the label file it applies to
+                        base = self._label_fingerprint[1].hex() if self._label_fingerprint else None
+                        self.session_journal.record('boxes', path=self.image_path, base=base,
+                                                    edits=[edit])
+            view = {'zoom_scale': self.zoom_scale, 'selected_box_idx': self.selected_box_idx,
+                    'drawing_class_id': self.drawing_class_id}
+            if view != self._journaled_view:
+                self._journaled_view = view
+                self.session_journal.record('view', **view)
+            self.session_journal.flush()
                 
         except Exception as e:
             self.log_error("Error saving session history", exc_info=True)
 
+    def _schedule_session_flush(self):
+        """Flush the session journal every autosave.on_interval_seconds (0 = only on exit)"""
+        interval = CONFIG["autosave"]["on_interval_seconds"]
+        if interval > 0:
+            self.root.after(int(interval * 1000), self._session_flush_tick)
+
+    def _session_flush_tick(self):
+        self.save_session_history()
+        self._schedule_session_flush()
+
     def load_session_history(self):
-        """Load session history from file"""
-        history_file = CONFIG["app"]["session_history_file"]
-        if not os.path.exists(history_file):
+        """Restore the last session by replaying the session journal"""
+        state = self.session_journal.replay()
+        opened = state.get('open')
+        if not opened:
             return False
             
         try:
-            with open(history_file, 'rb') as f:
-                data = pickle.load(f)
-                
-            self.image_dir = data.get('image_dir', '')
-            self.label_dir = data.get('label_dir', '')
-            self.image_files = data.get('image_files', [])
-            self.current_index = data.get('current_index', -1)
-            
-            if 0 <= self.current_index < len(self.image_files):
-                path = self.image_files[self.current_index]
-                if os.path.exists(path):
-                    img = cv2.imread(path)
-                    if img is not None:
-                        self.original_image = img
-                        self.image_name = os.path.splitext(os.path.basename(path))[0]
-                        self.boxes = data.get('boxes', [])
-                        self.selected_box_idx = data.get('selected_box_idx', -1)
-                        if self.selected_box_idx >= len(self.boxes):
-                            self.selected_box_idx = -1
-                        self.zoom_scale = data.get('zoom_scale', 1.0)
-                        self.drawing_class_id = data.get('drawing_class_id')
-                        if self.drawing_class_id is not None:
-                            self.ui.class_list.listbox.selection_clear(0, tk.END)
-                            self.ui.class_list.listbox.selection_set(self.drawing_class_id)
-                        self.renderer.mark_dirty()
-                        self.update_status_label()
-                        self.ui.set_status(f"Restored session - {self.image_name}")
-                        return True
-                else:
-                    self.logger.warning(f"Cached image not found: {path}")
+            self.image_dir = opened.get('image_dir', '')
+            self.label_dir = opened.get('label_dir', '')
+            if not self.image_dir or not os.path.exists(self.image_dir):
+                return False
+
+            # The file list is rebuilt (from the manifest or archive index when available)
+            self.image_files = [p for batch in self._image_source(self.image_dir)() for p in batch]
+            self._fix_stale_paths()
+            index = state.get('index', {})
+            if index.get('path') in self.image_files:
+                self.current_index = self.image_files.index(index['path'])
+            else:
+                self.current_index = min(index.get('i', 0), len(self.image_files) - 1)
+            self._watch_image_dir()
+            if self.current_index < 0:
+                return False
+
+            self.load_image()
+            if self.original_image is None:
+                return False
+            unsaved = state.get('boxes')
+            base = self._label_fingerprint[1].hex() if self._label_fingerprint else None
+            if unsaved and unsaved.get('path') == self.image_path and unsaved.get('base') == base:
+                # The edits apply only to the label file they were made against
+                rows = apply_splices(self._saved_rows, unsaved.get('edits', []))
+                self.boxes = BoxArray(rows[:, 0], rows[:, 1:])
+                self.box_index.rebuild(self.boxes)
+                self._journaled_rows = rows
+            view = state.get('view', {})
+            self.zoom_scale = view.get('zoom_scale', self.zoom_scale)
+            self.selected_box_idx = view.get('selected_box_idx', -1)
+            if self.selected_box_idx >= len(self.boxes):
+                self.selected_box_idx = -1
+            self.drawing_class_id = view.get('drawing_class_id')
+            if self.drawing_class_id is not None:
+                self.ui.class_list.listbox.selection_clear(0, tk.END)
+                self.ui.class_list.listbox.selection_set(self.drawing_class_id)
+            self.renderer.mark_dirty()
+            self.update_status_label()
+            self.ui.set_status(f"Restored session - {self.image_name}")
+            return True
                     
         except Exception as e:
             self.log_error("Error loading session", exc_info=True)
@@ -1055,13 +1571,29 @@ class YOLOLabelStudio:
     def on_close(self):
         """Handle application close"""
         try:
-            # Save configuration
+            # Save configuration, with the user's label directory rather than an archive sidecar
             with open("yolo_gui_config.json", 'w') as f:
-                json.dump({"image_dir": self.image_dir, "label_dir": self.label_dir}, f)
+                json.dump({"image_dir": self.image_dir, "label_dir": self._user_facing_label_dir()}, f)
                 
             self.save_session_history()
+            self.session_journal.close()
+            
+            if self.manifest is not None:
+                self.manifest.save()
             
-            # Clear caches
+            # Finish queued saves and moves, then stop background work and clear caches
+            self.io_worker.shutdown()
+            if self.processed_log is not None:
+                self.processed_log.close()
+            if self.archive is not None:
+                self.archive.close()
+            self.dir_scanner.cancel()
+            self.dir_watcher.stop()
+            self.logger.info(f"Label writes: {self.label_writes} written, "
+                             f"{self.label_writes_skipped} unchanged skipped "
+                             f"({self.label_bytes_saved / 1024:.1f} KB saved)")
+            self.input_coalescer.cancel()
+            self.prefetcher.shutdown()
             self.image_cache.clear()
             self.zoom_cache.clear()
             
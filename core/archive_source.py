@@ -0,0 +1,167 @@
+# core/archive_source.py
+"""
+Random-access image source for zip and tar dataset shards
+"""
+
+import os
+import mmap
+import struct
+import logging
+import tarfile
+import zipfile
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.file_utils import FileUtils, IMAGE_EXTENSIONS
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar')
+ZIP_LOCAL_HEADER = struct.Struct('<4s5H3I2H')  # signature ... name length, extra length
+ZIP_LOCAL_SIGNATURE = b'PK\x03\x04'
+PAGE_MASK = ~(mmap.PAGESIZE - 1)
+
+
+class ArchiveSource:
+    """Reads images straight out of a zip or uncompressed tar archive.
+
+    The member index (data offset and size of every image) is built once
+    when the archive is opened. Images are addressed by virtual paths of the
+    form <archive path>/<member name>, so basenames, label names and sort
+    keys work as they do for a directory. Stored zip members and all tar
+    members are contiguous in the file and are decoded from an mmap slice
+    without copying; compressed zip members go through zipfile.
+
+    read() and will_need() are safe to call from prefetch workers.
+    """
+
+    def __init__(self, archive_path: str):
+        """
+        Args:
+            archive_path: .zip or uncompressed .tar file
+
+        Raises:
+            ValueError: If the archive type is not supported
+            OSError: If the archive cannot be read
+        """
+        self.path = os.path.abspath(archive_path)
+        self.logger = logging.getLogger("ArchiveSource")
+        self._prefix = self.path + os.sep
+        # virtual path -> (member name, data offset, size, stored uncompressed)
+        self._members: Dict[str, Tuple[str, int, int, bool]] = {}
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._lock = threading.Lock()  # zipfile decompression is not thread safe
+
+        self._file = open(self.path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.path.lower().endswith('.zip'):
+                self._index_zip()
+            elif self.path.lower().endswith('.tar'):
+                self._index_tar()
+            else:
+                raise ValueError(f"Unsupported archive type: {self.path}")
+        except Exception:
+            self.close()
+            raise
+
+        stored = sum(1 for m in self._members.values() if m[3])
+        self.logger.info(f"Indexed {len(self._members)} images in {self.path} "
+                         f"({stored} readable without decompression)")
+
+    @staticmethod
+    def is_archive(path: str) -> bool:
+        """True if path names a supported archive file"""
+        return path.lower().endswith(ARCHIVE_EXTENSIONS) and os.path.isfile(path)
+
+    @staticmethod
+    def _is_image(name: str) -> bool:
+        return not name.endswith('/') and name[name.rfind('.'):].lower() in IMAGE_EXTENSIONS
+
+    def _index_zip(self):
+        self._zip = zipfile.ZipFile(self._file)
+        for info in self._zip.infolist():
+            if not self._is_image(info.filename):
+                continue
+            stored = info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1
+            offset = -1
+            if stored:
+                # The local header's name/extra lengths may differ from the central directory's
+                header = ZIP_LOCAL_HEADER.unpack_from(self._mmap, info.header_offset)
+                if header[0] != ZIP_LOCAL_SIGNATURE:
+                    raise ValueError(f"Corrupt zip member {info.filename} in {self.path}")
+                offset = info.header_offset + ZIP_LOCAL_HEADER.size + header[9] + header[10]
+            self._members[self._prefix + info.filename] = (info.filename, offset,
+                                                           info.compress_size, stored)
+
+    def _index_tar(self):
+        try:
+            with tarfile.open(fileobj=self._file, mode='r:') as tar:
+                for member in tar:
+                    if member.isfile() and not member.issparse() and self._is_image(member.name):
+                        self._members[self._prefix + member.name] = (member.name, member.offset_data,
+                                                                     member.size, True)
+        except tarfile.ReadError as e:
+            raise ValueError(f"Only uncompressed tar archives are supported: {self.path}") from e
+
+    # ======================
+    # Access
+    # ======================
+
+    def image_files(self) -> List[str]:
+        """Virtual paths of all images, in the order a directory scan would list them"""
+        return sorted(self._members, key=lambda p: FileUtils.image_sort_key(p, self.path))
+
+    def owns(self, path: str) -> bool:
+        return path.startswith(self._prefix)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._members
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def buffer(self, path: str) -> Optional[np.ndarray]:
+        """Encoded bytes of a member; a view into the mapping for stored members"""
+        member = self._members.get(path)
+        if member is None:
+            return None
+        name, offset, size, stored = member
+        if stored:
+            return np.frombuffer(self._mmap, np.uint8, size, offset)
+        with self._lock:
+            return np.frombuffer(self._zip.read(name), np.uint8)
+
+    def read(self, path: str, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+        """Decode a member image, or None if it is missing or corrupt"""
+        data = self.buffer(path)
+        if data is None or not data.size:
+            return None
+        return cv2.imdecode(data, flags)
+
+    def will_need(self, paths: Iterable[str]):
+        """Ask the kernel to read ahead the bytes of members about to be decoded"""
+        if not hasattr(mmap, 'MADV_WILLNEED'):
+            return
+        for path in paths:
+            member = self._members.get(path)
+            if member is None or not member[3] or not member[2]:
+                continue
+            start = member[1] & PAGE_MASK
+            try:
+                self._mmap.madvise(mmap.MADV_WILLNEED, start, member[1] + member[2] - start)
+            except (OSError, ValueError):
+                return
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        mapping = getattr(self, '_mmap', None)
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                pass  # A decode still holds a view; the mapping goes with it
+        self._file.close()
@@ -0,0 +1,143 @@
+# core/box_matching.py
+"""
+Vectorized IoU matching of AI detections against existing labels
+"""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from models.box_array import BoxArray
+
+def _cell_entries(coords: np.ndarray, cell: float) -> Tuple[np.ndarray, np.ndarray]:
+    """(cell key, box index) for every grid cell each box touches"""
+    cells = np.floor(coords / cell).astype(np.int64)
+    nx = cells[:, 2] - cells[:, 0] + 1
+    ny = cells[:, 3] - cells[:, 1] + 1
+    counts = nx * ny
+    box = np.repeat(np.arange(len(coords)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cx = cells[box, 0] + offset % nx[box]
+    cy = cells[box, 1] + offset // nx[box]
+    return (cx << 32) + cy, box
+
+
+def _candidate_pairs(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs (i into a, j into b) of boxes that may overlap.
+
+    Boxes are bucketed on a grid sized to the typical box, so each touches
+    only a few cells, and the buckets are joined with a sort plus
+    searchsorted (no Python loop). A pair that shares several cells is kept
+    only in the cell holding the top-left corner of its intersection.
+    """
+    sizes = np.concatenate([a[:, 2:] - a[:, :2], b[:, 2:] - b[:, :2]]).max(axis=1)
+    cell = max(1.0, float(np.median(sizes)))
+    a_keys, a_boxes = _cell_entries(a, cell)
+    b_keys, b_boxes = _cell_entries(b, cell)
+
+    order = np.argsort(a_keys, kind='stable')
+    a_keys, a_boxes = a_keys[order], a_boxes[order]
+    lo = np.searchsorted(a_keys, b_keys, 'left')
+    counts = np.searchsorted(a_keys, b_keys, 'right') - lo
+    j = np.repeat(b_boxes, counts)
+    key = np.repeat(b_keys, counts)
+    pos = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(lo, counts)
+    i = a_boxes[pos]
+
+    corner_x = np.floor(np.maximum(a[:, 0][i], b[:, 0][j]) / cell).astype(np.int64)
+    corner_y = np.floor(np.maximum(a[:, 1][i], b[:, 1][j]) / cell).astype(np.int64)
+    unique = (corner_x << 32) + corner_y == key
+    return i[unique], j[unique]
+
+
+def match_boxes(existing: BoxArray, detections: BoxArray, iou_threshold: float,
+                class_aware: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Greedy one-to-one matching by descending IoU
+
+    Args:
+        existing: Boxes already on the image
+        detections: Candidate boxes
+        iou_threshold: Minimum IoU for a pair to match
+        class_aware: Only pair boxes of the same class
+
+    Returns:
+        (matched existing indices, matched detection indices, and for every
+        detection its best IoU against any existing box regardless of class
+        together with that box's index, -1 if it overlaps none)
+    """
+    n_existing, n_detections = len(existing), len(detections)
+    best_iou = np.zeros(n_detections)
+    empty = np.zeros(0, np.int64)
+    if not n_existing or not n_detections:
+        return empty, empty, best_iou, np.full(n_detections, -1, np.int64)
+
+    # IoU of spatially close pairs only, computed element-wise
+    rows, cols = _candidate_pairs(existing.coords, detections.coords)
+    a, b = existing.coords[rows], detections.coords[cols]
+    inter = (np.clip(np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]), 0, None) *
+             np.clip(np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]), 0, None))
+    union = ((a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1]) +
+             (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1]) - inter)
+    iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    overlapping = iou > 0
+    rows, cols, iou = rows[overlapping], cols[overlapping], iou[overlapping]
+
+    best_existing = np.full(n_detections, -1, np.int64)
+    if len(iou):
+        # Last entry per detection after sorting by (detection, iou) is its best match
+        by_best = np.lexsort((iou, cols))
+        last = np.r_[cols[by_best][1:] != cols[by_best][:-1], True]
+        best = by_best[last]
+        best_iou[cols[best]] = iou[best]
+        best_existing[cols[best]] = rows[best]
+
+    keep = iou >= iou_threshold
+    if class_aware:
+        keep &= existing.class_ids[rows] == detections.class_ids[cols]
+    rows, cols, iou = rows[keep], cols[keep], iou[keep]
+    order = np.argsort(-iou, kind='stable')
+
+    # Greedy assignment over candidate pairs only (usually ~one per detection)
+    used_existing, used_detection = set(), set()
+    matched_existing, matched_detection = [], []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if r in used_existing or c in used_detection:
+            continue
+        used_existing.add(r)
+        used_detection.add(c)
+        matched_existing.append(r)
+        matched_detection.append(c)
+
+    return (np.array(matched_existing, np.int64), np.array(matched_detection, np.int64),
+            best_iou, best_existing)
+
+
+def merge_suggestions(existing: BoxArray, detections: BoxArray, match_iou: float = 0.5,
+                      duplicate_iou: float = 0.7) -> Dict[str, Any]:
+    """
+    Decide which AI detections to add to an already labeled image
+
+    A detection matching an existing box of the same class is already
+    labeled. An unmatched detection that still overlaps some existing box by
+    duplicate_iou or more (typically a different class on the same object)
+    is flagged as a likely duplicate and not added. Everything else is new.
+
+    Returns:
+        Dict with 'added' (BoxArray of new boxes), 'matched' (count),
+        'duplicates' (detection indices) and 'duplicate_of' (existing
+        indices they overlap most)
+    """
+    _, matched, best_iou, best_existing = match_boxes(existing, detections, match_iou)
+    unmatched = np.ones(len(detections), bool)
+    unmatched[matched] = False
+
+    duplicate = unmatched & (best_iou >= duplicate_iou)
+    duplicates = np.flatnonzero(duplicate)
+
+    return {
+        'added': detections.filter(unmatched & ~duplicate),
+        'matched': len(matched),
+        'duplicates': duplicates,
+        'duplicate_of': best_existing[duplicates]
+    }
@@ -0,0 +1,95 @@
+# core/dir_scanner.py
+"""
+Background image discovery that extends the file list while it scans
+"""
+
+import queue
+import logging
+import threading
+from typing import Callable, Iterable, List, Optional
+
+from utils.file_utils import FileUtils
+
+
+class DirectoryScanner:
+    """Streams FileUtils.iter_image_files batches from a worker thread to Tk.
+
+    The thread only walks the directory; batches are handed over through a
+    queue that the Tk thread drains every POLL_MS, so on_batch and on_done
+    always run on the UI thread. Starting a new scan abandons the old one.
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, root, on_batch: Callable[[List[str]], None],
+                 on_done: Optional[Callable[[int], None]] = None):
+        """
+        Args:
+            root: Tk root used to poll for batches
+            on_batch: Called with each new list of image paths
+            on_done: Called with the total number of images once the scan ends
+        """
+        self.root = root
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.logger = logging.getLogger("DirectoryScanner")
+
+        self._batches: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._generation = 0
+        self._poll_job = None
+        self._found = 0
+        self.scanning = False
+
+    def start(self, directory: str, recursive: bool = False, exclude: Iterable[str] = ()):
+        """Begin scanning directory, cancelling any scan in progress"""
+        exclude = list(exclude)
+        self.stream(lambda: FileUtils.iter_image_files(directory, recursive, exclude))
+
+    def stream(self, source: Callable[[], Iterable[List[str]]]):
+        """Deliver the batches of source() (called on the worker thread) instead"""
+        self.cancel()
+        self._generation += 1
+        self._found = 0
+        self.scanning = True
+        thread = threading.Thread(target=self._scan, name="dir-scan", daemon=True,
+                                  args=(self._generation, source))
+        thread.start()
+        self._poll_job = self.root.after(self.POLL_MS, self._poll)
+
+    def _scan(self, generation: int, source: Callable[[], Iterable[List[str]]]):
+        try:
+            for batch in source():
+                if generation != self._generation:
+                    return
+                self._batches.put((generation, batch))
+        except Exception:
+            self.logger.error("Image scan failed", exc_info=True)
+        self._batches.put((generation, None))
+
+    def _poll(self):
+        """Deliver queued batches on the Tk thread"""
+        self._poll_job = None
+        while True:
+            try:
+                generation, batch = self._batches.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._generation:
+                continue  # Leftovers from a cancelled scan
+            if batch is None:
+                self.scanning = False
+                self.logger.info(f"Scan finished: {self._found} images")
+                if self.on_done is not None:
+                    self.on_done(self._found)
+                return
+            self._found += len(batch)
+            self.on_batch(batch)
+        self._poll_job = self.root.after(self.POLL_MS, self._poll)
+
+    def cancel(self):
+        """Stop delivering results of the current scan"""
+        self._generation += 1
+        self.scanning = False
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
@@ -0,0 +1,318 @@
+# core/dir_watcher.py
+"""
+Watches image directories for files added or removed during a session
+"""
+
+import os
+import sys
+import queue
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from utils.file_utils import IMAGE_EXTENSIONS
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def _is_image(name: str) -> bool:
+    return name[name.rfind('.'):].lower() in IMAGE_EXTENSIONS
+
+
+class _Inotify:
+    """Minimal inotify binding through ctypes (Linux only)"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def read(self, timeout: float):
+        """Yield (wd, mask, name) for events arriving within timeout seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            yield wd, mask, name
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DirectoryWatcher:
+    """Reports image files appearing in or vanishing from watched directories.
+
+    Uses inotify where available; otherwise a polling thread stats each
+    watched directory and lists only those whose mtime changed, diffing the
+    names against what it already knows. Either way the work happens on a
+    background thread and changes reach the Tk thread in batches through
+    on_change(added, removed), so the current image is never interrupted.
+
+    The watched set starts as image_dir plus the directories of the known
+    images (when recursive); subdirectories created later are picked up as
+    they appear. Hidden and excluded directories are ignored.
+    """
+
+    POLL_MS = 250
+
+    def __init__(self, root, on_change: Callable[[List[str], List[str]], None],
+                 backend: str = "auto", poll_interval_ms: int = 1000):
+        """
+        Args:
+            root: Tk root used to deliver changes
+            on_change: Called on the Tk thread with (added paths, removed paths)
+            backend: "auto", "inotify" or "poll"
+            poll_interval_ms: Directory mtime check interval of the polling backend
+        """
+        self.root = root
+        self.on_change = on_change
+        self.backend = backend
+        self.poll_interval = poll_interval_ms / 1000
+        self.logger = logging.getLogger("DirectoryWatcher")
+
+        self._events: "queue.SimpleQueue" = queue.SimpleQueue()  # (path, added?)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._deliver_job = None
+        self.active_backend: Optional[str] = None
+
+        # Owned by the watcher thread once started
+        self._known: Dict[str, Set[str]] = {}  # directory -> image names
+        self._mtimes: Dict[str, int] = {}
+        self._recursive = False
+        self._exclude: Set[str] = set()
+        self._watch_hook: Optional[Callable[[str], None]] = None  # Backend's add-watch
+
+    def start(self, directory: str, known_paths: Iterable[str], recursive: bool = False,
+              exclude: Iterable[str] = ()):
+        """Watch directory; known_paths are the images already listed"""
+        self.stop()
+        self._recursive = recursive
+        self._exclude = {os.path.realpath(p) for p in exclude}
+        self._known = {directory: set()}
+        for path in known_paths:
+            parent, name = os.path.split(path)
+            if parent == directory or (recursive and parent.startswith(directory + os.sep)):
+                self._known.setdefault(parent, set()).add(name)
+        self._mtimes = {}
+
+        inotify = None
+        if self.backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+            try:
+                inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                self.logger.info(f"inotify unavailable ({e}); polling instead")
+        self.active_backend = "inotify" if inotify else "poll"
+
+        self._stop = threading.Event()
+        target = self._run_inotify if inotify else self._run_poll
+        args = (inotify, self._stop) if inotify else (self._stop,)
+        self._thread = threading.Thread(target=target, args=args, name="dir-watch", daemon=True)
+        self._thread.start()
+        self._deliver_job = self.root.after(self.POLL_MS, self._deliver)
+        self.logger.info(f"Watching {len(self._known)} directories with {self.active_backend}")
+
+    def stop(self):
+        """Stop watching (pending changes are dropped)"""
+        self._stop.set()
+        if self._deliver_job is not None:
+            self.root.after_cancel(self._deliver_job)
+            self._deliver_job = None
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self._events = queue.SimpleQueue()
+
+    # ======================
+    # Watcher thread
+    # ======================
+
+    def _watchable(self, path: str) -> bool:
+        return (self._recursive and not os.path.basename(path).startswith('.') and
+                os.path.realpath(path) not in self._exclude)
+
+    def _list(self, directory: str) -> Optional[Set[str]]:
+        """Image names in directory (no stat calls); subdirectories get watched"""
+        names = set()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            if _is_image(entry.name):
+                                names.add(entry.name)
+                        elif entry.is_dir() and entry.path not in self._known and self._watchable(entry.path):
+                            self._add_directory(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return names
+
+    def _add_directory(self, directory: str):
+        """Start watching a new directory and report the images already in it"""
+        self._known[directory] = set()
+        if self._watch_hook is not None:
+            self._watch_hook(directory)
+        self._diff(directory)
+
+    def _diff(self, directory: str):
+        """Compare a directory listing against the known names"""
+        names = self._list(directory)
+        if names is None:
+            self._drop_directory(directory)
+            return
+        known = self._known.get(directory, set())
+        for name in sorted(names - known):
+            self._events.put((os.path.join(directory, name), True))
+        for name in sorted(known - names):
+            self._events.put((os.path.join(directory, name), False))
+        self._known[directory] = names
+
+    def _drop_directory(self, directory: str):
+        """Report every image of a directory that disappeared"""
+        for name in sorted(self._known.pop(directory, ())):
+            self._events.put((os.path.join(directory, name), False))
+        self._mtimes.pop(directory, None)
+
+    def _catch_up(self):
+        """Diff every known directory once the watches are in place.
+
+        known_paths was listed before start(); files created or deleted in
+        between would otherwise go unnoticed until their directory changes again.
+        """
+        for directory in list(self._known):
+            if directory in self._known:
+                self._diff(directory)
+
+    def _run_poll(self, stop: threading.Event):
+        for directory in list(self._known):
+            try:
+                self._mtimes[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                pass
+        self._catch_up()
+        while not stop.wait(self.poll_interval):
+            for directory in list(self._known):
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    self._drop_directory(directory)
+                    continue
+                if self._mtimes.get(directory) != mtime:
+                    self._mtimes[directory] = mtime
+                    self._diff(directory)
+
+    def _run_inotify(self, inotify: _Inotify, stop: threading.Event):
+        watches: Dict[int, str] = {}
+
+        def watch(directory: str):
+            try:
+                watches[inotify.add_watch(directory)] = directory
+            except OSError as e:
+                self.logger.warning(f"Cannot watch {directory}: {e}")
+
+        self._watch_hook = watch
+        try:
+            for directory in list(self._known):
+                watch(directory)
+            self._catch_up()
+            while not stop.is_set():
+                for wd, mask, name in inotify.read(0.5):
+                    if mask & IN_Q_OVERFLOW:
+                        self.logger.warning("inotify queue overflowed; resynchronising")
+                        for directory in list(self._known):
+                            self._diff(directory)
+                        continue
+                    directory = watches.get(wd)
+                    if directory is None:
+                        continue
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                        watches.pop(wd, None)
+                        self._drop_directory(directory)
+                        continue
+
+                    path = os.path.join(directory, name)
+                    if mask & IN_ISDIR:
+                        if mask & (IN_CREATE | IN_MOVED_TO) and self._watchable(path):
+                            self._add_directory(path)
+                        elif mask & (IN_DELETE | IN_MOVED_FROM):
+                            self._drop_directory(path)
+                        continue
+                    if not _is_image(name):
+                        continue
+
+                    known = self._known.setdefault(directory, set())
+                    # IN_CREATE is ignored: the file is complete on close or rename
+                    if mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and name not in known:
+                        known.add(name)
+                        self._events.put((path, True))
+                    elif mask & (IN_DELETE | IN_MOVED_FROM) and name in known:
+                        known.discard(name)
+                        self._events.put((path, False))
+        finally:
+            self._watch_hook = None
+            inotify.close()
+
+    # ======================
+    # Delivery (Tk thread)
+    # ======================
+
+    def _deliver(self):
+        """Hand accumulated changes to on_change in one batch"""
+        self._deliver_job = None
+        changes: Dict[str, bool] = {}
+        while True:
+            try:
+                path, added = self._events.get_nowait()
+            except queue.Empty:
+                break
+            # Added then removed within one batch (or vice versa) cancels out
+            if changes.get(path) is (not added):
+                del changes[path]
+            else:
+                changes[path] = added
+        if changes:
+            added = [path for path, is_added in changes.items() if is_added]
+            removed = [path for path, is_added in changes.items() if not is_added]
+            try:
+                self.on_change(added, removed)
+            except Exception:
+                self.logger.error("Error applying directory changes", exc_info=True)
+        if not self._stop.is_set():
+            self._deliver_job = self.root.after(self.POLL_MS, self._deliver)
@@ -0,0 +1,162 @@
+# core/history.py
+"""
+Delta-based undo/redo history with per-image retention
+"""
+
+import sys
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.box_array import BoxArray
+
+# (class_id, x_min, y_min, x_max, y_max)
+Row = Tuple[int, float, float, float, float]
+# (index, before, after); before None = box added, after None = box deleted
+Delta = Tuple[int, Optional[Row], Optional[Row]]
+
+
+def _row_dict(row: Row) -> Dict[str, Any]:
+    class_id, x_min, y_min, x_max, y_max = row
+    return {'class_id': class_id, 'x_min': x_min, 'y_min': y_min, 'x_max': x_max, 'y_max': y_max}
+
+
+class ImageHistory:
+    """Undo/redo stacks for one image.
+
+    Each step is a tuple of deltas that touch only the boxes that changed,
+    so an edit costs O(changed boxes) regardless of how many boxes the
+    image has.
+    """
+
+    def __init__(self, max_steps: int = 100):
+        """
+        Args:
+            max_steps: Undo steps kept; the oldest are dropped first
+        """
+        self.undo_stack: "deque[Tuple[Delta, ...]]" = deque(maxlen=max(1, max_steps))
+        self.redo_stack: List[Tuple[Delta, ...]] = []
+
+    def record(self, deltas: List[Delta]):
+        """Push one edit step and invalidate redo"""
+        if not deltas:
+            return
+        self.undo_stack.append(tuple(deltas))
+        self.redo_stack.clear()
+
+    def record_add(self, boxes: BoxArray, index: int):
+        """Record that the box at index was added"""
+        self.record([(index, None, boxes.row(index))])
+
+    def record_delete(self, boxes: BoxArray, index: int):
+        """Record that the box at index is about to be deleted"""
+        self.record([(index, boxes.row(index), None)])
+
+    def record_modify(self, boxes: BoxArray, index: int, before: Row):
+        """Record that the box at index changed from before (no-op if unchanged)"""
+        after = boxes.row(index)
+        if after != before:
+            self.record([(index, before, after)])
+
+    def undo(self, boxes: BoxArray) -> bool:
+        """Revert the last step in place; False if there is nothing to undo"""
+        if not self.undo_stack:
+            return False
+        step = self.undo_stack.pop()
+        for index, before, after in reversed(step):
+            self._apply(boxes, index, after, before)
+        self.redo_stack.append(step)
+        return True
+
+    def redo(self, boxes: BoxArray) -> bool:
+        """Re-apply the last undone step in place; False if there is nothing to redo"""
+        if not self.redo_stack:
+            return False
+        step = self.redo_stack.pop()
+        for index, before, after in step:
+            self._apply(boxes, index, before, after)
+        self.undo_stack.append(step)
+        return True
+
+    @staticmethod
+    def _apply(boxes: BoxArray, index: int, old: Optional[Row], new: Optional[Row]):
+        """Move the box at index from state old to state new"""
+        if old is None:
+            boxes.insert(index, _row_dict(new))
+        elif new is None:
+            boxes.pop(index)
+        else:
+            boxes.set_row(index, new)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by both stacks"""
+        total = 0
+        for step in list(self.undo_stack) + self.redo_stack:
+            total += sys.getsizeof(step)
+            for delta in step:
+                total += sys.getsizeof(delta)
+                for row in delta[1:]:
+                    if row is not None:
+                        total += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+        return total
+
+
+class HistoryStore:
+    """Bounded LRU of per-image histories.
+
+    A history parked when leaving an image is handed back on return as long
+    as the reloaded boxes still match (same count and classes); otherwise the
+    labels changed underneath it and a fresh history is started.
+    """
+
+    def __init__(self, max_images: int = 20, max_steps: int = 100):
+        """
+        Args:
+            max_images: Images whose history is retained
+            max_steps: Undo steps per image
+        """
+        self.max_images = max(1, max_images)
+        self.max_steps = max_steps
+        self._histories: "OrderedDict[str, Tuple[ImageHistory, Tuple]]" = OrderedDict()
+
+    @staticmethod
+    def _signature(boxes: BoxArray) -> Tuple:
+        # Coordinates are not compared: a save/load round trip rounds them
+        return len(boxes), boxes.class_ids.tobytes()
+
+    def park(self, key: str, history: ImageHistory, boxes: BoxArray):
+        """Keep history for key together with the state it leaves behind"""
+        if not history.undo_stack and not history.redo_stack:
+            self._histories.pop(key, None)
+            return
+        self._histories[key] = (history, self._signature(boxes))
+        self._histories.move_to_end(key)
+        while len(self._histories) > self.max_images:
+            self._histories.popitem(last=False)
+
+    def checkout(self, key: str, boxes: BoxArray) -> ImageHistory:
+        """Return the parked history for key if still valid, else a new one"""
+        entry = self._histories.pop(key, None)
+        if entry is not None and entry[1] == self._signature(boxes):
+            return entry[0]
+        return ImageHistory(self.max_steps)
+
+    def rekey(self, old: str, new: str):
+        """Keep a parked history when its image moves to a new path"""
+        entry = self._histories.pop(old, None)
+        if entry is not None:
+            self._histories[new] = entry
+
+    def stats(self, current: Optional[ImageHistory] = None) -> Dict[str, int]:
+        """Retained images, steps and approximate bytes (including current)"""
+        histories = [history for history, _ in self._histories.values()]
+        if current is not None:
+            histories.append(current)
+        return {
+            'images': len(histories),
+            'steps': sum(len(h.undo_stack) + len(h.redo_stack) for h in histories),
+            'bytes': sum(h.nbytes() for h in histories)
+        }
+
+    def clear(self):
+        """Forget all parked histories"""
+        self._histories.clear()
@@ -3,70 +3,157 @@
 Image caching system for performance optimization
 """
 
-from collections import deque
-from typing import Optional, Any, Deque, Dict
+import threading
+from collections import OrderedDict
+from typing import Optional, Any, Dict, Set
 
 
 class ImageCache:
-    """Optimized image caching system using LRU (Least Recently Used) strategy"""
-    
-    def __init__(self, max_size: int = 5):
+    """Byte-budgeted LRU image cache with pinning and hit-rate statistics"""
+
+    def __init__(self, max_mb: float = 1024):
         """
         Initialize the image cache
-        
+
         Args:
-            max_size: Maximum number of images to keep in cache
+            max_mb: Memory budget in megabytes, measured with ndarray.nbytes
         """
-        self.max_size = max_size
-        self.cache: Dict[str, Any] = {}  # Stores key -> image data
-        self.access_order: Deque[str] = deque()  # Tracks usage order
-    
-    def get(self, key: str) -> Optional[Any]:
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()  # key -> value, LRU first
+        self._sizes: Dict[str, int] = {}  # key -> bytes
+        self._pinned: Set[str] = set()
+        self._lock = threading.Lock()  # Prefetch workers write concurrently
+
+        # Statistics
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_evicted = 0
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        """Approximate memory footprint of a cached value"""
+        nbytes = getattr(value, 'nbytes', None)
+        if nbytes is not None:
+            return int(nbytes)
+        if isinstance(value, dict):
+            return sum(ImageCache._sizeof(v) for v in value.values())
+        if isinstance(value, (list, tuple)):
+            return sum(ImageCache._sizeof(v) for v in value)
+        return 0
+
+    def get(self, key: str, record_stats: bool = True) -> Optional[Any]:
         """
         Get an image from cache
-        
+
         Args:
             key: Cache key (usually file path)
-            
+            record_stats: Count the lookup in the hit rate (off for derived
+                entries such as pyramid levels, which are looked up per tile)
+
         Returns:
             Cached image data or None if not found
         """
-        if key in self.cache:
-            # Move to end (most recently used)
-            self.access_order.remove(key)
-            self.access_order.append(key)
-            return self.cache[key]
-        return None
-    
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                if record_stats:
+                    self.misses += 1
+                return None
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+            if record_stats:
+                self.hits += 1
+            return value
+
     def put(self, key: str, value: Any):
         """
         Store an image in cache
-        
+
         Args:
             key: Cache key (usually file path)
             value: Image data to cache
         """
-        if key in self.cache:
-            # Update existing: move to end
-            self.access_order.remove(key)
-        elif len(self.cache) >= self.max_size:
-            # Remove least recently used item
-            oldest = self.access_order.popleft()
-            del self.cache[oldest]
-        
-        # Add new item
-        self.cache[key] = value
-        self.access_order.append(key)
-    
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.bytes_used -= self._sizes[key]
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self.bytes_used += size
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used, unpinned entries until within budget"""
+        # Pop from the LRU end; pinned entries found there are in use, so they
+        # move to the MRU end instead of being copied past on every put
+        pinned_seen = 0
+        while self.bytes_used > self.max_bytes and pinned_seen < len(self._entries):
+            key = next(iter(self._entries))
+            if key in self._pinned:
+                self._entries.move_to_end(key)
+                pinned_seen += 1
+                continue
+            del self._entries[key]
+            size = self._sizes.pop(key)
+            self.bytes_used -= size
+            self.evictions += 1
+            self.bytes_evicted += size
+
+    def pin(self, key: str):
+        """Protect key from eviction (e.g. the image being edited)"""
+        with self._lock:
+            self._pinned.add(key)
+
+    def unpin(self, key: str):
+        """Allow key to be evicted again"""
+        with self._lock:
+            self._pinned.discard(key)
+            self._evict()
+
+    def rekey(self, old: str, new: str):
+        """Move an entry (and its pin) to a new key, e.g. after its file was moved"""
+        with self._lock:
+            value = self._entries.pop(old, None)
+            if value is None:
+                return
+            if new in self._entries:
+                self.bytes_used -= self._sizes[new]
+            self._entries[new] = value
+            self._sizes[new] = self._sizes.pop(old)
+            if old in self._pinned:
+                self._pinned.discard(old)
+                self._pinned.add(new)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters for display"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes_used': self.bytes_used,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'bytes_evicted': self.bytes_evicted
+            }
+
     def clear(self):
         """Clear all cached images"""
-        self.cache.clear()
-        self.access_order.clear()
-    
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._pinned.clear()
+            self.bytes_used = 0
+
     def __len__(self) -> int:
         """Return number of cached images"""
-        return len(self.cache)
-    
+        return len(self._entries)
+
     def __contains__(self, key: str) -> bool:
         """Check if key is in cache"""
-        return key in self.cache
+        return key in self._entries
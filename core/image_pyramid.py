@@ -0,0 +1,81 @@
+# core/image_pyramid.py
+"""
+Multi-resolution image pyramid for zoomed-out display
+"""
+
+import math
+from typing import Any
+
+import cv2
+
+from .image_cache import ImageCache
+
+
+class ImagePyramid:
+    """Lazily built power-of-two pyramid whose levels live in the ImageCache.
+
+    Level 0 is the full-resolution image itself (already pinned in the cache
+    as the image being edited), so no second full-size copy is kept. Level n
+    is downscaled by 2**n with area interpolation and keeps the BGR order of
+    the source. Levels are keyed by image path so revisiting an image (or
+    returning to a zoom level) costs nothing; their lookups stay out of the
+    cache hit rate, which tracks image loads.
+    """
+
+    def __init__(self, image_cache: ImageCache, max_levels: int = 4):
+        """
+        Args:
+            image_cache: Shared cache that stores the downscaled levels
+            max_levels: Deepest level to build (level n = 1 / 2**n scale)
+        """
+        self.image_cache = image_cache
+        self.max_levels = max(0, max_levels)
+
+    def level_for_zoom(self, zoom_scale: float, finer: bool = False) -> int:
+        """
+        Pick the pyramid level nearest to zoom_scale (in log2 space)
+
+        Args:
+            zoom_scale: Display scale relative to the full-resolution image
+            finer: Pick the coarsest level that is still at or above display
+                resolution instead, so the display is always a downscale
+        """
+        if zoom_scale <= 0:
+            return self.max_levels
+        level = -math.log2(zoom_scale)
+        level = int(math.floor(level + 1e-9)) if finer else int(round(level))
+        return max(0, min(self.max_levels, level))
+
+    @staticmethod
+    def level_key(key: str, level: int) -> str:
+        """Cache key for a pyramid level"""
+        return f"{key}#L{level}"
+
+    def rekey(self, old: str, new: str):
+        """Carry the cached levels of an image over to its new key"""
+        for level in range(1, self.max_levels + 1):
+            self.image_cache.rekey(self.level_key(old, level), self.level_key(new, level))
+
+    def get_level(self, key: str, image: Any, level: int) -> Any:
+        """
+        Return pyramid level for image in BGR order, building missing levels on demand
+
+        Args:
+            key: Image identity (usually file path)
+            image: Full-resolution BGR image
+            level: Requested level
+        """
+        if level <= 0:
+            return image
+        cached = self.image_cache.get(self.level_key(key, level), record_stats=False)
+        if cached is not None:
+            return cached
+
+        parent = self.get_level(key, image, level - 1)
+        h, w = parent.shape[:2]
+        if w < 2 or h < 2:
+            return parent
+
+        reduced = cv2.resize(parent, (max(1, w // 2), max(1, h // 2)), interpolation=cv2.INTER_AREA)
+        self.image_cache.put(self.level_key(key, level), reduced)
+        return reduced
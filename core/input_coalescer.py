@@ -0,0 +1,112 @@
+# core/input_coalescer.py
+"""
+Per-frame coalescing of pointer events, status text and cursor changes
+"""
+
+import time
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class InputCoalescer:
+    """Collapses bursts of motion events into one update per display frame.
+
+    Handlers post events by kind ('drag', 'pan', 'motion'); only the latest
+    event of each kind is kept and applied on the next frame, together with
+    the latest status text and cursor. Work per second therefore follows the
+    display rate instead of the mouse polling rate.
+    """
+
+    def __init__(self, root, ui, frame_interval_ms: float = 16):
+        """
+        Args:
+            root: Tk root used to schedule the flush
+            ui: Main window providing set_status() and the canvas
+            frame_interval_ms: Minimum time between two flushes
+        """
+        self.root = root
+        self.ui = ui
+        self.frame_interval_ms = frame_interval_ms
+        self.logger = logging.getLogger("InputCoalescer")
+
+        self._pending: Dict[str, Tuple[Callable, Any]] = {}  # kind -> (handler, latest event)
+        self._status: Optional[str] = None
+        self._cursor: Optional[str] = None
+        self._applied_cursor = ""
+        self._flush_job = None
+        self._flushing = False
+        self._last_flush = 0.0
+
+        # Statistics
+        self.events_received = 0
+        self.events_applied = 0
+
+    def post(self, kind: str, handler: Callable, event: Any):
+        """Queue event for handler, replacing an older event of the same kind"""
+        self.events_received += 1
+        self._pending.pop(kind, None)
+        self._pending[kind] = (handler, event)
+        self._schedule()
+
+    def set_status(self, text: str):
+        """Show text in the status bar on the next frame"""
+        self._status = text
+        self._schedule()
+
+    def set_cursor(self, cursor: str):
+        """Set the canvas cursor on the next frame (skipped if unchanged)"""
+        self._cursor = cursor
+        self._schedule()
+
+    def _schedule(self):
+        """Arrange for flush() to run once the current frame interval has passed"""
+        if self._flush_job is not None or self._flushing:
+            return
+        elapsed = time.perf_counter() * 1000 - self._last_flush
+        if elapsed >= self.frame_interval_ms:
+            # Runs after Tk has drained the queued events
+            self._flush_job = self.root.after_idle(self.flush)
+        else:
+            delay = max(1, int(self.frame_interval_ms - elapsed))
+            self._flush_job = self.root.after(delay, self.flush)
+
+    def flush(self):
+        """Apply pending events, status and cursor now.
+
+        Button handlers call this first so the final pointer position is
+        applied before a press or release is processed.
+        """
+        if self._flush_job is not None:
+            self.root.after_cancel(self._flush_job)
+            self._flush_job = None
+        self._last_flush = time.perf_counter() * 1000
+
+        pending, self._pending = self._pending, {}
+        # Status and cursor set by the handlers go out with this flush
+        self._flushing = True
+        try:
+            for kind, (handler, event) in pending.items():
+                self.events_applied += 1
+                try:
+                    handler(event)
+                except Exception:
+                    self.logger.error(f"Error handling coalesced '{kind}' event", exc_info=True)
+        finally:
+            self._flushing = False
+
+        if self._status is not None:
+            self.ui.set_status(self._status)
+            self._status = None
+        if self._cursor is not None:
+            if self._cursor != self._applied_cursor:
+                self.ui.canvas.config(cursor=self._cursor)
+                self._applied_cursor = self._cursor
+            self._cursor = None
+
+    def cancel(self):
+        """Drop everything pending (e.g. when the window closes)"""
+        if self._flush_job is not None:
+            self.root.after_cancel(self._flush_job)
+            self._flush_job = None
+        self._pending.clear()
+        self._status = self._cursor = None
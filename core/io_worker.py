@@ -0,0 +1,266 @@
+# core/io_worker.py
+"""
+Write-behind queue for label writes and processed-dir moves
+"""
+
+import os
+import json
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.file_utils import FileUtils
+
+
+class WriteBehindWorker:
+    """Runs label writes and image moves on one background thread, in order.
+
+    Jobs are appended to a journal before they are queued and marked done
+    once applied, so a crash leaves the unfinished ones to be replayed by
+    recover() on the next start. Both operations are idempotent: a write
+    rewrites the whole file and a move whose source is gone is skipped.
+    Failures are handed back to the Tk thread through on_error.
+    """
+
+    POLL_MS = 100
+
+    def __init__(self, root, journal_path: str, create_backup: bool = False,
+                 backup_count: int = 0, on_error: Optional[Callable[[Dict[str, Any], Exception], None]] = None):
+        """
+        Args:
+            root: Tk root used to deliver failures on the UI thread
+            journal_path: Append-only file recording unfinished jobs
+            create_backup: Keep previous label versions when overwriting
+            backup_count: Number of label backups kept per file
+            on_error: Called on the UI thread with (job, exception)
+        """
+        self.root = root
+        self.journal_path = journal_path
+        self.backup_count = backup_count if create_backup else 0
+        self.on_error = on_error
+        self.logger = logging.getLogger("WriteBehind")
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._failures: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._cond = threading.Condition()
+        self._pending: Dict[str, int] = {}  # image path -> queued jobs for it
+        self._aliases: Dict[str, str] = {}  # processed path -> path the image was moved from
+        self._outstanding = 0
+        self._next_id = 1
+        self._journal = None
+        self._poll_job = None
+        self._closed = False
+
+        # Statistics
+        self.jobs_done = 0
+        self.jobs_failed = 0
+
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    # ======================
+    # Submission (UI thread)
+    # ======================
+
+    def _key(self, image_path: str) -> str:
+        # A moved image's new path maps to the jobs queued under its original one
+        return self._aliases.get(image_path, image_path)
+
+    def write_labels(self, image_path: str, label_path: str, text: str):
+        """Queue an atomic write of text to label_path"""
+        self._submit({'op': 'write', 'key': self._key(image_path), 'path': label_path, 'text': text})
+
+    def move_to_processed(self, image_path: str, processed_dir: str, image_dir: str = ""):
+        """Queue moving image_path (and its sidecar label) into processed_dir, keeping
+        its subdirectory below image_dir"""
+        self._submit({'op': 'move', 'key': self._key(image_path), 'path': image_path,
+                      'processed_dir': processed_dir, 'image_dir': image_dir})
+
+    def materialize(self, image_paths: List[str], processed_dir: str, label_dir: str,
+                    mode: str = "link", image_dir: str = ""):
+        """Queue laying out image_paths under processed_dir in one job"""
+        self._submit({'op': 'materialize', 'key': processed_dir, 'path': processed_dir,
+                      'images': list(image_paths), 'label_dir': label_dir, 'mode': mode,
+                      'image_dir': image_dir})
+
+    def _submit(self, job: Dict[str, Any]):
+        if job['op'] == 'move':
+            moved_to, _ = FileUtils.processed_paths(job['path'], job['processed_dir'],
+                                                    job.get('image_dir'))
+            self._aliases[moved_to] = job['key']
+        if self._closed:
+            self._apply(job)
+            return
+        with self._cond:
+            job['id'] = self._next_id
+            self._next_id += 1
+            self._journal_append(job, sync=True)
+            self._pending[job['key']] = self._pending.get(job['key'], 0) + 1
+            self._outstanding += 1
+        self._queue.put(job)
+        self._schedule_poll()
+
+    def pending(self, image_path: Optional[str] = None) -> int:
+        """Queued jobs for image_path, or in total"""
+        with self._cond:
+            if image_path is None:
+                return self._outstanding
+            return self._pending.get(self._key(image_path), 0)
+
+    def wait(self, image_path: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Block until jobs for image_path (or all jobs) are done; False on timeout"""
+        key = self._key(image_path) if image_path else None
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not (self._pending.get(key) if key else self._outstanding), timeout)
+
+    # ======================
+    # Journal
+    # ======================
+
+    def _journal_append(self, record: Dict[str, Any], sync: bool = False):
+        """Append one record; called with _cond held.
+
+        Jobs are synced so they survive a crash; "done" markers are not, since
+        replaying a finished job is harmless.
+        """
+        try:
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal.write(json.dumps(record) + "\n")
+            self._journal.flush()
+            if sync:
+                os.fsync(self._journal.fileno())
+        except OSError:
+            self.logger.error(f"Cannot write I/O journal {self.journal_path}", exc_info=True)
+
+    def _journal_reset(self):
+        """Truncate the journal once nothing is outstanding; called with _cond held"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        try:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+        except OSError:
+            self.logger.warning(f"Cannot remove I/O journal {self.journal_path}")
+
+    def recover(self) -> int:
+        """Replay jobs an earlier run journaled but never finished; returns their count.
+
+        Call once at startup, before submitting new jobs.
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        jobs: Dict[int, Dict[str, Any]] = {}
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # Torn last line from a crash mid-append
+                    if record.get('done'):
+                        jobs.pop(record['id'], None)
+                    else:
+                        jobs[record['id']] = record
+        except OSError:
+            self.logger.error(f"Cannot read I/O journal {self.journal_path}", exc_info=True)
+            return 0
+
+        unfinished: List[Dict[str, Any]] = [jobs[i] for i in sorted(jobs)]
+        with self._cond:
+            self._journal_reset()
+        for job in unfinished:
+            self.logger.info(f"Replaying unfinished {job['op']} of {job['path']}")
+            self._submit({k: v for k, v in job.items() if k != 'id'})
+        return len(unfinished)
+
+    # ======================
+    # Worker thread
+    # ======================
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._apply(job)
+                self.jobs_done += 1
+            except Exception as e:
+                self.jobs_failed += 1
+                self.logger.error(f"Background {job['op']} of {job['path']} failed", exc_info=True)
+                self._failures.put((job, e))
+
+            with self._cond:
+                self._journal_append({'id': job['id'], 'done': True})
+                count = self._pending.get(job['key'], 0) - 1
+                if count > 0:
+                    self._pending[job['key']] = count
+                else:
+                    self._pending.pop(job['key'], None)
+                self._outstanding -= 1
+                if not self._outstanding:
+                    self._journal_reset()
+                self._cond.notify_all()
+
+    def _apply(self, job: Dict[str, Any]):
+        """Perform one job; raises on failure"""
+        if job['op'] == 'write':
+            FileUtils.atomic_write_text(job['path'], job['text'], self.backup_count)
+        elif job['op'] == 'move':
+            if not os.path.exists(job['path']):
+                return  # Already moved before a crash
+            new_path, _ = FileUtils.move_to_processed_dir(job['path'], job['processed_dir'],
+                                                          create_subdirs=True,
+                                                          image_dir=job.get('image_dir'))
+            if new_path is None:
+                raise OSError(f"Could not move {job['path']} to {job['processed_dir']}")
+        elif job['op'] == 'materialize':
+            placed = FileUtils.materialize_processed(job['images'], job['path'], job['label_dir'],
+                                                     job['mode'], job.get('image_dir'))
+            self.logger.info(f"Materialized {placed} of {len(job['images'])} processed images")
+        else:
+            raise ValueError(f"Unknown I/O job: {job['op']}")
+
+    # ======================
+    # Failure delivery (UI thread)
+    # ======================
+
+    def _schedule_poll(self):
+        if self._poll_job is None and not self._closed:
+            self._poll_job = self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        """Hand failures to on_error; keep polling while jobs are outstanding"""
+        self._poll_job = None
+        # Checked before draining: a job's failure is queued before it stops
+        # counting as outstanding, so once this reads zero the drain sees them all
+        busy = self.pending()
+        while True:
+            try:
+                job, error = self._failures.get_nowait()
+            except queue.Empty:
+                break
+            if self.on_error is not None:
+                self.on_error(job, error)
+        if busy:
+            self._schedule_poll()
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """Finish queued jobs and stop the thread; False if it timed out"""
+        if self._closed:
+            return True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._closed = True
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        with self._cond:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+        return not self._thread.is_alive()
@@ -0,0 +1,352 @@
+# core/manifest.py
+"""
+Persistent per-directory dataset manifest with incremental refresh
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from PIL import Image
+
+from utils.file_utils import FileUtils, IMAGE_EXTENSIONS
+
+MANIFEST_VERSION = 3
+
+# Row layout of one image entry
+SIZE, MTIME, WIDTH, HEIGHT, FLAGS = range(5)
+LABELED, PROCESSED = 1, 2
+
+
+class DatasetManifest:
+    """Remembers what an image directory contains between sessions.
+
+    For every image it stores size, mtime, pixel dimensions (read from the
+    file header, never decoded) and labeled/processed flags. Directories
+    are keyed by their mtime: an unchanged directory is reused without
+    listing it, a changed one is listed again. The image list is therefore
+    ready after one stat per directory. Afterwards every file is stat'ed,
+    and only new files and files whose size or mtime changed (rewritten in
+    place, which leaves the directory mtime alone) have their header read.
+
+    refresh() runs on a worker thread while the Tk thread marks images as
+    labeled or processed, so all state is guarded by one lock.
+    """
+
+    def __init__(self, image_dir: str, label_dir: str = "", recursive: bool = False,
+                 exclude: Iterable[str] = (), manifest_dir: str = ".manifests"):
+        """
+        Args:
+            image_dir: Dataset root
+            label_dir: Directory holding the YOLO .txt files
+            recursive: Include subdirectories (see FileUtils.iter_image_files)
+            exclude: Directories to skip, e.g. the processed directory
+            manifest_dir: Where manifests are kept, one file per image directory
+        """
+        self.image_dir = image_dir
+        self.label_dir = label_dir
+        self.recursive = recursive
+        self.exclude = {os.path.realpath(p) for p in exclude}
+        self.path = self.path_for(image_dir, manifest_dir)
+        self.logger = logging.getLogger("DatasetManifest")
+
+        self._lock = threading.RLock()
+        # rel dir -> {'mtime_ns', 'subdirs' (natural order), 'order' (names, natural order),
+        #             'files' (name -> [size, mtime_ns, width, height, flags])}
+        self._dirs: Dict[str, Dict[str, Any]] = {}
+        self._label_dir_mtime: Optional[int] = None
+        self._counts = {'images': 0, 'labeled': 0, 'processed': 0}
+        self._dirty = False
+
+        # Statistics of the last refresh
+        self.dirs_reused = 0
+        self.dirs_rescanned = 0
+        self.files_probed = 0
+
+    # ======================
+    # Persistence
+    # ======================
+
+    @staticmethod
+    def path_for(image_dir: str, manifest_dir: str) -> str:
+        """Manifest file of image_dir.
+
+        Kept outside the dataset: writing it into image_dir would change the
+        very directory mtime it relies on, and the dataset may be read-only.
+        """
+        image_dir = os.path.realpath(image_dir)
+        digest = hashlib.sha1(image_dir.encode()).hexdigest()[:16]
+        return os.path.join(manifest_dir, f"{os.path.basename(image_dir)}-{digest}.json")
+
+    def load(self) -> bool:
+        """Read the manifest file; False if missing, stale or unreadable"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.logger.warning(f"Ignoring unreadable manifest {self.path}", exc_info=True)
+            return False
+        if (data.get('version') != MANIFEST_VERSION or data.get('recursive') != self.recursive or
+                data.get('image_dir') != os.path.realpath(self.image_dir)):
+            return False
+
+        dirs = {}
+        for rel, record in data.get('dirs', {}).items():
+            rows = record['files']
+            dirs[rel] = {
+                'mtime_ns': record['mtime_ns'],
+                'subdirs': record['subdirs'],
+                'order': [row[0] for row in rows],
+                'files': {row[0]: row[1:] for row in rows}
+            }
+        with self._lock:
+            self._dirs = dirs
+            # Label flags were computed against this directory only
+            if data.get('label_dir') == self.label_dir:
+                self._label_dir_mtime = data.get('label_dir_mtime_ns')
+            self._recount()
+            self._dirty = False
+        return True
+
+    def save(self):
+        """Write the manifest atomically if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                'version': MANIFEST_VERSION,
+                'image_dir': os.path.realpath(self.image_dir),
+                'recursive': self.recursive,
+                'label_dir': self.label_dir,
+                'label_dir_mtime_ns': self._label_dir_mtime,
+                'dirs': {rel: {'mtime_ns': record['mtime_ns'],
+                               'subdirs': record['subdirs'],
+                               'files': [[name] + record['files'][name] for name in record['order']]}
+                         for rel, record in self._dirs.items()}
+            }
+            self._dirty = False
+        try:
+            FileUtils.ensure_directory(os.path.dirname(self.path) or ".")
+            FileUtils.atomic_write_text(self.path, json.dumps(data, separators=(',', ':')))
+        except OSError:
+            self.logger.warning(f"Cannot write manifest {self.path}", exc_info=True)
+            with self._lock:
+                self._dirty = True
+
+    # ======================
+    # Refresh
+    # ======================
+
+    def refresh(self) -> Iterator[List[str]]:
+        """
+        Bring the manifest up to date, yielding unprocessed image paths
+
+        Paths come in batches, in the same order as FileUtils.iter_image_files.
+        Files are checked for changes (stat, and a header read if new or
+        changed) after all paths have been yielded, so the first image can
+        be shown right away.
+        """
+        self.dirs_reused = self.dirs_rescanned = self.files_probed = 0
+        seen: Set[str] = set()
+        stack = ['']
+        while stack:
+            rel = stack.pop()
+            path = os.path.join(self.image_dir, rel) if rel else self.image_dir
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(rel)
+
+            with self._lock:
+                record = self._dirs.get(rel)
+                reuse = record is not None and record['mtime_ns'] == mtime_ns
+            if reuse:
+                self.dirs_reused += 1
+            else:
+                record = self._rescan_dir(rel, path, mtime_ns)
+                self.dirs_rescanned += 1
+
+            with self._lock:
+                files = record['files']
+                paths = [os.path.join(path, name) for name in record['order']
+                         if not files[name][FLAGS] & PROCESSED]
+            for start in range(0, len(paths), 1024):
+                yield paths[start:start + 1024]
+            stack.extend(os.path.join(rel, name) for name in reversed(record['subdirs']))
+
+        with self._lock:
+            for rel in set(self._dirs) - seen:
+                del self._dirs[rel]
+                self._dirty = True
+
+        self._probe()
+        self.refresh_labels()
+        with self._lock:
+            self._recount()
+        self.logger.info(f"Manifest refreshed: {self.dirs_reused} directories reused, "
+                         f"{self.dirs_rescanned} rescanned, {self.files_probed} files probed")
+
+    def _rescan_dir(self, rel: str, path: str, mtime_ns: int) -> Dict[str, Any]:
+        """List a changed directory, keeping entries for files already known"""
+        names, subdirs = [], []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        name = entry.name
+                        if entry.is_file():
+                            if name[name.rfind('.'):].lower() in IMAGE_EXTENSIONS:
+                                names.append(name)
+                        elif (self.recursive and entry.is_dir() and not name.startswith('.') and
+                              os.path.realpath(entry.path) not in self.exclude):
+                            subdirs.append(name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            self.logger.warning(f"Cannot scan {path}: {e}")
+
+        with self._lock:
+            old = self._dirs.get(rel)
+            old_files = old['files'] if old else {}
+            files = {}
+            for name in names:
+                row = old_files.get(name)
+                if row is None:
+                    row = [-1, -1, 0, 0, 0]  # Probed after the listing is delivered
+                else:
+                    row[FLAGS] &= ~PROCESSED  # It is back in the image directory
+                files[name] = row
+            # Moved-out images stay known as processed
+            for name, row in old_files.items():
+                if name not in files and row[FLAGS] & PROCESSED:
+                    files[name] = row
+
+            present = set(names)
+            if old and present.issubset(old_files):
+                order = [name for name in old['order'] if name in files]
+            else:
+                order = sorted(files, key=FileUtils.natural_sort_key)
+            subdirs.sort(key=FileUtils.natural_sort_key)
+            record = {'mtime_ns': mtime_ns, 'subdirs': subdirs, 'order': order, 'files': files}
+            self._dirs[rel] = record
+            self._dirty = True
+        return record
+
+    def _probe(self):
+        """Stat every image; read the header of new ones and of ones changed since the last probe"""
+        with self._lock:
+            known = [(os.path.join(self.image_dir, rel, name), row)
+                     for rel, record in self._dirs.items()
+                     for name, row in record['files'].items() if not row[FLAGS] & PROCESSED]
+        for full_path, row in known:
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                continue
+            if row[SIZE] == st.st_size and row[MTIME] == st.st_mtime_ns:
+                continue
+            width = height = 0
+            try:
+                with Image.open(full_path) as image:  # Parses the header only
+                    width, height = image.size
+            except Exception:
+                self.logger.debug(f"Cannot read image header: {full_path}")
+            with self._lock:
+                row[SIZE], row[MTIME], row[WIDTH], row[HEIGHT] = st.st_size, st.st_mtime_ns, width, height
+                self._dirty = True
+            self.files_probed += 1
+
+    def refresh_labels(self, label_dir: Optional[str] = None):
+        """Recompute labeled flags if the label directory changed (one listing per directory, no stats)"""
+        if label_dir is not None and label_dir != self.label_dir:
+            self.label_dir = label_dir
+            self._label_dir_mtime = None
+        try:
+            mtime_ns = os.stat(self.label_dir).st_mtime_ns if self.label_dir else None
+        except OSError:
+            mtime_ns = None
+        if mtime_ns is not None and mtime_ns == self._label_dir_mtime:
+            return
+
+        with self._lock:
+            rels = list(self._dirs)
+        # Labels mirror the image subdirectories (see FileUtils.get_label_path)
+        stems: Dict[str, Set[str]] = {}
+        for rel in rels if mtime_ns is not None else ():
+            directory = os.path.join(self.label_dir, rel) if rel else self.label_dir
+            try:
+                with os.scandir(directory) as entries:
+                    stems[rel] = {entry.name[:-4] for entry in entries if entry.name.endswith('.txt')}
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                self.logger.warning(f"Cannot scan {directory}: {e}")
+
+        with self._lock:
+            for rel, record in self._dirs.items():
+                labeled = stems.get(rel, ())
+                for name, row in record['files'].items():
+                    if os.path.splitext(name)[0] in labeled:
+                        row[FLAGS] |= LABELED
+                    else:
+                        row[FLAGS] &= ~LABELED
+            self._label_dir_mtime = mtime_ns
+            self._recount()
+            self._dirty = True
+
+    # ======================
+    # Queries and updates (any thread)
+    # ======================
+
+    def _row(self, image_path: str) -> Optional[List[int]]:
+        rel = os.path.relpath(os.path.dirname(image_path), self.image_dir)
+        record = self._dirs.get('' if rel == '.' else rel)
+        return record['files'].get(os.path.basename(image_path)) if record else None
+
+    def entry(self, image_path: str) -> Optional[Dict[str, Any]]:
+        """Recorded size, mtime, dimensions and flags of an image"""
+        with self._lock:
+            row = self._row(image_path)
+            if row is None:
+                return None
+            return {'size': row[SIZE], 'mtime_ns': row[MTIME], 'width': row[WIDTH],
+                    'height': row[HEIGHT], 'labeled': bool(row[FLAGS] & LABELED),
+                    'processed': bool(row[FLAGS] & PROCESSED)}
+
+    def _set_flag(self, image_path: str, flag: int, on: bool):
+        with self._lock:
+            row = self._row(image_path)
+            if row is None or bool(row[FLAGS] & flag) == on:
+                return
+            row[FLAGS] = row[FLAGS] | flag if on else row[FLAGS] & ~flag
+            key = 'labeled' if flag == LABELED else 'processed'
+            self._counts[key] += 1 if on else -1
+            self._dirty = True
+
+    def mark_labeled(self, image_path: str, labeled: bool = True):
+        """Record that image_path now has (or lost) a label file"""
+        self._set_flag(image_path, LABELED, labeled)
+
+    def mark_processed(self, image_path: str, processed: bool = True):
+        """Record that image_path was moved to (or back from) the processed directory"""
+        self._set_flag(image_path, PROCESSED, processed)
+
+    def _recount(self):
+        images = labeled = processed = 0
+        for record in self._dirs.values():
+            for row in record['files'].values():
+                images += 1
+                labeled += row[FLAGS] & LABELED
+                processed += (row[FLAGS] & PROCESSED) >> 1
+        self._counts = {'images': images, 'labeled': labeled, 'processed': processed}
+
+    def counts(self) -> Dict[str, int]:
+        """Images known (including processed), labeled and processed"""
+        with self._lock:
+            return dict(self._counts)
@@ -0,0 +1,190 @@
+# core/prefetcher.py
+"""
+Background prefetching of neighbouring images and labels
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Optional, Any, Dict, List, Tuple
+
+from models.box_array import BoxArray
+from utils.file_utils import FileUtils
+from .image_cache import ImageCache
+
+
+class ImagePrefetcher:
+    """Decodes upcoming images and parses their labels on a worker pool.
+
+    Decoded images are handed to the shared ImageCache, parsed labels are kept
+    in a small side table keyed by label path and validated against the file
+    mtime, so navigating with D/A becomes a cache hit instead of a decode.
+    """
+
+    def __init__(self, image_cache: ImageCache, ahead: int = 3, behind: int = 1,
+                 max_workers: int = 2):
+        """
+        Args:
+            image_cache: Cache that receives decoded images
+            ahead: Number of images after the current one to prefetch
+            behind: Number of images before the current one to prefetch
+            max_workers: Size of the decode thread pool
+        """
+        self.image_cache = image_cache
+        self.ahead = ahead
+        self.behind = behind
+        self.logger = logging.getLogger("Prefetcher")
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                            thread_name_prefix="prefetch")
+        self._lock = threading.RLock()  # done-callbacks may fire inside schedule()
+        self._futures: Dict[str, Future] = {}          # image path -> pending decode
+        self._wanted: set = set()                      # paths inside the current window
+        self._labels: Dict[str, Tuple[Tuple[int, int], BoxArray]] = {}  # label path -> (stat key, boxes)
+        self._closed = False
+        self.source = None  # Optional ArchiveSource serving paths it owns
+
+    # ======================
+    # Scheduling
+    # ======================
+
+    def schedule(self, image_files: List[str], index: int,
+                 label_path_for: Optional[Callable[[str], str]], num_classes: int):
+        """Prefetch the window around index, cancelling jobs that fell out of it
+
+        label_path_for maps an image path to its label file (None: images only).
+        """
+        if self._closed or not image_files:
+            return
+
+        window = [i for i in range(index + 1, index + self.ahead + 1) if i < len(image_files)]
+        window += [i for i in range(index - 1, index - self.behind - 1, -1) if i >= 0]
+        paths = [image_files[i] for i in window]
+
+        with self._lock:
+            self._wanted = set(paths)
+            # Cancel stale prefetches (e.g. after a jump); running jobs finish
+            # but their result is dropped in _prefetch_one
+            for path, future in list(self._futures.items()):
+                if path not in self._wanted and future.cancel():
+                    del self._futures[path]
+
+            source = self.source
+            if source is not None:
+                source.will_need(p for p in paths if p not in self.image_cache)
+            for path in paths:
+                if path in self._futures or path in self.image_cache:
+                    continue
+                label_path = label_path_for(path) if label_path_for else None
+                future = self._executor.submit(self._prefetch_one, path, label_path, num_classes)
+                future.add_done_callback(lambda f, p=path: self._forget(p, f))
+                self._futures[path] = future
+
+    def _forget(self, path: str, future: Future):
+        """Drop a finished future from the in-flight table"""
+        with self._lock:
+            if self._futures.get(path) is future:
+                del self._futures[path]
+
+    def _prefetch_one(self, path: str, label_path: Optional[str], num_classes: int) -> Optional[Any]:
+        """Worker: decode image and parse its labels"""
+        with self._lock:
+            if path not in self._wanted:
+                return None
+
+        image = self._load(path)
+        if image is None:
+            return None
+
+        with self._lock:
+            still_wanted = path in self._wanted
+        if still_wanted:
+            self.image_cache.put(path, image)
+
+        if label_path:
+            h, w = image.shape[:2]
+            try:
+                self._cache_labels(label_path, w, h, num_classes)
+            except Exception:
+                self.logger.warning(f"Failed to prefetch labels: {label_path}", exc_info=True)
+
+        return image
+
+    # ======================
+    # Consumers (Tk thread)
+    # ======================
+
+    def get_image(self, path: str) -> Optional[Any]:
+        """Return the decoded image, waiting on an in-flight prefetch if needed"""
+        image = self.image_cache.get(path)
+        if image is not None:
+            return image
+
+        with self._lock:
+            future = self._futures.get(path)
+        if future is not None and not future.cancelled():
+            try:
+                image = future.result()
+            except Exception:
+                image = None
+            if image is not None:
+                self.image_cache.put(path, image)
+                return image
+
+        image = self._load(path)
+        if image is not None:
+            self.image_cache.put(path, image)
+        return image
+
+    def _load(self, path: str) -> Optional[Any]:
+        """Decode path from the archive source if it owns it, else from disk"""
+        source = self.source
+        if source is not None and source.owns(path):
+            return source.read(path)
+        return FileUtils.load_image_with_caching(path)
+
+    def get_labels(self, label_path: str, img_width: int, img_height: int,
+                   num_classes: int) -> BoxArray:
+        """Return parsed boxes for label_path, reusing a prefetched parse if still fresh"""
+        stat_key = self._stat_key(label_path)
+        if stat_key is None:
+            return BoxArray()
+
+        with self._lock:
+            cached = self._labels.get(label_path)
+        if cached is not None and cached[0] == stat_key:
+            return cached[1].copy()
+
+        return FileUtils.load_yolo_labels(label_path, img_width, img_height, num_classes)
+
+    def _cache_labels(self, label_path: str, img_width: int, img_height: int, num_classes: int):
+        """Parse labels and remember them with the file's stat key"""
+        stat_key = self._stat_key(label_path)
+        if stat_key is None:
+            return
+        boxes = FileUtils.load_yolo_labels(label_path, img_width, img_height, num_classes)
+        with self._lock:
+            self._labels[label_path] = (stat_key, boxes)
+            # Keep the side table roughly window sized
+            while len(self._labels) > 2 * (self.ahead + self.behind + 1):
+                self._labels.pop(next(iter(self._labels)))
+
+    @staticmethod
+    def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of a file, or None if it does not exist"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def shutdown(self):
+        """Cancel pending prefetches and stop the worker pool"""
+        self._closed = True
+        with self._lock:
+            self._wanted = set()
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,137 @@
+# core/processed_index.py
+"""
+In-memory index of images and labels in the processed directory
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional, Set
+
+from utils.file_utils import FileUtils, IMAGE_EXTENSIONS
+
+
+class ProcessedIndex:
+    """Maps images to their location under processed_dir/images and /labels.
+
+    Entries are keyed by the image's path relative to image_dir (the layout
+    is mirrored below images/ and labels/), so same-named images in
+    different subdirectories stay apart. Built with one scandir per
+    directory and kept current as images are moved, so finding where an
+    image went is a dict lookup instead of two stat calls per image.
+    """
+
+    def __init__(self, processed_dir: str = "", image_dir: str = ""):
+        """
+        Args:
+            processed_dir: Directory holding the images/ and labels/ subdirectories
+            image_dir: Dataset root the processed layout mirrors
+        """
+        self.processed_dir = processed_dir
+        self.image_dir = image_dir
+        self.logger = logging.getLogger("ProcessedIndex")
+        self._images: Dict[str, str] = {}  # relative path -> processed image path
+        self._labels: Dict[str, str] = {}  # relative path without extension -> processed label path
+
+    def build(self, processed_dir: Optional[str] = None, image_dir: Optional[str] = None) -> int:
+        """(Re)read processed_dir; returns the number of images found"""
+        if processed_dir is not None:
+            self.processed_dir = processed_dir
+        if image_dir is not None:
+            self.image_dir = image_dir
+        self._images.clear()
+        self._labels.clear()
+        if not self.processed_dir:
+            return 0
+
+        for kind, table in (('images', self._images), ('labels', self._labels)):
+            root = os.path.join(self.processed_dir, kind)
+            pending = [root]
+            while pending:
+                directory = pending.pop()
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if entry.is_dir():
+                                pending.append(entry.path)
+                                continue
+                            name = entry.name
+                            ext = name[name.rfind('.'):].lower()
+                            rel = os.path.relpath(entry.path, root)
+                            if table is self._images and ext in IMAGE_EXTENSIONS:
+                                table[rel] = entry.path
+                            elif table is self._labels and ext == '.txt':
+                                table[rel[:-4]] = entry.path
+                except OSError:
+                    continue  # Not created yet
+        self.logger.info(f"Indexed {len(self._images)} processed images, {len(self._labels)} labels")
+        return len(self._images)
+
+    def _rel(self, image_path: str) -> str:
+        """Key of an image given its original or its processed path"""
+        images_dir = os.path.join(self.processed_dir, 'images') + os.sep
+        if image_path.startswith(images_dir):
+            return image_path[len(images_dir):]
+        return FileUtils.relative_image_path(image_path, self.image_dir)
+
+    def origin(self, image_path: str) -> str:
+        """Path in image_dir a processed image was moved from (image_path if not processed)"""
+        images_dir = os.path.join(self.processed_dir, 'images') + os.sep
+        if self.image_dir and image_path.startswith(images_dir):
+            return os.path.join(self.image_dir, image_path[len(images_dir):])
+        return image_path
+
+    def add(self, image_path: str, with_label: bool = True):
+        """Record that image_path (and its sidecar label) moved to the processed directory"""
+        image_target, label_target = FileUtils.processed_paths(image_path, self.processed_dir,
+                                                               self.image_dir)
+        rel = self._rel(image_path)
+        self._images[rel] = image_target
+        if with_label:
+            self._labels[os.path.splitext(rel)[0]] = label_target
+
+    def discard(self, image_path: str):
+        """Forget image_path (e.g. its move failed)"""
+        rel = self._rel(image_path)
+        self._images.pop(rel, None)
+        self._labels.pop(os.path.splitext(rel)[0], None)
+
+    def resolve(self, image_path: str) -> Optional[str]:
+        """Processed location of image_path, or None if it was not moved"""
+        return self._images.get(self._rel(image_path))
+
+    def label_for(self, image_path: str) -> Optional[str]:
+        """Processed label of image_path, or None"""
+        return self._labels.get(os.path.splitext(self._rel(image_path))[0])
+
+    def fix_paths(self, image_files: List[str]) -> int:
+        """Point stale entries of image_files at their processed location, in place
+
+        An entry is stale when it is indexed and the file is gone from its
+        original directory. Only directories holding such candidates are
+        listed (once each), so the pass costs no per-image stat calls.
+        """
+        if not self._images:
+            return 0
+        listings: Dict[str, Set[str]] = {}
+        fixed = 0
+        for i, path in enumerate(image_files):
+            processed = self._images.get(self._rel(path))
+            if processed is None or processed == path:
+                continue
+            parent, name = os.path.split(path)
+            names = listings.get(parent)
+            if names is None:
+                try:
+                    names = listings[parent] = set(os.listdir(parent))
+                except OSError:
+                    names = listings[parent] = set()
+            if name not in names:
+                image_files[i] = processed
+                fixed += 1
+        return fixed
+
+    def __contains__(self, image_path: str) -> bool:
+        return self._rel(image_path) in self._images
+
+    def __len__(self) -> int:
+        return len(self._images)
@@ -0,0 +1,130 @@
+# core/processed_log.py
+"""
+Append-only record of processed images, used instead of moving the files
+"""
+
+import os
+import logging
+import threading
+from typing import List, Set
+
+from utils.file_utils import FileUtils
+from .manifest import DatasetManifest
+
+
+class ProcessedLog:
+    """Tracks which images of a dataset are done without touching the images.
+
+    Each mark appends one "+relpath" (or "-relpath" to undo) line, so marking
+    an image is O(1) and writes only to the state file, never to the dataset.
+    Paths are relative to image_dir, which keeps entries valid when the
+    manifest is rebuilt or images are added. The log is compacted on load
+    once superseded lines outnumber live ones.
+    """
+
+    COMPACT_MIN_LINES = 1024
+
+    def __init__(self, image_dir: str, state_dir: str = ".manifests"):
+        """
+        Args:
+            image_dir: Dataset root the recorded paths are relative to
+            state_dir: Directory holding the log (outside the dataset)
+        """
+        self.image_dir = image_dir
+        self.path = os.path.splitext(DatasetManifest.path_for(image_dir, state_dir))[0] + ".processed.log"
+        self.logger = logging.getLogger("ProcessedLog")
+        self._done: Set[str] = set()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _rel(self, image_path: str) -> str:
+        return os.path.relpath(image_path, self.image_dir)
+
+    def load(self) -> int:
+        """Read the log; returns the number of processed images"""
+        lines = 0
+        done: Set[str] = set()
+        try:
+            with open(self.path, 'r+b') as f:
+                data = f.read()
+                end = data.rfind(b"\n") + 1
+                if end < len(data):
+                    # Torn last line from a crash mid-append; cut it so the next append starts clean
+                    self.logger.warning(f"Dropped a partial line at the end of {self.path}")
+                    f.truncate(end)
+            for line in data[:end].decode('utf-8', errors='replace').split("\n")[:-1]:
+                lines += 1
+                if line[:1] == '+':
+                    done.add(line[1:])
+                elif line[:1] == '-':
+                    done.discard(line[1:])
+        except FileNotFoundError:
+            pass
+        except OSError:
+            self.logger.warning(f"Cannot read processed log {self.path}", exc_info=True)
+        with self._lock:
+            self._done = done
+        if lines > max(2 * len(done), self.COMPACT_MIN_LINES):
+            self.compact()
+        return len(done)
+
+    def mark(self, image_path: str, processed: bool = True):
+        """Record image_path as processed (or not); a no-op if already so"""
+        rel = self._rel(image_path)
+        with self._lock:
+            if (rel in self._done) == processed:
+                return
+            if processed:
+                self._done.add(rel)
+            else:
+                self._done.discard(rel)
+            self._append(("+" if processed else "-") + rel + "\n")
+
+    def forget(self, image_paths: List[str]):
+        """Drop entries whose images no longer exist at their recorded path"""
+        with self._lock:
+            for path in image_paths:
+                rel = self._rel(path)
+                if rel in self._done:
+                    self._done.discard(rel)
+                    self._append("-" + rel + "\n")
+
+    def _append(self, line: str):
+        """Write one line; called with _lock held"""
+        try:
+            if self._file is None:
+                FileUtils.ensure_directory(os.path.dirname(self.path) or ".")
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+        except OSError:
+            self.logger.error(f"Cannot write processed log {self.path}", exc_info=True)
+
+    def compact(self):
+        """Rewrite the log with one line per processed image"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            text = "".join(f"+{rel}\n" for rel in sorted(self._done))
+            try:
+                FileUtils.atomic_write_text(self.path, text)
+            except OSError:
+                self.logger.warning(f"Cannot compact processed log {self.path}", exc_info=True)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def is_processed(self, image_path: str) -> bool:
+        return self._rel(image_path) in self._done
+
+    def processed_paths(self) -> List[str]:
+        """Absolute paths of all processed images"""
+        with self._lock:
+            return [os.path.join(self.image_dir, rel) for rel in sorted(self._done)]
+
+    def __len__(self) -> int:
+        return len(self._done)
@@ -3,36 +3,96 @@
 # High-performance rendering engine with real-time updates
 # """
 
+import math
 import time
+import hashlib
 from typing import Optional, Tuple, Dict, List, Deque
 from collections import deque
 import tkinter as tk
-from PIL import Image, ImageTk
 import cv2
+import numpy as np
 import logging
 
 from config.config_manager import load_config
+from .image_pyramid import ImagePyramid
 
 CONFIG = load_config()
 
+INTERPOLATION_FLAGS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "bilinear": cv2.INTER_LINEAR,
+    "cubic": cv2.INTER_CUBIC,
+    "lanczos": cv2.INTER_LANCZOS4,
+    "area": cv2.INTER_AREA
+}
+
 class HighPerformanceRenderer:
     """High-performance rendering engine with real-time updates"""
     
     def __init__(self, app):
         self.app = app
-        self._last_render_time = 0
+        self._last_render_time = 0.0
         self._render_pending = False
         self._dirty = True
+        
+        # Frame scheduler: frames are paced to max_fps / render_throttle_ms and
+        # never closer together than the measured cost of the previous frame
+        perf = CONFIG["performance"]
+        self.frame_interval_ms = max(CONFIG["drawing"]["min_redraw_interval"],
+                                     perf["render_throttle_ms"],
+                                     1000.0 / max(1, perf["max_fps"]))
+        self._frame_costs: Deque[float] = deque(maxlen=30)
+        self._last_frame_cost = 0.0
+        
+        # Adaptive quality: 'draft' while zooming/panning, 'final' once input is idle
+        self.adaptive_quality = perf["adaptive_quality"]
+        self.refine_delay_ms = perf["refine_delay_ms"]
+        self.draft_level_bias = perf["draft_level_bias"]
+        self._quality = 'final'
+        self._last_input_time = 0.0
+        self._refine_job = None
         self._temp_box: Optional[Tuple] = None
         
-        # Canvas items for better performance
-        self.canvas_items: Dict[str, List] = {
-            'image': None,
-            'boxes': [],
-            'labels': [],
-            'handles': [],
-            'temp_box': None
-        }
+        # Persistent canvas items, updated in place with coords/itemconfig
+        self._box_items: Dict[int, Dict] = {}  # id(box) -> item ids and last drawn state
+        self._selection_items: Dict[str, object] = {'outline': None, 'handles': []}
+        self._raised_selection: Optional[int] = None
+        self._selection_visible = False
+        self._temp_item: Optional[int] = None
+        self._hover_box: Optional[Dict] = None
+        self._handles_visible = False
+        
+        # Viewport culling and level of detail for box overlays
+        self.selective_rendering = CONFIG["performance"]["enable_selective_rendering"]
+        self.smart_rendering = CONFIG["behavior"]["smart_rendering"]
+        self.lod_label_min_px = CONFIG["performance"]["lod_label_min_px"]
+        self.lod_tiny_box_px = CONFIG["performance"]["lod_tiny_box_px"]
+        self._cull_rect: Optional[Tuple[float, float, float, float]] = None
+        
+        # Raster overlay backend for images with thousands of boxes
+        self.double_buffering = CONFIG["performance"]["enable_double_buffering"]
+        self.raster_overlay_threshold = CONFIG["performance"]["raster_overlay_threshold"]
+        self._raster_mode = False
+        self._overlay_version = 0
+        self._overlay_signature: Optional[Tuple] = None
+        self._tile_selection = -1  # Selected box the on-canvas tiles leave out
+        self._hover_key: Optional[int] = None
+        
+        self.pyramid = ImagePyramid(app.image_cache, CONFIG["performance"]["pyramid_levels"])
+        
+        # Tiled image display: key -> (canvas item, PhotoImage) for tiles on canvas
+        self.tile_size = CONFIG["performance"]["tile_size"]
+        self.tile_margin = CONFIG["performance"]["tile_margin"]
+        self.tile_cache_size = CONFIG["performance"]["tile_cache_size"]
+        self._tile_items: Dict[Tuple, Tuple[int, object, str]] = {}  # slot -> (item, photo, quality)
+        self._ppm_buffers: Dict[Tuple[int, int], Tuple[bytearray, np.ndarray]] = {}
+        # Final-quality filters: magnification keeps crisp pixels by default,
+        # minification averages (area) or uses a windowed sinc (lanczos)
+        self.interpolation = INTERPOLATION_FLAGS.get(
+            CONFIG["drawing"]["resize_interpolation"], cv2.INTER_NEAREST)
+        self.refine_interpolation = INTERPOLATION_FLAGS.get(
+            perf["refine_interpolation"], cv2.INTER_AREA)
         
         self.logger = logging.getLogger("Renderer")
     
@@ -52,12 +112,14 @@ class HighPerformanceRenderer:
         self.request_render()
     
     def request_render(self):
-        """Request a render with throttling"""
+        """Request a render, paced by the frame budget"""
         if self._render_pending:
             return
             
-        current_time = time.time() * 1000
-        min_interval = CONFIG["drawing"]["min_redraw_interval"]
+        current_time = time.perf_counter() * 1000
+        # A frame that overran its budget gets the same time again for input
+        # handling, so slow frames cannot starve the event loop
+        min_interval = max(self.frame_interval_ms, self._last_frame_cost)
         
         if current_time - self._last_render_time >= min_interval:
             self._perform_render()
@@ -66,25 +128,97 @@ class HighPerformanceRenderer:
             self.app.root.after(delay, self._perform_render)
             self._render_pending = True
 
+    def note_interaction(self):
+        """Switch to draft quality for a zoom/pan step and schedule the refine pass"""
+        if not self.adaptive_quality:
+            return
+        self._last_input_time = time.perf_counter() * 1000
+        self._quality = 'draft'
+        if self._refine_job is None:
+            self._refine_job = self.app.root.after(self.refine_delay_ms, self._refine_when_idle)
+
+    def _refine_when_idle(self):
+        """Re-render at final quality once input has been idle for refine_delay_ms"""
+        idle_ms = time.perf_counter() * 1000 - self._last_input_time
+        if idle_ms < self.refine_delay_ms:
+            # Input arrived since the timer was set; wait out the remainder
+            delay = max(1, int(self.refine_delay_ms - idle_ms))
+            self._refine_job = self.app.root.after(delay, self._refine_when_idle)
+            return
+        self._refine_job = None
+        self._quality = 'final'
+        self._dirty = True
+        self.request_render()
+        if CONFIG["drawing"]["show_fps_overlay"]:
+            self.app.update_status_label()
+
+    def frame_stats(self) -> Dict[str, float]:
+        """Average and worst cost of recent frames in milliseconds"""
+        costs = self._frame_costs
+        if not costs:
+            return {'frame_ms': 0.0, 'max_frame_ms': 0.0, 'budget_ms': self.frame_interval_ms}
+        return {
+            'frame_ms': sum(costs) / len(costs),
+            'max_frame_ms': max(costs),
+            'budget_ms': self.frame_interval_ms
+        }
+
+    def pan(self, dx: float, dy: float):
+        """Pan fast path: shift existing canvas items instead of redrawing.
+        
+        Offsets must already be updated by the caller. Tiles are only added or
+        dropped when the viewport crosses a tile boundary.
+        """
+        if self._dirty or self.app.original_image is None:
+            # A full render is pending and will use the new offsets anyway
+            self.request_render()
+            return
+        
+        self.canvas.move("all", dx, dy)
+        
+        disp_w, disp_h = self._display_geometry()
+        visible = set(self._tile_keys(disp_w, disp_h))
+        if visible != self._tile_items.keys():
+            self._render_tiles()
+            if self.selective_rendering:
+                self._render_all_boxes()
+
+    def rekey_tiles(self, moves: Dict[str, str]):
+        """Carry cached and on-canvas tiles over to the new paths of moved images"""
+        def moved(key: Tuple) -> Tuple:
+            new = moves.get(key[0])
+            return key if new is None else (new,) + key[1:]
+        
+        tile_cache = self.app.zoom_cache
+        if any(key[0] in moves for key in tile_cache):
+            entries = [(moved(key), photo) for key, photo in tile_cache.items()]
+            tile_cache.clear()
+            tile_cache.update(entries)
+        self._tile_items = {moved(key): value for key, value in self._tile_items.items()}
+
     def set_temp_box(self, box_coords: Tuple):
         """Set temporary box for real-time drawing preview"""
         self._temp_box = box_coords
-        self._render_boxes_only()
+        self._sync_temp_box()
     
     def clear_temp_box(self):
         """Clear temporary box"""
         self._temp_box = None
-        self._render_boxes_only()
+        self._sync_temp_box()
 
     def _perform_render(self):
         """Perform the actual rendering"""
         self._render_pending = False
-        self._last_render_time = time.time() * 1000
+        start = time.perf_counter()
+        self._last_render_time = start * 1000
         
         if self._dirty:
             self._render_full()
         else:
             self._render_boxes_only()
+        
+        self._last_frame_cost = (time.perf_counter() - start) * 1000
+        self._frame_costs.append(self._last_frame_cost)
     
     def _render_full(self):
         """Perform full render with image and boxes"""
@@ -92,37 +226,9 @@ class HighPerformanceRenderer:
             return
             
         try:
-            # Clear canvas
-            self.canvas.delete("all")
-            self.canvas_items = {k: [] for k in self.canvas_items.keys()}
-            self.canvas_items['image'] = None
-            
-            # Render base image
-            cache_key = f"{self.app.image_name}_{self.app.zoom_scale:.2f}"
-            if cache_key in self.app.zoom_cache:
-                self.app.tk_image = self.app.zoom_cache[cache_key]
-            else:
-                img_rgb = cv2.cvtColor(self.app.original_image, cv2.COLOR_BGR2RGB)
-                pil_img = Image.fromarray(img_rgb)
-                
-                if self.app.zoom_scale != 1.0:
-                    new_w = int(pil_img.width * self.app.zoom_scale)
-                    new_h = int(pil_img.height * self.app.zoom_scale)
-                    pil_img = pil_img.resize((new_w, new_h), Image.NEAREST)
-                
-                self.app.display_image = pil_img
-                self.app.tk_image = ImageTk.PhotoImage(image=pil_img)
-                
-                if CONFIG["drawing"]["cache_zoom_levels"]:
-                    self.app.zoom_cache[cache_key] = self.app.tk_image
-                    if len(self.app.zoom_cache) > 10:
-                        self.app.zoom_cache.pop(next(iter(self.app.zoom_cache)))
-            
-            # Create image on canvas
-            self.canvas_items['image'] = self.canvas.create_image(
-                self.app.image_offset_x, self.app.image_offset_y, 
-                anchor=tk.NW, image=self.app.tk_image
-            )
+            # Render only the tiles covering the visible region
+            self._update_raster_mode()
+            self._render_tiles()
             
             # Render all boxes
             self._render_all_boxes()
@@ -133,24 +239,338 @@ class HighPerformanceRenderer:
         except Exception as e:
             self.logger.error("Error in full render", exc_info=True)
     
+    def _display_geometry(self) -> Tuple[int, int]:
+        """Return (display width, display height) for the current zoom"""
+        full_h, full_w = self.app.original_image.shape[:2]
+        zoom = self.app.zoom_scale
+        return max(1, int(full_w * zoom)), max(1, int(full_h * zoom))
+
+    def _source_level(self, quality: str) -> int:
+        """Pyramid level tiles are sampled from at the given quality"""
+        zoom = self.app.zoom_scale
+        if quality == 'draft':
+            level = self.pyramid.level_for_zoom(zoom) + self.draft_level_bias
+            return min(level, self.pyramid.max_levels)
+        # Area averaging needs a source at or above display resolution
+        return self.pyramid.level_for_zoom(zoom, finer=self.refine_interpolation == cv2.INTER_AREA)
+
+    def _visible_tiles(self, disp_w: int, disp_h: int) -> List[Tuple[int, int]]:
+        """Tile coordinates intersecting the canvas viewport plus margin"""
+        tile = self.tile_size
+        margin = self.tile_margin
+        view_w = max(1, self.canvas.winfo_width())
+        view_h = max(1, self.canvas.winfo_height())
+        
+        # Viewport in display-image pixels
+        x0 = max(0, int(-self.app.image_offset_x) - margin)
+        y0 = max(0, int(-self.app.image_offset_y) - margin)
+        x1 = min(disp_w, int(view_w - self.app.image_offset_x) + margin)
+        y1 = min(disp_h, int(view_h - self.app.image_offset_y) + margin)
+        if x1 <= x0 or y1 <= y0:
+            return []
+        
+        return [(tx, ty)
+                for ty in range(y0 // tile, (y1 - 1) // tile + 1)
+                for tx in range(x0 // tile, (x1 - 1) // tile + 1)]
+
+    def _tile_keys(self, disp_w: int, disp_h: int) -> List[Tuple]:
+        """Slot keys (image, zoom, tile x, tile y, overlay) of visible tiles"""
+        zoom_key = round(self.app.zoom_scale, 4)
+        tiles = self._visible_tiles(disp_w, disp_h)
+        if not self._raster_mode:
+            return [(self.app.image_path, zoom_key, tx, ty, None) for tx, ty in tiles]
+        
+        # Rasters leave out the selected box, so only tiles it touches depend on
+        # the selection; a selection change rebuilds just those (and the old ones)
+        version = self._overlay_version
+        selected_idx = self._tile_selection = self.app.selected_box_idx
+        tx0, ty0, tx1, ty1 = self._box_tile_range(selected_idx)
+        return [(self.app.image_path, zoom_key, tx, ty,
+                 (version, selected_idx if tx0 <= tx <= tx1 and ty0 <= ty <= ty1 else -1))
+                for tx, ty in tiles]
+
+    def _box_tile_range(self, index: int) -> Tuple[int, int, int, int]:
+        """Tile range (tx0, ty0, tx1, ty1) whose overlay may draw box index"""
+        if not 0 <= index < len(self.app.boxes):
+            return 0, 0, -1, -1
+        zoom = self.app.zoom_scale
+        tile = self.tile_size
+        x_min, y_min, x_max, y_max = self.app.boxes[index].coords()
+        # Same reach as the _draw_overlay query: tiles up to a label height
+        # above the box pick it up, plus a pixel of rounding
+        return (int(x_min * zoom - 1) // tile, int(y_min * zoom - 25) // tile,
+                int(x_max * zoom + 1) // tile, int(y_max * zoom + 1) // tile)
+
+    def _render_tiles(self):
+        """Create canvas items for visible tiles, reusing cached PhotoImages"""
+        disp_w, disp_h = self._display_geometry()
+        visible = self._tile_keys(disp_w, disp_h)
+        quality = self._quality
+        
+        # Drop tiles that scrolled out of the viewport margin
+        wanted = set(visible)
+        for key in [k for k in self._tile_items if k not in wanted]:
+            self.canvas.delete(self._tile_items.pop(key)[0])
+        
+        for key in visible:
+            current = self._tile_items.get(key)
+            if current is not None:
+                # Final tiles are kept during interaction; draft tiles are
+                # replaced by the refine pass
+                if current[2] == quality or current[2] == 'final':
+                    continue
+                self.canvas.delete(current[0])
+            tx, ty = key[2], key[3]
+            photo = self._get_tile(key, quality, disp_w, disp_h)
+            item = self.canvas.create_image(
+                self.app.image_offset_x + tx * self.tile_size,
+                self.app.image_offset_y + ty * self.tile_size,
+                anchor=tk.NW, image=photo, tags="tile"
+            )
+            # Keep a reference while the tile is on canvas, even if evicted from cache
+            self._tile_items[key] = (item, photo, quality)
+        
+        self.canvas.tag_lower("tile")
+        
+        # Boxes are culled to the same tile-aligned region, so a pan only has
+        # to re-sync boxes when the tile set changes
+        if visible:
+            zoom = self.app.zoom_scale
+            tx0 = min(k[2] for k in visible) * self.tile_size
+            ty0 = min(k[3] for k in visible) * self.tile_size
+            tx1 = (max(k[2] for k in visible) + 1) * self.tile_size
+            ty1 = (max(k[3] for k in visible) + 1) * self.tile_size
+            self._cull_rect = (tx0 / zoom, ty0 / zoom, tx1 / zoom, ty1 / zoom)
+        else:
+            self._cull_rect = (0, 0, -1, -1)
+
+    def _get_tile(self, key: Tuple, quality: str, disp_w: int, disp_h: int):
+        """Return the PhotoImage for a tile, building it from the pyramid if needed"""
+        tile_cache = self.app.zoom_cache
+        cache_key = key + (quality,)
+        photo = tile_cache.get(cache_key)
+        if photo is not None:
+            tile_cache.move_to_end(cache_key)
+            return photo
+        
+        _, _, tx, ty, overlay = key
+        source = self.pyramid.get_level(self.app.image_path, self.app.original_image,
+                                        self._source_level(quality))
+        src_h, src_w = source.shape[:2]
+        
+        x0, y0 = tx * self.tile_size, ty * self.tile_size
+        x1, y1 = min(disp_w, x0 + self.tile_size), min(disp_h, y0 + self.tile_size)
+        buffer, pixels = self._ppm_buffer(x1 - x0, y1 - y0)
+        
+        kx, ky = src_w / disp_w, src_h / disp_h
+        if quality == 'draft':
+            interpolation = cv2.INTER_NEAREST
+        elif kx > 1 or ky > 1:
+            interpolation = self.refine_interpolation
+        else:
+            interpolation = self.interpolation
+        
+        if kx == 1 and ky == 1:
+            # 1:1 - no sampling needed; the BGR->RGB swap writes straight into the payload
+            cv2.cvtColor(source[y0:y1, x0:x1], cv2.COLOR_BGR2RGB, dst=pixels)
+        elif interpolation == cv2.INTER_AREA:
+            # warpAffine has no area filter; resize the covering source window
+            # instead (tile edges snap to whole source pixels, under 1 display pixel)
+            sx0, sy0 = int(x0 * kx), int(y0 * ky)
+            sx1 = min(src_w, max(sx0 + 1, int(math.ceil(x1 * kx))))
+            sy1 = min(src_h, max(sy0 + 1, int(math.ceil(y1 * ky))))
+            cv2.resize(source[sy0:sy1, sx0:sx1], (x1 - x0, y1 - y0), dst=pixels,
+                       interpolation=cv2.INTER_AREA)
+            # Levels keep the image's BGR order; swap in place, per tile
+            cv2.cvtColor(pixels, cv2.COLOR_BGR2RGB, dst=pixels)
+        else:
+            # Sample straight from the pyramid level into the PPM payload. The
+            # mapping is global (not per-crop), so neighbouring tiles line up without seams.
+            transform = np.float32([[kx, 0, (x0 + 0.5) * kx - 0.5],
+                                    [0, ky, (y0 + 0.5) * ky - 0.5]])
+            cv2.warpAffine(source, transform, (x1 - x0, y1 - y0), dst=pixels,
+                           flags=interpolation | cv2.WARP_INVERSE_MAP,
+                           borderMode=cv2.BORDER_REPLICATE)
+            cv2.cvtColor(pixels, cv2.COLOR_BGR2RGB, dst=pixels)
+        if overlay is not None:
+            self._draw_overlay(pixels, x0, y0, x1, y1)
+        
+        # Tk only takes image data as bytes (a bytearray or memoryview would be
+        # passed as its repr), so this one copy stays; Tk copies it again, which
+        # lets the buffer be reused for the next tile
+        photo = tk.PhotoImage(width=x1 - x0, height=y1 - y0, data=bytes(buffer), format="PPM")
+        
+        # Draft tiles are only seen for a moment; keep them out of the cache
+        if CONFIG["drawing"]["cache_zoom_levels"] and quality == 'final':
+            tile_cache[cache_key] = photo
+            while len(tile_cache) > self.tile_cache_size:
+                tile_cache.popitem(last=False)
+        return photo
+
+    def _ppm_buffer(self, width: int, height: int) -> Tuple[bytearray, np.ndarray]:
+        """Preallocated binary PPM (header + RGB payload) and a writable pixel view"""
+        cached = self._ppm_buffers.get((width, height))
+        if cached is None:
+            header = f"P6 {width} {height} 255\n".encode("ascii")
+            buffer = bytearray(len(header) + width * height * 3)
+            buffer[:len(header)] = header
+            pixels = np.frombuffer(buffer, dtype=np.uint8, offset=len(header)).reshape(height, width, 3)
+            cached = self._ppm_buffers[(width, height)] = (buffer, pixels)
+        return cached
+
+    def _update_raster_mode(self):
+        """Switch to the raster overlay backend above the box-count threshold"""
+        boxes = self.app.boxes
+        self._raster_mode = (self.double_buffering and
+                             len(boxes) > self.raster_overlay_threshold)
+        if not self._raster_mode:
+            return
+        # Rasterized tiles go stale when box geometry or classes change; the
+        # selected and hovered boxes are canvas items on top
+        digest = hashlib.blake2b(boxes.coords.tobytes(), digest_size=16)
+        digest.update(boxes.class_ids.tobytes())
+        signature = (digest.digest(), tuple(self.class_names), self.app.box_line_width)
+        if signature != self._overlay_signature:
+            self._overlay_signature = signature
+            self._overlay_version += 1
+
+    def _draw_overlay(self, tile: np.ndarray, x0: int, y0: int, x1: int, y1: int):
+        """Draw non-selected boxes and labels into a tile (display pixels x0..x1, y0..y1)"""
+        zoom = self.app.zoom_scale
+        boxes = self.app.boxes
+        selected_idx = self.app.selected_box_idx
+        label_margin = 24 / zoom
+        indices = [i for i in self.app.box_index.query_rect(
+                       x0 / zoom, y0 / zoom, x1 / zoom, y1 / zoom + label_margin)
+                   if i != selected_idx]
+        if not indices:
+            return
+        
+        coords = (boxes.coords[indices] * zoom).astype(np.int32) - np.array([x0, y0, x0, y0], dtype=np.int32)
+        class_ids = boxes.class_ids[indices]
+        
+        # One polylines call per class colour
+        corners = coords[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+        for class_id in np.unique(class_ids):
+            if not (0 <= class_id < len(self.class_names)):
+                continue
+            r, g, b = self.app.get_class_color(int(class_id))
+            mask = class_ids == class_id
+            cv2.polylines(tile, list(corners[mask]), True, (r, g, b), self.app.box_line_width)
+        
+        # Labels only for boxes large enough to carry them
+        if self._quality == 'draft':
+            labelled = ()
+        elif self.smart_rendering:
+            sizes = np.minimum(coords[:, 2] - coords[:, 0], coords[:, 3] - coords[:, 1])
+            labelled = np.nonzero(sizes >= self.lod_label_min_px)[0]
+        else:
+            labelled = range(len(indices))
+        for j in labelled:
+            class_id = int(class_ids[j])
+            if not (0 <= class_id < len(self.class_names)):
+                continue
+            bx, by = int(coords[j, 0]), int(coords[j, 1])
+            text = self.class_names[class_id]
+            r, g, b = self.app.get_class_color(class_id)
+            cv2.rectangle(tile, (bx, by - 20), (bx + len(text) * 8 + 10, by), (r, g, b), cv2.FILLED)
+            cv2.putText(tile, text, (bx + 5, by - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.45,
+                        (0, 0, 0), 1, cv2.LINE_AA)
+
     def _render_all_boxes(self):
-        """Render all boxes as canvas items for better performance"""
-        # Clear existing box items
-        for item in self.canvas_items['boxes'] + self.canvas_items['labels'] + self.canvas_items['handles']:
-            if item:
-                self.canvas.delete(item)
+        """Diff boxes against their canvas items and touch only what changed"""
+        boxes = self.app.boxes
+        selected_idx = self.app.selected_box_idx
+        selected = boxes[selected_idx] if 0 <= selected_idx < len(boxes) else None
         
-        self.canvas_items['boxes'] = []
-        self.canvas_items['labels'] = []
-        self.canvas_items['handles'] = []
+        if self._raster_mode:
+            # Everything but the selected box is baked into the tiles; the
+            # selected and hovered boxes get canvas items on top
+            if selected_idx != self._tile_selection:
+                self._render_tiles()
+            hover_idx = self.app.hover_box_idx
+            hovered = boxes[hover_idx] if 0 <= hover_idx < len(boxes) else None
+            boxes = [box for box in (selected, hovered) if box is not None]
+            if len(boxes) == 2 and boxes[0] is boxes[1]:
+                boxes.pop()
+        elif self.selective_rendering and self._cull_rect is not None:
+            # Only boxes intersecting the rendered region (labels sit above the box)
+            x1, y1, x2, y2 = self._cull_rect
+            label_margin = 24 / self.app.zoom_scale
+            indices = self.app.box_index.query_rect(x1, y1, x2, y2 + label_margin)
+            if 0 <= selected_idx < len(boxes) and selected_idx not in indices:
+                indices.append(selected_idx)
+            boxes = [boxes[i] for i in indices]
         
-        # Render permanent boxes
-        for idx, box in enumerate(self.app.boxes):
-            self._render_single_box(box, idx == self.app.selected_box_idx)
+        seen = set()
+        for box in boxes:
+            key = id(box)
+            seen.add(key)
+            if key not in self._box_items:
+                # New items are stacked on top; lift the selection again
+                self._raised_selection = None
+            self._sync_box(box, box is selected)
         
-        # Render temporary box if exists
-        if self._temp_box:
-            self._render_temp_box()
+        # Delete items of boxes that no longer exist or left the viewport
+        for key in [k for k in self._box_items if k not in seen]:
+            self._delete_box_items(key)
+        
+        self._sync_selection(selected)
+        self._sync_temp_box()
+    
+    def refresh_box(self, box: Dict):
+        """Update the items of a single box (e.g. during a resize drag)"""
+        if self._dirty or self.app.original_image is None:
+            self.request_render()
+            return
+        boxes = self.app.boxes
+        selected_idx = self.app.selected_box_idx
+        selected = boxes[selected_idx] if 0 <= selected_idx < len(boxes) else None
+        self._sync_box(box, box is selected)
+        if box is selected:
+            self._sync_selection(selected)
+    
+    def set_hover(self, box: Optional[Dict]):
+        """Highlight the hovered box by thickening its outline"""
+        previous = self._hover_box
+        if previous is box:
+            return
+        self._hover_box = box
+        self._hover_key = id(box) if box is not None else None
+        if self.app.original_image is None:
+            return
+        boxes = self.app.boxes
+        selected_idx = self.app.selected_box_idx
+        selected = boxes[selected_idx] if 0 <= selected_idx < len(boxes) else None
+        for candidate in (previous, box):
+            if candidate is None:
+                continue
+            if self._raster_mode and candidate is not selected:
+                # The tiles already show it; only the hovered box gets canvas items
+                if candidate is box:
+                    if id(candidate) not in self._box_items:
+                        self._raised_selection = None
+                    self._sync_box(candidate, False)
+                elif id(candidate) in self._box_items:
+                    self._delete_box_items(id(candidate))
+            elif id(candidate) in self._box_items:
+                self._sync_box(candidate, candidate is selected)
+        if self._raster_mode and self._raised_selection is None:
+            self._sync_selection(selected)
+    
+    def reset_box_items(self):
+        """Forget all box items so the next render recreates them"""
+        for key in list(self._box_items):
+            self._delete_box_items(key)
+        for item in [self._selection_items['outline']] + self._selection_items['handles']:
+            if item:
+                self.canvas.delete(item)
+        self._selection_items = {'outline': None, 'handles': []}
+        self._selection_visible = self._handles_visible = False
+        self._raised_selection = None
+        if self._temp_item:
+            self.canvas.delete(self._temp_item)
+            self._temp_item = None
     
     def _render_boxes_only(self):
         """Render only boxes (much faster than full render)"""
@@ -159,84 +579,188 @@ class HighPerformanceRenderer:
             
         self._render_all_boxes()
     
-    def _render_single_box(self, box: Dict, is_selected: bool = False):
-        """Render a single box as canvas items"""
-        if 'class_id' not in box or box['class_id'] is None:
+    def _box_canvas_coords(self, box: Dict) -> Tuple[int, int, int, int]:
+        """Canvas coordinates of a box at the current zoom and offset"""
+        zoom = self.app.zoom_scale
+        off_x, off_y = self.app.image_offset_x, self.app.image_offset_y
+        x_min, y_min, x_max, y_max = box.coords()
+        return (int(x_min * zoom + off_x), int(y_min * zoom + off_y),
+                int(x_max * zoom + off_x), int(y_max * zoom + off_y))
+    
+    def _label_text(self, class_id: int) -> str:
+        """Display text for a class label"""
+        class_name = self.class_names[class_id]
+        if CONFIG["classes"]["rtl_naive_reverse"] and self.app.contains_persian(class_name) and len(class_name) > 1:
+            class_name = class_name[::-1]
+        return class_name
+    
+    def _level_of_detail(self, coords: Tuple[int, int, int, int]) -> str:
+        """'full', 'nolabel' (no label/handles) or 'tiny' (thin outline only)"""
+        draft = self._quality == 'draft'
+        if not self.smart_rendering:
+            return 'nolabel' if draft else 'full'
+        x1, y1, x2, y2 = coords
+        w, h = x2 - x1, y2 - y1
+        if max(w, h) < self.lod_tiny_box_px:
+            return 'tiny'
+        if draft or min(w, h) < self.lod_label_min_px:
+            return 'nolabel'
+        return 'full'
+    
+    def _sync_box(self, box: Dict, is_selected: bool):
+        """Create or update the rectangle and label items for one box"""
+        key = id(box)
+        class_id = box.get('class_id')
+        if class_id is None or not (0 <= class_id < len(self.class_names)):
+            if key in self._box_items:
+                self._delete_box_items(key)
             return
-            
-        if not (0 <= box['class_id'] < len(self.class_names)):
+        
+        coords = self._box_canvas_coords(box)
+        x1, y1, x2, y2 = coords
+        lod = self._level_of_detail(coords)
+        if is_selected:
+            width = self.app.selected_box_line_width
+        elif lod == 'tiny':
+            width = 1
+        elif key == self._hover_key:
+            width = self.app.box_line_width + 2
+        else:
+            width = self.app.box_line_width
+        entry = self._box_items.get(key)
+        
+        if entry is None:
+            color = self.app.get_class_color(class_id)
+            hex_color = f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
+            entry = {
+                'rect': self.canvas.create_rectangle(
+                    x1, y1, x2, y2, outline=hex_color, width=width, tags="box"),
+                'label_bg': None, 'label_text': None,
+                'coords': coords, 'class_id': class_id, 'width': width
+            }
+            if lod == 'full':
+                self._create_label(entry, class_id, x1, y1, hex_color)
+            self._box_items[key] = entry
             return
         
-        # Calculate canvas coordinates
-        x1 = int(box['x_min'] * self.app.zoom_scale + self.app.image_offset_x)
-        y1 = int(box['y_min'] * self.app.zoom_scale + self.app.image_offset_y)
-        x2 = int(box['x_max'] * self.app.zoom_scale + self.app.image_offset_x)
-        y2 = int(box['y_max'] * self.app.zoom_scale + self.app.image_offset_y)
+        if entry['class_id'] != class_id:
+            color = self.app.get_class_color(class_id)
+            hex_color = f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
+            self.canvas.itemconfig(entry['rect'], outline=hex_color)
+            if entry['label_bg'] is not None:
+                self.canvas.itemconfig(entry['label_bg'], fill=hex_color, outline=hex_color)
+                self.canvas.itemconfig(entry['label_text'], text=self._label_text(class_id))
+            entry['class_id'] = class_id
+            entry['coords'] = None  # label width may have changed
         
-        color = self.app.get_class_color(box['class_id'])
-        hex_color = f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
+        if entry['width'] != width:
+            self.canvas.itemconfig(entry['rect'], width=width)
+            entry['width'] = width
         
-        # Draw box
-        box_item = self.canvas.create_rectangle(
-            x1, y1, x2, y2,
-            outline=hex_color,
-            width=self.app.selected_box_line_width if is_selected else self.app.box_line_width,
-            tags="box"
-        )
-        self.canvas_items['boxes'].append(box_item)
+        has_label = entry['label_bg'] is not None
+        if lod == 'full' and not has_label:
+            color = self.app.get_class_color(class_id)
+            self._create_label(entry, class_id, x1, y1, f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}")
+            if is_selected:
+                self._raised_selection = None
+        elif lod != 'full' and has_label:
+            self.canvas.delete(entry['label_bg'], entry['label_text'])
+            entry['label_bg'] = entry['label_text'] = None
+            has_label = False
         
-        # Draw selection outline
-        if is_selected:
-            outline_item = self.canvas.create_rectangle(
+        if entry['coords'] != coords:
+            self.canvas.coords(entry['rect'], x1, y1, x2, y2)
+            if has_label:
+                text = self._label_text(class_id)
+                self.canvas.coords(entry['label_bg'], x1, y1 - 20, x1 + len(text) * 8 + 10, y1)
+                self.canvas.coords(entry['label_text'], x1 + 5, y1 - 10)
+            entry['coords'] = coords
+    
+    def _create_label(self, entry: Dict, class_id: int, x1: int, y1: int, hex_color: str):
+        """Create the label background and text items of a box"""
+        text = self._label_text(class_id)
+        entry['label_bg'] = self.canvas.create_rectangle(
+            x1, y1 - 20, x1 + len(text) * 8 + 10, y1,
+            fill=hex_color, outline=hex_color, tags="label_bg")
+        entry['label_text'] = self.canvas.create_text(
+            x1 + 5, y1 - 10, text=text, anchor=tk.W,
+            fill=CONFIG["drawing"]["label_text_color"],
+            font=("Arial", self.app.label_font_size), tags="label")
+    
+    def _delete_box_items(self, key: int):
+        """Remove all canvas items of a box"""
+        entry = self._box_items.pop(key)
+        self.canvas.delete(*[item for item in (entry['rect'], entry['label_bg'], entry['label_text'])
+                             if item is not None])
+    
+    def _sync_selection(self, selected: Optional[Dict]):
+        """Move the persistent selection outline and handles onto the selected box"""
+        items = self._selection_items
+        if selected is None or id(selected) not in self._box_items:
+            self._set_selection_state(False, False)
+            return
+        
+        coords = self._box_canvas_coords(selected)
+        x1, y1, x2, y2 = coords
+        size = self.app.handle_size
+        handle_points = [
+            (x1, y1), (x2, y1), (x1, y2), (x2, y2),
+            ((x1+x2)//2, y1), ((x1+x2)//2, y2), (x1, (y1+y2)//2), (x2, (y1+y2)//2)
+        ] if CONFIG["drawing"]["draw_handles"] else []
+        
+        if items['outline'] is None:
+            items['outline'] = self.canvas.create_rectangle(
                 x1, y1, x2, y2,
                 outline=CONFIG["drawing"]["selected_outline_contrast_color"],
                 width=self.app.selected_box_line_width + 2,
                 tags="selection"
             )
-            self.canvas_items['boxes'].append(outline_item)
-            
-            # Draw resize handles
-            if CONFIG["drawing"]["draw_handles"]:
-                handles = [
-                    (x1, y1), (x2, y1), (x1, y2), (x2, y2),
-                    ((x1+x2)//2, y1), ((x1+x2)//2, y2), (x1, (y1+y2)//2), (x2, (y1+y2)//2)
-                ]
-                for hx, hy in handles:
-                    handle = self.canvas.create_rectangle(
-                        hx - self.app.handle_size, hy - self.app.handle_size,
-                        hx + self.app.handle_size, hy + self.app.handle_size,
-                        fill=CONFIG["drawing"]["handle_fill_selected"],
-                        outline=CONFIG["drawing"]["handle_color"],
-                        tags="handle"
-                    )
-                    self.canvas_items['handles'].append(handle)
-        
-        # Draw label
-        class_name = self.class_names[box['class_id']]
-        if CONFIG["classes"]["rtl_naive_reverse"] and self.app.contains_persian(class_name) and len(class_name) > 1:
-            class_name = class_name[::-1]
+            items['handles'] = [
+                self.canvas.create_rectangle(
+                    hx - size, hy - size, hx + size, hy + size,
+                    fill=CONFIG["drawing"]["handle_fill_selected"],
+                    outline=CONFIG["drawing"]["handle_color"],
+                    tags="handle"
+                )
+                for hx, hy in handle_points
+            ]
+            self._selection_visible = self._handles_visible = True
+        else:
+            self.canvas.coords(items['outline'], x1, y1, x2, y2)
+            for item, (hx, hy) in zip(items['handles'], handle_points):
+                self.canvas.coords(item, hx - size, hy - size, hx + size, hy + size)
         
-        label_bg = self.canvas.create_rectangle(
-            x1, y1 - 20, x1 + len(class_name) * 8 + 10, y1,
-            fill=hex_color,
-            outline=hex_color,
-            tags="label_bg"
-        )
-        self.canvas_items['labels'].append(label_bg)
+        # Handles would swamp a box that is only a few pixels on screen
+        self._set_selection_state(True, self._level_of_detail(coords) == 'full')
         
-        label_text = self.canvas.create_text(
-            x1 + 5, y1 - 10,
-            text=class_name,
-            anchor=tk.W,
-            fill=CONFIG["drawing"]["label_text_color"],
-            font=("Arial", self.app.label_font_size),
-            tags="label"
-        )
-        self.canvas_items['labels'].append(label_text)
+        # Keep the selected box's items above everything else
+        entry = self._box_items[id(selected)]
+        if self._raised_selection != id(selected):
+            self.canvas.tag_raise(entry['rect'])
+            self.canvas.tag_raise("selection")
+            if entry['label_bg'] is not None:
+                self.canvas.tag_raise(entry['label_bg'])
+                self.canvas.tag_raise(entry['label_text'])
+            self.canvas.tag_raise("handle")
+            self._raised_selection = id(selected)
+    
+    def _set_selection_state(self, outline: bool, handles: bool):
+        """Show or hide the selection outline and handles, touching items only on change"""
+        if self._selection_items['outline'] is None:
+            return
+        if outline != self._selection_visible:
+            self.canvas.itemconfig("selection", state=tk.NORMAL if outline else tk.HIDDEN)
+            self._selection_visible = outline
+        if handles != self._handles_visible:
+            self.canvas.itemconfig("handle", state=tk.NORMAL if handles else tk.HIDDEN)
+            self._handles_visible = handles
     
-    def _render_temp_box(self):
-        """Render temporary box for real-time drawing"""
+    def _sync_temp_box(self):
+        """Show, move or hide the dashed preview rectangle"""
         if not self._temp_box:
+            if self._temp_item:
+                self.canvas.delete(self._temp_item)
+                self._temp_item = None
             return
             
         x1, y1, x2, y2 = self._temp_box
@@ -247,15 +771,15 @@ class HighPerformanceRenderer:
         x2_canvas = int(x2 * self.app.zoom_scale + self.app.image_offset_x)
         y2_canvas = int(y2 * self.app.zoom_scale + self.app.image_offset_y)
         
+        if self._temp_item:
+            self.canvas.coords(self._temp_item, x1_canvas, y1_canvas, x2_canvas, y2_canvas)
+            return
+        
         color = self.app.get_class_color(self.app.drawing_class_id)
         hex_color = f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
         
-        # Clear previous temp box
-        if self.canvas_items['temp_box']:
-            self.canvas.delete(self.canvas_items['temp_box'])
-        
         # Draw temporary box with dashed line
-        self.canvas_items['temp_box'] = self.canvas.create_rectangle(
+        self._temp_item = self.canvas.create_rectangle(
             x1_canvas, y1_canvas, x2_canvas, y2_canvas,
             outline=hex_color,
             width=self.app.box_line_width,
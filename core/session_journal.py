@@ -0,0 +1,205 @@
+# core/session_journal.py
+"""
+Append-only session journal: small deltas instead of a full session snapshot
+"""
+
+import os
+import json
+import queue
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.file_utils import FileUtils
+
+# Record kinds
+OPEN, INDEX, VIEW, BOXES, SAVE = "open", "index", "view", "boxes", "save"
+
+# [at, removed, rows]: replace `removed` rows starting at `at` with `rows`
+Splice = List[Any]
+
+
+def splice(old: np.ndarray, new: np.ndarray) -> Optional[Splice]:
+    """Smallest single splice turning box rows old into new; None if they are equal
+
+    Rows are (class_id, x_min, y_min, x_max, y_max). Only the span between
+    the common prefix and the common suffix is recorded, so moving, adding or
+    deleting one box costs one row regardless of how many boxes there are.
+    """
+    common = min(len(old), len(new))
+    differ = np.flatnonzero((old[:common] != new[:common]).any(axis=1))
+    at = int(differ[0]) if len(differ) else common
+    if at == len(old) == len(new):
+        return None
+    tail = common - at  # Rows after the prefix that may still match from the end
+    differ = np.flatnonzero((old[len(old) - tail:] != new[len(new) - tail:]).any(axis=1))
+    suffix = tail - int(differ[-1]) - 1 if len(differ) else tail
+    return [at, len(old) - at - suffix, new[at:len(new) - suffix].tolist()]
+
+
+def apply_splices(rows: np.ndarray, edits: List[Splice]) -> np.ndarray:
+    """Replay splices onto box rows"""
+    for at, removed, added in edits:
+        rows = np.concatenate([rows[:at], np.asarray(added, np.float64).reshape(-1, 5),
+                               rows[at + removed:]])
+    return rows
+
+
+class SessionJournal:
+    """Records session changes as JSON lines and folds them back on startup.
+
+    Records are buffered and handed to a writer thread by flush() (the app
+    calls it on the autosave timer), so a crash loses at most one interval
+    and the fsync never blocks the UI. The journal folds every record into a
+    small state as it goes: the open dataset, the current image, view
+    settings and the unsaved box edits of the current image. Box edits are
+    splices against the label file they started from, identified by its
+    fingerprint. Once compact_bytes have been appended, the writer rewrites
+    the file as that state, so replay time depends on recent activity and not
+    on the dataset size.
+    """
+
+    def __init__(self, path: str, compact_bytes: int = 1 << 20):
+        """
+        Args:
+            path: JSONL file of the journal
+            compact_bytes: Appended bytes that trigger a compaction
+        """
+        self.path = path
+        self.compact_bytes = compact_bytes
+        self.logger = logging.getLogger("SessionJournal")
+
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._buffer: List[str] = []
+        self._bytes = 0  # Size of the file once queued writes land
+        self._file = None  # Owned by the writer thread
+        self._queue: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="session-journal", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _fold(state: Dict[str, Dict[str, Any]], record: Dict[str, Any]):
+        """Apply one record to the folded session state"""
+        kind = record.get('t')
+        if kind == OPEN:
+            state.clear()
+            state[OPEN] = record
+        elif kind == INDEX:
+            state[INDEX] = record
+            if state.get(BOXES, {}).get('path') != record.get('path'):
+                state.pop(BOXES, None)  # Unsaved edits of another image were dropped
+        elif kind == VIEW:
+            state[VIEW] = record
+        elif kind == BOXES:
+            current = state.get(BOXES)
+            if (current is not None and current.get('path') == record.get('path')
+                    and current.get('base') == record.get('base')):
+                current['edits'] = current['edits'] + record.get('edits', [])
+            else:
+                state[BOXES] = dict(record, edits=list(record.get('edits', [])))
+        elif kind == SAVE:
+            if state.get(BOXES, {}).get('path') == record.get('path'):
+                del state[BOXES]
+
+    def replay(self) -> Dict[str, Dict[str, Any]]:
+        """Read the journal and return the folded state (kind -> latest record)"""
+        state: Dict[str, Dict[str, Any]] = {}
+        lines = skipped = 0
+        unreadable = False
+        try:
+            with open(self.path, 'r+b') as f:
+                data = f.read()
+                end = data.rfind(b"\n") + 1
+                for line in data[:end].split(b"\n")[:-1]:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        skipped += 1  # Corrupt line; the records around it still apply
+                        continue
+                    if not isinstance(record, dict):
+                        skipped += 1
+                        continue
+                    lines += 1
+                    self._fold(state, record)
+                unreadable = bool(data) and not lines
+                self._bytes = 0 if unreadable else end
+                if end < len(data) and not unreadable:
+                    # Torn last line from a crash mid-append; cut it so the next append starts clean
+                    f.truncate(end)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            self.logger.warning(f"Cannot read session journal {self.path}", exc_info=True)
+        if skipped and not unreadable:
+            self.logger.warning(f"Skipped {skipped} corrupt lines in {self.path}")
+        if unreadable:
+            # E.g. a pickled session from an older version; keep it aside, start fresh
+            self.logger.warning(f"{self.path} is not a session journal; moved to {self.path}.old")
+            try:
+                os.replace(self.path, self.path + ".old")
+            except OSError:
+                pass
+        self._state = state
+        self.logger.info(f"Replayed {lines} session records")
+        return {kind: dict(record) for kind, record in state.items()}
+
+    def record(self, kind: str, **fields):
+        """Queue a record for the next flush"""
+        record = dict(fields, t=kind)
+        self._fold(self._state, record)
+        self._buffer.append(json.dumps(record, separators=(',', ':')) + "\n")
+
+    def flush(self):
+        """Hand buffered records to the writer thread; compacts once compact_bytes were appended"""
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        self._queue.put(('append', text))
+        self._bytes += len(text)  # json.dumps escapes non-ASCII, so characters are bytes
+        if self._bytes >= self.compact_bytes:
+            snapshot = "".join(json.dumps(self._state[kind], separators=(',', ':')) + "\n"
+                               for kind in (OPEN, INDEX, VIEW, BOXES) if kind in self._state)
+            self._queue.put(('compact', snapshot))
+            self._bytes = len(snapshot)
+
+    # ======================
+    # Writer thread
+    # ======================
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            op, text = item
+            try:
+                if op == 'append':
+                    if self._file is None:
+                        FileUtils.ensure_directory(os.path.dirname(self.path) or ".")
+                        self._file = open(self.path, 'a', encoding='utf-8')
+                    self._file.write(text)
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                else:
+                    # Everything queued before the snapshot is folded into it
+                    if self._file is not None:
+                        self._file.close()
+                        self._file = None
+                    FileUtils.atomic_write_text(self.path, text)
+                    self.logger.info(f"Compacted session journal to {len(text)} bytes")
+            except OSError:
+                self.logger.error(f"Cannot write session journal {self.path}", exc_info=True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """Flush what is left and wait for the writer to finish"""
+        if not self._thread.is_alive():
+            return
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
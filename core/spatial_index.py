@@ -0,0 +1,181 @@
+# core/spatial_index.py
+"""
+Uniform-grid spatial index over image-space boxes
+"""
+
+from bisect import bisect_left, insort
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from models.box_array import BoxArray
+
+
+class BoxSpatialIndex:
+    """Grid index answering point and rectangle queries over the box list.
+
+    Boxes are tracked by identity and by their position in the box list, so
+    "topmost" follows the drawing order (later boxes are on top). Updates are
+    incremental: only the cells a box enters or leaves are touched.
+
+    Positions are stored as they were when the box was indexed. A delete
+    records a gap instead of renumbering every later box, and queries
+    subtract the gaps below a position (a bisect). The gaps are folded back
+    into the positions in one pass once they reach a fraction of the boxes.
+    """
+
+    def __init__(self, cell_size: int = 256):
+        """
+        Args:
+            cell_size: Grid cell size in image pixels
+        """
+        self.cell_size = max(1, int(cell_size))
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}  # cell -> box ids
+        self._bounds: Dict[int, Tuple[float, float, float, float]] = {}  # box id -> bounds
+        self._pos: Dict[int, int] = {}  # box id -> index in box list, not counting _gaps
+        self._gaps: List[int] = []  # Sorted stored positions of deleted boxes
+        self._next = 0  # Stored position of the next appended box
+
+    def __len__(self) -> int:
+        return len(self._pos)
+
+    @staticmethod
+    def _box_bounds(box: Dict) -> Tuple[float, float, float, float]:
+        return (min(box['x_min'], box['x_max']), min(box['y_min'], box['y_max']),
+                max(box['x_min'], box['x_max']), max(box['y_min'], box['y_max']))
+
+    def _cell_range(self, bounds: Tuple[float, float, float, float]):
+        size = self.cell_size
+        x1, y1, x2, y2 = bounds
+        return (int(x1 // size), int(y1 // size), int(x2 // size), int(y2 // size))
+
+    def _add_cells(self, key: int, bounds: Tuple[float, float, float, float]):
+        cx1, cy1, cx2, cy2 = self._cell_range(bounds)
+        for cy in range(cy1, cy2 + 1):
+            for cx in range(cx1, cx2 + 1):
+                self._cells.setdefault((cx, cy), set()).add(key)
+
+    def _index(self, pos: int) -> int:
+        """List index of a stored position"""
+        return pos - bisect_left(self._gaps, pos) if self._gaps else pos
+
+    def _compact(self):
+        """Fold the gaps into the stored positions (one pass over the boxes)"""
+        for key, pos in self._pos.items():
+            self._pos[key] = self._index(pos)
+        self._gaps.clear()
+        self._next = len(self._pos)
+
+    def _remove_cells(self, key: int, bounds: Tuple[float, float, float, float]):
+        cx1, cy1, cx2, cy2 = self._cell_range(bounds)
+        for cy in range(cy1, cy2 + 1):
+            for cx in range(cx1, cx2 + 1):
+                cell = self._cells.get((cx, cy))
+                if cell is not None:
+                    cell.discard(key)
+                    if not cell:
+                        del self._cells[(cx, cy)]
+
+    # ======================
+    # Updates
+    # ======================
+
+    def clear(self):
+        """Remove all boxes"""
+        self._cells.clear()
+        self._bounds.clear()
+        self._pos.clear()
+        self._gaps.clear()
+        self._next = 0
+
+    def rebuild(self, boxes: BoxArray):
+        """Index a whole box store (after load or undo)"""
+        self.clear()
+        coords = boxes.coords
+        bounds = np.hstack([np.minimum(coords[:, :2], coords[:, 2:]),
+                            np.maximum(coords[:, :2], coords[:, 2:])])
+        cells = (bounds // self.cell_size).astype(np.int64)
+        for idx, (box, box_bounds, (cx1, cy1, cx2, cy2)) in enumerate(
+                zip(boxes, bounds.tolist(), cells.tolist())):
+            key = id(box)
+            self._bounds[key] = tuple(box_bounds)
+            self._pos[key] = idx
+            for cy in range(cy1, cy2 + 1):
+                for cx in range(cx1, cx2 + 1):
+                    self._cells.setdefault((cx, cy), set()).add(key)
+        self._next = len(self._pos)
+
+    def append(self, box: Dict):
+        """Index a box that was appended to the end of the list"""
+        key = id(box)
+        bounds = self._box_bounds(box)
+        self._bounds[key] = bounds
+        self._pos[key] = self._next
+        self._next += 1
+        self._add_cells(key, bounds)
+
+    def update(self, box: Dict):
+        """Re-index a box after it was moved or resized"""
+        key = id(box)
+        old = self._bounds.get(key)
+        if old is None:
+            return
+        new = self._box_bounds(box)
+        self._bounds[key] = new
+        if self._cell_range(old) != self._cell_range(new):
+            self._remove_cells(key, old)
+            self._add_cells(key, new)
+
+    def remove(self, box: Dict):
+        """Drop a box that was deleted from the list"""
+        key = id(box)
+        bounds = self._bounds.pop(key, None)
+        if bounds is None:
+            return
+        self._remove_cells(key, bounds)
+        # Later boxes shift down one position in the list; record the gap
+        # and renumber only once enough gaps have piled up
+        insort(self._gaps, self._pos.pop(key))
+        if len(self._gaps) > 64 + len(self._pos) // 8:
+            self._compact()
+
+    # ======================
+    # Queries
+    # ======================
+
+    def topmost_at(self, x: float, y: float, margin: float = 0.0) -> int:
+        """Return list index of the topmost box containing (x, y), or -1"""
+        size = self.cell_size
+        best = -1
+        for key in self._cells.get((int(x // size), int(y // size)), ()):
+            x1, y1, x2, y2 = self._bounds[key]
+            if x1 - margin <= x <= x2 + margin and y1 - margin <= y <= y2 + margin:
+                pos = self._pos[key]
+                if pos > best:
+                    best = pos
+        return self._index(best) if best >= 0 else -1
+
+    def query_rect(self, x1: float, y1: float, x2: float, y2: float) -> List[int]:
+        """Return sorted list indices of boxes intersecting the rectangle"""
+        cx1, cy1, cx2, cy2 = self._cell_range((x1, y1, x2, y2))
+        n_cells = (cx2 - cx1 + 1) * (cy2 - cy1 + 1)
+        if n_cells > len(self._cells):
+            # Query covers most of the grid; scanning occupied cells is cheaper
+            candidates = set().union(*self._cells.values()) if self._cells else set()
+        else:
+            candidates = set()
+            for cy in range(cy1, cy2 + 1):
+                for cx in range(cx1, cx2 + 1):
+                    cell = self._cells.get((cx, cy))
+                    if cell:
+                        candidates.update(cell)
+
+        hits = []
+        for key in candidates:
+            bx1, by1, bx2, by2 = self._bounds[key]
+            if bx1 <= x2 and bx2 >= x1 and by1 <= y2 and by2 >= y1:
+                hits.append(self._pos[key])
+        hits.sort()
+        if self._gaps:
+            hits = [self._index(pos) for pos in hits]
+        return hits
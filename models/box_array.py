@@ -0,0 +1,364 @@
+# models/box_array.py
+"""
+Columnar bounding box store backed by NumPy arrays
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+COORD_FIELDS = ('x_min', 'y_min', 'x_max', 'y_max')
+_COORD_COLUMN = {name: col for col, name in enumerate(COORD_FIELDS)}
+
+
+class BoxView:
+    """Dict-like view of one row of a BoxArray.
+
+    Views are created once per row and keep their identity while the row
+    exists, so code keyed by id(box) (canvas items, spatial index) keeps
+    working. Writes go straight to the arrays. A view whose row is deleted
+    is detached and keeps a private copy of its last values.
+    """
+
+    __slots__ = ('_owner', '_row', '_data')
+
+    def __init__(self, owner: 'BoxArray', row: int):
+        self._owner = owner
+        self._row = row
+        self._data: Optional[Dict[str, Any]] = None
+
+    def __getitem__(self, key: str) -> Any:
+        owner = self._owner
+        if owner is None:
+            return self._data[key]
+        if key == 'class_id':
+            return int(owner._class_ids[self._row])
+        return float(owner._coords[self._row, _COORD_COLUMN[key]])
+
+    def __setitem__(self, key: str, value: Any):
+        owner = self._owner
+        if owner is None:
+            self._data[key] = value
+        elif key == 'class_id':
+            owner._class_ids[self._row] = value
+        else:
+            owner._coords[self._row, _COORD_COLUMN[key]] = value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get compatible lookup"""
+        if key != 'class_id' and key not in _COORD_COLUMN:
+            return default
+        return self[key]
+
+    def keys(self) -> Tuple[str, ...]:
+        return ('class_id',) + COORD_FIELDS
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return list(self.to_dict().items())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __contains__(self, key: str) -> bool:
+        return key == 'class_id' or key in _COORD_COLUMN
+
+    def __len__(self) -> int:
+        return 5
+
+    def coords(self) -> List[float]:
+        """[x_min, y_min, x_max, y_max] in one array access"""
+        if self._owner is None:
+            return [self._data[name] for name in COORD_FIELDS]
+        return self._owner._coords[self._row].tolist()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict snapshot of the row"""
+        if self._owner is None:
+            return dict(self._data)
+        x_min, y_min, x_max, y_max = self.coords()
+        return {'class_id': int(self._owner._class_ids[self._row]),
+                'x_min': x_min, 'y_min': y_min, 'x_max': x_max, 'y_max': y_max}
+
+    copy = to_dict
+
+    def _detach(self):
+        """Keep the current values after the row is removed from its array"""
+        self._data = self.to_dict()
+        self._owner = None
+
+    def __repr__(self) -> str:
+        return f"BoxView({self.to_dict()})"
+
+
+class BoxArray:
+    """Boxes stored as contiguous class id and pixel coordinate columns.
+
+    class_ids is an int32 (N,) array and coords a float64 (N, 4) array of
+    x_min, y_min, x_max, y_max. Bulk operations (YOLO conversion, clamping,
+    validation, area/IoU) work on the columns; indexing and iteration yield
+    BoxView objects so UI code can keep treating boxes as dicts.
+    """
+
+    def __init__(self, class_ids: Optional[np.ndarray] = None,
+                 coords: Optional[np.ndarray] = None):
+        """
+        Args:
+            class_ids: (N,) class ids
+            coords: (N, 4) pixel coordinates (x_min, y_min, x_max, y_max)
+        """
+        class_ids = np.zeros(0, np.int32) if class_ids is None else np.asarray(class_ids, np.int32)
+        coords = np.zeros((0, 4), np.float64) if coords is None else np.asarray(coords, np.float64)
+        coords = coords.reshape(-1, 4)
+        if len(class_ids) != len(coords):
+            raise ValueError(f"class_ids ({len(class_ids)}) and coords ({len(coords)}) differ in length")
+
+        self._size = len(class_ids)
+        capacity = max(16, self._size)
+        self._class_ids = np.zeros(capacity, np.int32)
+        self._coords = np.zeros((capacity, 4), np.float64)
+        self._class_ids[:self._size] = class_ids
+        self._coords[:self._size] = coords
+        self._views: List[Optional[BoxView]] = [None] * self._size
+
+    # ======================
+    # Construction
+    # ======================
+
+    @classmethod
+    def from_dicts(cls, boxes: Iterable[Any]) -> 'BoxArray':
+        """Build from box dicts (or views)"""
+        boxes = list(boxes)
+        if not boxes:
+            return cls()
+        class_ids = np.fromiter((box['class_id'] for box in boxes), np.int32, len(boxes))
+        coords = np.array([[box[name] for name in COORD_FIELDS] for box in boxes], np.float64)
+        return cls(class_ids, coords)
+
+    @classmethod
+    def from_yolo(cls, class_ids: np.ndarray, yolo: np.ndarray,
+                  img_width: int, img_height: int) -> 'BoxArray':
+        """Build from normalized YOLO rows (cx, cy, w, h)"""
+        return cls(class_ids, cls.yolo_to_pixel(yolo, img_width, img_height))
+
+    def copy(self) -> 'BoxArray':
+        """Independent copy (new arrays, new views)"""
+        return BoxArray(self.class_ids.copy(), self.coords.copy())
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Plain dict list (e.g. for display or export)"""
+        return [{'class_id': c, 'x_min': x1, 'y_min': y1, 'x_max': x2, 'y_max': y2}
+                for c, (x1, y1, x2, y2) in zip(self.class_ids.tolist(), self.coords.tolist())]
+
+    # ======================
+    # Columns
+    # ======================
+
+    @property
+    def class_ids(self) -> np.ndarray:
+        """(N,) class ids (a view; writes go to the store)"""
+        return self._class_ids[:self._size]
+
+    @property
+    def coords(self) -> np.ndarray:
+        """(N, 4) pixel coordinates (a view; writes go to the store)"""
+        return self._coords[:self._size]
+
+    # ======================
+    # Sequence protocol
+    # ======================
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[BoxView, List[BoxView]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("box index out of range")
+        view = self._views[index]
+        if view is None:
+            view = self._views[index] = BoxView(self, index)
+        return view
+
+    def __iter__(self) -> Iterator[BoxView]:
+        for i in range(self._size):
+            yield self[i]
+
+    def __delitem__(self, index: int):
+        self.pop(index)
+
+    def _reserve(self, count: int):
+        """Grow capacity geometrically to fit count more rows"""
+        needed = self._size + count
+        if needed <= len(self._class_ids):
+            return
+        capacity = max(needed, 2 * len(self._class_ids))
+        class_ids = np.zeros(capacity, np.int32)
+        coords = np.zeros((capacity, 4), np.float64)
+        class_ids[:self._size] = self.class_ids
+        coords[:self._size] = self.coords
+        self._class_ids, self._coords = class_ids, coords
+
+    def append(self, box: Any):
+        """Append a box dict (or view); amortized O(1)"""
+        self._reserve(1)
+        row = self._size
+        self._class_ids[row] = box['class_id']
+        self._coords[row] = [box[name] for name in COORD_FIELDS]
+        self._size += 1
+        self._views.append(None)
+
+    def extend(self, boxes: Union['BoxArray', Iterable[Any]]):
+        """Append many boxes; a BoxArray is copied column-wise"""
+        if not isinstance(boxes, BoxArray):
+            boxes = BoxArray.from_dicts(boxes)
+        count = len(boxes)
+        self._reserve(count)
+        self._class_ids[self._size:self._size + count] = boxes.class_ids
+        self._coords[self._size:self._size + count] = boxes.coords
+        self._size += count
+        self._views.extend([None] * count)
+
+    def insert(self, index: int, box: Any):
+        """Insert a box dict (or view) before index; later views shift down"""
+        if index < 0:
+            index += self._size
+        index = max(0, min(index, self._size))
+        self._reserve(1)
+        end = self._size
+        self._class_ids[index + 1:end + 1] = self._class_ids[index:end]
+        self._coords[index + 1:end + 1] = self._coords[index:end]
+        self._class_ids[index] = box['class_id']
+        self._coords[index] = [box[name] for name in COORD_FIELDS]
+        self._size += 1
+        self._views.insert(index, None)
+        for row in range(index + 1, self._size):
+            shifted = self._views[row]
+            if shifted is not None:
+                shifted._row = row
+
+    def row(self, index: int) -> Tuple[int, float, float, float, float]:
+        """(class_id, x_min, y_min, x_max, y_max) of a row as plain Python values"""
+        return (int(self._class_ids[index]),) + tuple(self._coords[index].tolist())
+
+    def set_row(self, index: int, row: Tuple[int, float, float, float, float]):
+        """Overwrite a row from a (class_id, x_min, y_min, x_max, y_max) tuple"""
+        self._class_ids[index] = row[0]
+        self._coords[index] = row[1:]
+
+    def pop(self, index: int = -1) -> Dict[str, Any]:
+        """Remove a row and return it as a dict"""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("box index out of range")
+        removed = {'class_id': int(self._class_ids[index]),
+                   **dict(zip(COORD_FIELDS, self._coords[index].tolist()))}
+
+        view = self._views.pop(index)
+        if view is not None:
+            view._detach()
+        end = self._size
+        self._class_ids[index:end - 1] = self._class_ids[index + 1:end]
+        self._coords[index:end - 1] = self._coords[index + 1:end]
+        self._size -= 1
+        for row in range(index, self._size):
+            shifted = self._views[row]
+            if shifted is not None:
+                shifted._row = row
+        return removed
+
+    def clear(self):
+        """Remove all rows"""
+        for view in self._views:
+            if view is not None:
+                view._detach()
+        self._views = []
+        self._size = 0
+
+    def filter(self, mask: np.ndarray) -> 'BoxArray':
+        """New BoxArray with the rows where mask is True"""
+        return BoxArray(self.class_ids[mask], self.coords[mask])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Views are recreated lazily; only the columns are persisted
+        return {'class_ids': self.class_ids.copy(), 'coords': self.coords.copy()}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(state['class_ids'], state['coords'])
+
+    def __repr__(self) -> str:
+        return f"BoxArray({self._size} boxes)"
+
+    # ======================
+    # Vectorized operations
+    # ======================
+
+    @staticmethod
+    def yolo_to_pixel(yolo: np.ndarray, img_width: int, img_height: int) -> np.ndarray:
+        """(N, 4) normalized cx, cy, w, h -> (N, 4) pixel corners (truncated like int())"""
+        yolo = np.asarray(yolo, np.float64).reshape(-1, 4)
+        scale = np.array([img_width, img_height], np.float64)
+        center = yolo[:, :2] * scale
+        half = yolo[:, 2:] * scale / 2
+        return np.trunc(np.hstack([center - half, center + half]))
+
+    @staticmethod
+    def pixel_to_yolo(coords: np.ndarray, img_width: int, img_height: int) -> np.ndarray:
+        """(N, 4) pixel corners -> (N, 4) normalized cx, cy, w, h"""
+        coords = np.asarray(coords, np.float64).reshape(-1, 4)
+        scale = np.array([img_width, img_height], np.float64)
+        center = (coords[:, :2] + coords[:, 2:]) / 2 / scale
+        size = (coords[:, 2:] - coords[:, :2]) / scale
+        return np.hstack([center, size])
+
+    def to_yolo(self, img_width: int, img_height: int) -> np.ndarray:
+        """(N, 4) normalized cx, cy, w, h of all boxes"""
+        return self.pixel_to_yolo(self.coords, img_width, img_height)
+
+    def clamp(self, img_width: int, img_height: int):
+        """Clamp all coordinates to the image in place"""
+        coords = self.coords
+        np.clip(coords[:, 0::2], 0, img_width, out=coords[:, 0::2])
+        np.clip(coords[:, 1::2], 0, img_height, out=coords[:, 1::2])
+
+    def valid_mask(self, num_classes: Optional[int] = None, min_size: float = 0) -> np.ndarray:
+        """Rows with positive extent above min_size (and a known class)"""
+        coords = self.coords
+        mask = ((coords[:, 2] - coords[:, 0]) > min_size) & ((coords[:, 3] - coords[:, 1]) > min_size)
+        if num_classes is not None:
+            mask &= (self.class_ids >= 0) & (self.class_ids < num_classes)
+        return mask
+
+    @staticmethod
+    def yolo_valid_mask(yolo: np.ndarray) -> np.ndarray:
+        """Rows whose normalized values all lie in [0, 1]"""
+        yolo = np.asarray(yolo).reshape(-1, 4)
+        return np.all((yolo >= 0) & (yolo <= 1), axis=1)
+
+    def areas(self) -> np.ndarray:
+        """(N,) box areas in pixels"""
+        coords = self.coords
+        return (coords[:, 2] - coords[:, 0]) * (coords[:, 3] - coords[:, 1])
+
+    @staticmethod
+    def pairwise_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """(N, M) IoU between (N, 4) and (M, 4) corner arrays"""
+        a = np.asarray(a, np.float64).reshape(-1, 4)
+        b = np.asarray(b, np.float64).reshape(-1, 4)
+        x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+        y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+        x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+        y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+        area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+        union = area_a[:, None] + area_b[None, :] - inter
+        return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+    def iou(self, other: Union['BoxArray', np.ndarray]) -> np.ndarray:
+        """(N, M) IoU against another BoxArray or (M, 4) corner array"""
+        other_coords = other.coords if isinstance(other, BoxArray) else other
+        return self.pairwise_iou(self.coords, other_coords)
@@ -60,6 +60,7 @@ class MainWindow:
         # Buttons
         button_configs = [
             ("Open Image Dir", self.app.open_image_dir),
+            ("Open Image Archive", self.app.open_image_archive),
             ("Open Label Dir", self.app.open_label_dir),
             ("Save Labels", self.app.save_labels),
             ("Prev (A/←)", self.app.prev_image),
@@ -116,15 +117,18 @@ class MainWindow:
         self.canvas.bind("<B2-Motion>", self.app.on_pan_drag)
         self.canvas.bind("<ButtonRelease-2>", self.app.on_middle_click_end)
         self.canvas.bind("<Motion>", self.app.on_mouse_move)
+        self.canvas.bind("<Configure>", self.app.on_canvas_resize)
         
         # Key bindings
         self.root.bind("<Control-s>", lambda e: self.app.save_labels())
         self.root.bind("<Control-z>", self.app.undo)
+        self.root.bind("<Control-y>", self.app.redo)
         self.root.bind("<Delete>", self.app.delete_selected_box)
         self.root.bind("<Control-a>", self.app.select_all_boxes)
         self.root.bind("<Control-d>", self.app.duplicate_selected_box)
         self.root.bind("<Control-Shift-s>", self.app.quick_save_next)
         self.root.bind("<i>", self.app.reload_image)
+        self.root.bind("<Control-m>", lambda e: self.app.materialize_processed())
         
         for key in CONFIG["keybindings"]["prev_image"]:
             self.root.bind(f"<{key}>", lambda e: self.app.prev_image())
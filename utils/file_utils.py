@@ -3,32 +3,99 @@ File utilities for image and label file operations
 """
 
 import os
-import glob
+import re
 import shutil
-from typing import List, Optional, Tuple
+import logging
+from typing import Iterable, Iterator, List, Optional, Tuple, Any
 import cv2
+import numpy as np
+
+from models.box_array import BoxArray
+from utils.label_codec import read_labels
+
+logger = logging.getLogger("FileUtils")
+
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'})
+_DIGITS = re.compile(r'\d+')
 
 
 class FileUtils:
     """Utilities for file operations"""
     
     @staticmethod
-    def find_image_files(directory: str) -> List[str]:
-        """Find all image files in directory"""
+    def natural_sort_key(name: str) -> str:
+        """Sort key ordering img2 before img10 (case-insensitive)"""
+        # Zero-padding digit runs keeps the key a plain string, which sorts fastest
+        return _DIGITS.sub(lambda m: m.group().zfill(20), name.lower())
+
+    @staticmethod
+    def image_sort_key(path: str, root: str) -> Tuple:
+        """Key ordering paths under root exactly as iter_image_files yields them"""
+        parts = os.path.relpath(path, root).split(os.sep)
+        # Files of a directory come before its subdirectories
+        return tuple((1, FileUtils.natural_sort_key(p)) for p in parts[:-1]) + \
+            ((0, FileUtils.natural_sort_key(parts[-1])),)
+
+    @staticmethod
+    def iter_image_files(directory: str, recursive: bool = False, exclude: Iterable[str] = (),
+                         batch_size: int = 1024) -> Iterator[List[str]]:
+        """
+        Yield image paths under directory in batches, in natural sort order
+
+        Each directory is read with a single os.scandir pass (no stat calls
+        on most filesystems) and its images are yielded before its
+        subdirectories are visited, so callers can show the first image
+        while the rest of the tree is still being scanned. Extensions match
+        case-insensitively; hidden and excluded directories are skipped.
+
+        Args:
+            directory: Root directory
+            recursive: Descend into subdirectories
+            exclude: Directories to skip (e.g. the processed directory)
+            batch_size: Maximum paths per yielded list
+        """
+        excluded = {os.path.realpath(p) for p in exclude}
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            files, subdirs = [], []
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_file():
+                                name = entry.name
+                                if name[name.rfind('.'):].lower() in IMAGE_EXTENSIONS:
+                                    files.append(name)
+                            elif recursive and entry.is_dir() and not entry.name.startswith('.'):
+                                subdirs.append(entry.name)
+                        except OSError:
+                            continue
+            except OSError as e:
+                logger.warning(f"Cannot scan {current}: {e}")
+                continue
+
+            files.sort(key=FileUtils.natural_sort_key)
+            for start in range(0, len(files), batch_size):
+                yield [os.path.join(current, name) for name in files[start:start + batch_size]]
+
+            # Depth first; pushed in reverse so the stack pops them in order
+            subdirs.sort(key=FileUtils.natural_sort_key, reverse=True)
+            for name in subdirs:
+                path = os.path.join(current, name)
+                if os.path.realpath(path) not in excluded:
+                    pending.append(path)
+
+    @staticmethod
+    def find_image_files(directory: str, recursive: bool = False,
+                         exclude: Iterable[str] = ()) -> List[str]:
+        """Find all image files in directory (see iter_image_files)"""
         if not os.path.exists(directory):
             return []
-            
-        extensions = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff', '*.tif']
         image_files = []
-        
-        for ext in extensions:
-            pattern = os.path.join(directory, ext)
-            image_files.extend(glob.glob(pattern))
-            # Also check uppercase extensions
-            pattern = os.path.join(directory, ext.upper())
-            image_files.extend(glob.glob(pattern))
-        
-        return sorted(image_files)
+        for batch in FileUtils.iter_image_files(directory, recursive, exclude):
+            image_files.extend(batch)
+        return image_files
     
     @staticmethod
     def ensure_directory(path: str) -> bool:
@@ -40,58 +107,157 @@ class FileUtils:
             return False
     
     @staticmethod
-    def get_label_path(image_path: str, label_dir: str) -> str:
-        """Get corresponding label file path for image"""
-        image_name = os.path.splitext(os.path.basename(image_path))[0]
-        return os.path.join(label_dir, image_name + ".txt")
+    def relative_image_path(image_path: str, image_dir: Optional[str] = None) -> str:
+        """image_path relative to image_dir; just the file name without image_dir or outside it"""
+        if image_dir:
+            prefix = os.path.join(image_dir, '')
+            if image_path.startswith(prefix):
+                return image_path[len(prefix):]  # Fast path, no normalization needed
+            try:
+                rel = os.path.relpath(image_path, image_dir)
+            except ValueError:
+                rel = os.pardir  # Different drive
+            if rel != os.pardir and not rel.startswith(os.pardir + os.sep):
+                return rel
+        return os.path.basename(image_path)
+
+    @staticmethod
+    def get_label_path(image_path: str, label_dir: str, image_dir: Optional[str] = None) -> str:
+        """
+        Get corresponding label file path for image
+
+        With image_dir, an image in a subdirectory keeps that subdirectory
+        under label_dir, so a/001.jpg and b/001.jpg get separate labels.
+        """
+        rel = FileUtils.relative_image_path(image_path, image_dir)
+        return os.path.join(label_dir, os.path.splitext(rel)[0] + ".txt")
+
+    @staticmethod
+    def processed_paths(image_path: str, processed_dir: str,
+                        image_dir: Optional[str] = None) -> Tuple[str, str]:
+        """(image, label) destinations under processed_dir/images|labels, keeping the subdirectory"""
+        rel = FileUtils.relative_image_path(image_path, image_dir)
+        return (os.path.join(processed_dir, 'images', rel),
+                os.path.join(processed_dir, 'labels', os.path.splitext(rel)[0] + ".txt"))
     
     @staticmethod
-    def load_image_with_caching(path: str, cache: Optional[dict] = None) -> Optional[any]:
-        """Load image with optional caching"""
-        if cache is not None and path in cache:
-            return cache[path]
+    def load_image_with_caching(path: str, cache: Optional[Any] = None) -> Optional[Any]:
+        """
+        Load image with optional caching
+
+        Args:
+            path: Image file path
+            cache: Object with get/put (ImageCache), so eviction always applies
+        """
+        if cache is not None:
+            image = cache.get(path)
+            if image is not None:
+                return image
         
         if not os.path.exists(path):
             return None
             
         image = cv2.imread(path)
         if image is not None and cache is not None:
-            cache[path] = image
+            cache.put(path, image)
             
         return image
     
+    @staticmethod
+    def load_yolo_labels(label_path: str, img_width: int, img_height: int,
+                         num_classes: int) -> BoxArray:
+        """
+        Parse a YOLO label file into pixel-space boxes
+
+        Invalid lines are logged and skipped; boxes are clamped to the image.
+        Safe to call from worker threads.
+
+        Returns:
+            BoxArray, empty if the file does not exist
+        """
+        if not os.path.exists(label_path):
+            return BoxArray()
+
+        labels = read_labels(label_path, num_classes)
+        for line_num, message in labels['errors']:
+            logger.warning(f"{message} in {label_path} line {line_num}")
+        line_nums = labels['line_numbers']
+
+        # Convert YOLO to pixel coordinates and clamp to image bounds in one pass
+        boxes = BoxArray.from_yolo(labels['class_ids'], labels['yolo'], img_width, img_height)
+        boxes.clamp(img_width, img_height)
+        valid = boxes.valid_mask()
+        for i in np.flatnonzero(~valid):
+            logger.warning(f"Invalid box dimensions in {label_path} line {line_nums[i]}")
+        return boxes if valid.all() else boxes.filter(valid)
+
+    @staticmethod
+    def atomic_write_text(path: str, text: str, backup_count: int = 0):
+        """
+        Replace path with text so readers never see a partial file
+
+        The text goes to a temporary file in the same directory which is
+        fsynced and renamed over path. With backup_count > 0 the previous
+        version is kept as path.bak1 and older ones shift up to
+        path.bak<backup_count>. Raises OSError on failure.
+        """
+        directory = os.path.dirname(path) or "."
+        tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if backup_count > 0 and os.path.exists(path):
+                for i in range(backup_count - 1, 0, -1):
+                    if os.path.exists(f"{path}.bak{i}"):
+                        os.replace(f"{path}.bak{i}", f"{path}.bak{i + 1}")
+                backup = f"{path}.bak1"
+                if os.path.exists(backup):
+                    os.remove(backup)
+                try:
+                    os.link(path, backup)  # No copy; path stays in place until the rename
+                except OSError:
+                    shutil.copy2(path, backup)
+
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     @staticmethod
     def move_to_processed_dir(source_path: str, 
                             processed_dir: str, 
-                            create_subdirs: bool = True) -> Tuple[Optional[str], Optional[str]]:
+                            create_subdirs: bool = True,
+                            image_dir: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
         """
         Move file to processed directory
         
+        With create_subdirs the file goes to processed_dir/images (its label
+        to processed_dir/labels), keeping its subdirectory below image_dir.
+        
         Returns:
             Tuple of (new_image_path, new_label_path) or (None, None) on error
         """
         try:
+            filename = os.path.basename(source_path)
+            label_name = os.path.splitext(filename)[0] + ".txt"
             if create_subdirs:
-                images_dir = os.path.join(processed_dir, 'images')
-                labels_dir = os.path.join(processed_dir, 'labels')
-                FileUtils.ensure_directory(images_dir)
-                FileUtils.ensure_directory(labels_dir)
+                new_image_path, new_label_path = FileUtils.processed_paths(source_path, processed_dir,
+                                                                           image_dir)
+                FileUtils.ensure_directory(os.path.dirname(new_image_path))
+                FileUtils.ensure_directory(os.path.dirname(new_label_path))
             else:
-                images_dir = processed_dir
-                labels_dir = processed_dir
-            
-            filename = os.path.basename(source_path)
-            new_image_path = os.path.join(images_dir, filename)
+                new_image_path = os.path.join(processed_dir, filename)
+                new_label_path = os.path.join(processed_dir, label_name)
             
             # Move image file
             if os.path.exists(source_path):
                 shutil.move(source_path, new_image_path)
             
-            # Determine label path
-            label_name = os.path.splitext(filename)[0] + ".txt"
-            source_dir = os.path.dirname(source_path)
-            source_label_path = os.path.join(source_dir, label_name)
-            new_label_path = os.path.join(labels_dir, label_name)
+            # The label moves along when it sits next to the image
+            source_label_path = os.path.join(os.path.dirname(source_path), label_name)
             
             # Move label file if exists
             if os.path.exists(source_label_path):
@@ -103,12 +269,52 @@ class FileUtils:
             print(f"Error moving file to processed directory: {e}")
             return None, None
     
+    @staticmethod
+    def materialize_processed(image_paths: List[str], processed_dir: str, label_dir: str,
+                              mode: str = "link", image_dir: Optional[str] = None) -> int:
+        """
+        Lay out images (and their labels from label_dir) as processed_dir/images|labels
+
+        Subdirectories below image_dir are kept. With mode "link" the files
+        are hard-linked (copied if the processed directory is on another
+        filesystem) and stay where they are; with "move" they are renamed
+        into place. Files already present at the destination are skipped, so
+        an interrupted run can simply be repeated.
+
+        Returns:
+            Number of images placed
+        """
+        def place(source: str, target: str) -> bool:
+            if not os.path.exists(source):
+                return False
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.exists(target):
+                if mode == "move" and os.path.samefile(source, target):
+                    os.remove(source)  # Hard-linked by an earlier "link" run
+                    return True
+                return False
+            if mode == "move":
+                shutil.move(source, target)
+                return True
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+            return True
+
+        placed = 0
+        for image_path in image_paths:
+            image_target, label_target = FileUtils.processed_paths(image_path, processed_dir, image_dir)
+            if place(image_path, image_target):
+                placed += 1
+            place(FileUtils.get_label_path(image_path, label_dir, image_dir), label_target)
+        return placed
+
     @staticmethod
     def is_valid_image_file(path: str) -> bool:
         """Check if file is a valid image file"""
         if not os.path.isfile(path):
             return False
             
-        valid_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
         ext = os.path.splitext(path)[1].lower()
-        return ext in valid_extensions
+        return ext in IMAGE_EXTENSIONS
@@ -0,0 +1,145 @@
+"""
+Bulk YOLO label codec: whole-file parse and single-buffer serialization
+"""
+
+import io
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+FIELDS = 5  # class_id cx cy w h
+
+
+def _nonblank_line_numbers(data: bytes) -> np.ndarray:
+    """1-based numbers of the lines in data holding at least one token"""
+    buf = np.frombuffer(data, np.uint8)
+    separator = buf <= 32  # space, tab, CR, LF and other control bytes
+    token_start = ~separator
+    token_start[1:] &= separator[:-1]
+    line = np.cumsum(buf == 10) - (buf == 10)
+    return np.unique(line[token_start]) + 1
+
+
+def _parse_lines(data: bytes) -> Tuple[np.ndarray, np.ndarray, List[Tuple[int, str]]]:
+    """Fallback for files with malformed lines: report them, parse the rest in bulk"""
+    errors = []
+    lines = data.split(b'\n')
+    counts = np.fromiter(map(len, map(bytes.split, lines)), np.int64, len(lines))
+    for i in np.flatnonzero((counts != 0) & (counts != FIELDS)).tolist():
+        errors.append((i + 1, f"Invalid line format: {lines[i].decode('utf-8', 'replace').strip()}"))
+
+    candidates = np.flatnonzero(counts == FIELDS)
+    selected = [lines[i] for i in candidates.tolist()]
+    if not selected:
+        return np.zeros((0, FIELDS)), candidates + 1, errors
+    try:
+        values = np.loadtxt(selected, dtype=np.float64, comments=None, ndmin=2).reshape(-1, FIELDS)
+        return values, candidates + 1, errors
+    except ValueError:
+        pass
+
+    # Some line has a non-numeric field: find it the slow way
+    rows, line_numbers = [], []
+    for i, raw in zip(candidates.tolist(), selected):
+        try:
+            rows.append([float(p) for p in raw.split()])
+            line_numbers.append(i + 1)
+        except ValueError as e:
+            errors.append((i + 1, f"Invalid data: {raw.decode('utf-8', 'replace').strip()} - {e}"))
+    errors.sort()
+    return (np.array(rows, np.float64).reshape(-1, FIELDS),
+            np.array(line_numbers, np.int64), errors)
+
+
+def decode_labels(data: bytes, num_classes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Parse the contents of a YOLO label file in one pass
+
+    Well-formed files are read with a single np.loadtxt call. Files with
+    ragged lines report those and bulk-parse the rest; only a non-numeric
+    field forces a per-line parse to find it. Class ids and values are
+    validated vectorized afterwards.
+
+    Args:
+        data: Raw file contents
+        num_classes: Reject class ids outside [0, num_classes) if given
+
+    Returns:
+        Dict with 'class_ids' (N,) int32, 'yolo' (N, 4) float64 normalized
+        cx, cy, w, h, 'line_numbers' (N,) source line of each row and
+        'errors' as a list of (line_number, message) for skipped lines
+    """
+    errors: List[Tuple[int, str]] = []
+    values = None
+    if data.strip():
+        try:
+            values = np.loadtxt(io.BytesIO(data), dtype=np.float64, comments=None, ndmin=2)
+        except ValueError:
+            values = None
+        if values is not None and values.shape[1] != FIELDS:
+            values = None
+
+    if values is None:
+        values, line_numbers, errors = _parse_lines(data)
+    elif len(values) == data.count(b'\n') + (not data.endswith(b'\n')):
+        line_numbers = np.arange(1, len(values) + 1)
+    else:
+        line_numbers = _nonblank_line_numbers(data)
+
+    cls = values[:, 0]
+    valid = np.isfinite(values).all(axis=1)
+    valid &= cls == np.floor(cls)
+    if num_classes is not None:
+        valid &= (cls >= 0) & (cls < num_classes)
+
+    if not valid.all():
+        for i in np.flatnonzero(~valid):
+            if not np.isfinite(values[i]).all():
+                message = f"Non-finite value: {' '.join(map(str, values[i].tolist()))}"
+            else:
+                message = f"Invalid class ID {values[i, 0]:g}"
+            errors.append((int(line_numbers[i]), message))
+        errors.sort()
+        values, line_numbers = values[valid], line_numbers[valid]
+
+    return {
+        'class_ids': values[:, 0].astype(np.int32),
+        'yolo': values[:, 1:],
+        'line_numbers': line_numbers,
+        'errors': errors
+    }
+
+
+def encode_labels(class_ids: np.ndarray, yolo: np.ndarray, precision: int = 6,
+                  trailing_newline: bool = True) -> str:
+    """
+    Format boxes as YOLO label text with a single %-format over all rows
+
+    Args:
+        class_ids: (N,) class ids
+        yolo: (N, 4) normalized cx, cy, w, h
+        precision: Digits after the decimal point
+        trailing_newline: End the last line with a newline
+    """
+    count = len(class_ids)
+    if not count:
+        return ""
+    value = f"%.{int(precision)}f"
+    line = " ".join(["%d"] + [value] * 4) + "\n"
+    values = np.column_stack([np.asarray(class_ids, np.float64),
+                              np.asarray(yolo, np.float64).reshape(-1, 4)])
+    text = (line * count) % tuple(values.ravel().tolist())
+    return text if trailing_newline else text[:-1]
+
+
+def read_labels(path: str, num_classes: Optional[int] = None) -> Dict[str, Any]:
+    """decode_labels() on the contents of path"""
+    with open(path, 'rb') as f:
+        return decode_labels(f.read(), num_classes)
+
+
+def write_labels(path: str, class_ids: np.ndarray, yolo: np.ndarray, precision: int = 6,
+                 trailing_newline: bool = True):
+    """Write boxes to path with one write call"""
+    with open(path, 'w') as f:
+        f.write(encode_labels(class_ids, yolo, precision, trailing_newline))